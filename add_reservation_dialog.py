@@ -2,16 +2,21 @@ from PyQt6.QtWidgets import ( # type: ignore
     QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout
 )
 import kea_api
+import pool_occupancy
 import re
 import ipaddress
 from notification_window import NotificationWindow
-from config_loader import debug_print
+from config_loader import get_logger
+
+log = get_logger(__name__)
 
 class AddReservationDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Add Reservation")
         self.setMinimumSize(300, 200)
+        self.server = None  # Server to add the reservation on; None = default server
+        self.reservation = None  # Set when the dialog is accepted
 
         layout = QVBoxLayout(self)
 
@@ -25,8 +30,18 @@ class AddReservationDialog(QDialog):
         self.subnet_input = QLineEdit()
         self.subnet_input.setPlaceholderText("Subnet ID")
 
+        # Help finding a free address in the subnet's pools
+        free_layout = QHBoxLayout()
+        self.suggest_button = QPushButton("Suggest Free IP")
+        self.suggest_button.clicked.connect(self.suggest_free_ip)
+        self.free_ranges_button = QPushButton("Show Free Ranges")
+        self.free_ranges_button.clicked.connect(self.show_free_ranges)
+        free_layout.addWidget(self.suggest_button)
+        free_layout.addWidget(self.free_ranges_button)
+
         layout.addWidget(QLabel("IP Address:"))
         layout.addWidget(self.ip_input)
+        layout.addLayout(free_layout)
         layout.addWidget(QLabel("MAC Address:"))
         layout.addWidget(self.mac_input)
         layout.addWidget(QLabel("Hostname:"))
@@ -46,19 +61,62 @@ class AddReservationDialog(QDialog):
 
         layout.addLayout(button_layout)
 
+    def occupancy(self):
+        """Returns the free-address maps of the dialog's server, reading the server if the subnet is unknown."""
+        subnet_id = self.subnet_input.text().strip()
+        if not subnet_id.isdigit():
+            NotificationWindow("Enter a Subnet ID first.", "Error", parent=self).exec()
+            return None
+
+        occupancy = pool_occupancy.get_occupancy(kea_api.get_server(self.server)["name"])
+        if not occupancy.knows(subnet_id):
+            occupancy.sync(
+                kea_api.get_subnets(self.server),
+                kea_api.get_lease_store(self.server),
+                kea_api.get_reservations_from_db(self.server)
+            )
+        if not occupancy.knows(subnet_id):
+            NotificationWindow(f"Subnet {subnet_id} not found.", "Error", parent=self).exec()
+            return None
+        return occupancy
+
+    def suggest_free_ip(self):
+        """Fills in the next free pool address; pressing again moves on to the one after it."""
+        occupancy = self.occupancy()
+        if occupancy is None:
+            return
+        current = self.ip_input.text().strip()
+        try:
+            ipaddress.IPv4Address(current)
+        except ipaddress.AddressValueError:
+            current = None
+
+        ip_address = occupancy.next_free(self.subnet_input.text().strip(), after=current)
+        if ip_address is None:
+            NotificationWindow("No free addresses left in this subnet's pools.", "Info", parent=self).exec()
+            return
+        self.ip_input.setText(ip_address)
+
+    def show_free_ranges(self):
+        occupancy = self.occupancy()
+        if occupancy is not None:
+            subnet_id = self.subnet_input.text().strip()
+            NotificationWindow(occupancy.free_summary(subnet_id), f"Free Addresses - Subnet {subnet_id}", parent=self).exec()
+
     def add_reservation(self):
         """
-        Calls `add_reservation_to_db` with user inputs.
+        Validates the inputs and closes the dialog with `self.reservation` set;
+        the caller writes it to the database.
         """
         ip_address = self.ip_input.text().strip()
         mac_address = self.mac_input.text().strip()
         hostname = self.hostname_input.text().strip()
         subnet_id = self.subnet_input.text().strip()
 
-        debug_print(f"[DEBUG] Add Reservation clicked -> IP: {ip_address}, MAC: {mac_address}, Hostname: {hostname}, Subnet: {subnet_id}")
+        log.debug("Add Reservation clicked -> IP: %s, MAC: %s, Hostname: %s, Subnet: %s", ip_address, mac_address, hostname, subnet_id)
 
         if not ip_address or not mac_address or not subnet_id:
-            debug_print(f"[DEBUG] ERROR: Missing required fields.")
+            log.warning("Missing required fields.")
             NotificationWindow("IP, MAC, and Subnet are required fields.", "Error", parent=self).exec()
             return  # Prevent function from continuing
 
@@ -66,27 +124,17 @@ class AddReservationDialog(QDialog):
         try:
             ipaddress.IPv4Address(ip_address)
         except ipaddress.AddressValueError:
-            debug_print(f"[DEBUG] ERROR: Invalid IP address -> {ip_address}")
+            log.warning("Invalid IP address -> %s", ip_address)
             NotificationWindow("Invalid IP address. Enter a valid IPv4 address (e.g., 192.168.1.100)", "Error", parent=self).exec()
             return
 
         # Ensure MAC address format is valid (XX:XX:XX:XX:XX:XX or XX-XX-XX-XX-XX-XX)
         if not re.match(r"^([0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}$", mac_address):
-            debug_print(f"[DEBUG] ERROR: Invalid MAC address format -> {mac_address}")
+            log.warning("Invalid MAC address format -> %s", mac_address)
             NotificationWindow("Invalid MAC address format. Expected format: XX:XX:XX:XX:XX:XX or XX-XX-XX-XX-XX-XX", "Error", parent=self).exec()
             return
 
-        # Convert MAC address to HEX format (normalize to colons `:` for consistency)
-        mac_binary = mac_address.replace("-", ":").replace(":", "").upper().strip()
-
-        success = kea_api.add_reservation_to_db(ip_address, mac_binary, hostname, subnet_id)
-
-        debug_print(f"[DEBUG] add_reservation_to_db() returned: {success}")
-
-        if success:
-            debug_print(f"[DEBUG] SUCCESS: Reservation added.")
-            NotificationWindow(f"Reservation added successfully for {ip_address}", "Success", parent=self).exec()
-            self.accept()  # Close dialog on success
-        else:
-            debug_print(f"[DEBUG] ERROR: Failed to add reservation.")
-            NotificationWindow(f"Failed to add reservation for {ip_address}", "Error", parent=self).exec()
\ No newline at end of file
+        # The caller shows the reservation at once and commits it in the background
+        self.reservation = kea_api.reservation_record(ip_address, mac_address, hostname, subnet_id)
+        log.debug("Reservation entered: %s", self.reservation)
+        self.accept()
@@ -0,0 +1,211 @@
+import ipaddress
+import time
+from bisect import bisect_right
+from collections import namedtuple
+import metrics
+from config_loader import get_logger
+from lease_store import LeaseStore, ip_to_int
+from pool_occupancy import parse_pool
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # Optional: the pure-Python path below gives the same results, only slower
+    np = None
+
+log = get_logger(__name__)
+
+SubnetUsage = namedtuple(
+    "SubnetUsage",
+    "subnet_id subnet pool_size leases reservations pool_used free percent_free expiring_soon"
+)
+
+# Lease expiry buckets in seconds from now: expired, <15 min, <1 h, <4 h, <24 h, later
+EXPIRY_EDGES = (0, 900, 3600, 14400, 86400)
+EXPIRY_LABELS = ("Expired", "< 15 min", "< 1 h", "< 4 h", "< 24 h", "Later")
+
+# Leases ending within this many seconds count as "expiring soon"
+EXPIRING_SOON = 3600
+
+
+def _layout(subnets):
+    """
+    Returns (rows, ranges, pools): the subnets in their given order, their
+    sorted (first, last, row) address ranges and sorted (first, last, row) pools.
+    """
+    rows, ranges, pools = [], [], []
+    for subnet in subnets:
+        try:
+            network = ipaddress.IPv4Network(subnet["subnet"], strict=False)
+            subnet_pools = [parse_pool(pool) for pool in subnet.get("pools", [])]
+        except (KeyError, ValueError, OSError) as e:
+            log.warning("Skipping subnet %s: %s", subnet.get("subnet_id"), e)
+            continue
+        row = len(rows)
+        rows.append(subnet)
+        ranges.append((int(network.network_address), int(network.broadcast_address), row))
+        pools.extend((first, last, row) for first, last in subnet_pools)
+    ranges.sort()
+    pools.sort()
+    return rows, ranges, pools
+
+
+def _reservation_ips(reservations):
+    ips = []
+    for res in reservations:
+        try:
+            ips.append(ip_to_int(res["ip-address"]))
+        except (KeyError, OSError, TypeError):
+            continue
+    return ips
+
+
+def _sorted_unique(values):
+    # Sort-based; np.unique's hashing is much slower for large uint32 arrays
+    values = np.sort(values)
+    if len(values) > 1:
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+    return values
+
+
+def _usage(rows, pool_size, lease_counts, res_counts, pool_used, expiring):
+    usage = []
+    for row, subnet in enumerate(rows):
+        size = int(pool_size[row])
+        free = max(0, size - int(pool_used[row]))
+        usage.append(SubnetUsage(
+            int(subnet["subnet_id"]), subnet["subnet"], size,
+            int(lease_counts[row]), int(res_counts[row]), int(pool_used[row]),
+            free, free / size * 100 if size else 0.0, int(expiring[row])
+        ))
+    return usage
+
+
+def subnet_utilization(subnets, leases, reservations, now=None):
+    """
+    Returns a SubnetUsage per subnet, in the given order.
+
+    `leases` counts leases by their subnet ID, `reservations` the reserved
+    addresses inside the subnet, `pool_used` the distinct pool addresses that
+    are leased or reserved (an address with both counts once, an out-of-pool
+    reservation not at all), and `expiring_soon` the leases ending within
+    EXPIRING_SOON seconds. Uses NumPy when it is installed.
+    """
+    if not isinstance(leases, LeaseStore):
+        leases = LeaseStore(leases)
+    now = time.time() if now is None else now
+    with metrics.timed("analytics", "subnet_utilization") as span:
+        span.rows = len(leases)
+        if np is not None:
+            return _utilization_numpy(subnets, leases, reservations, now)
+        return _utilization_python(subnets, leases, reservations, now)
+
+
+def _utilization_numpy(subnets, leases, reservations, now):
+    rows, ranges, pools = _layout(subnets)
+    count = len(rows)
+    if not count:
+        return []
+
+    # LeaseStore columns are array('I')/array('q') buffers: viewed, not copied
+    lease_ips = np.frombuffer(leases.ips, dtype=np.uint32)
+    lease_sids = np.frombuffer(leases.subnet_ids, dtype=np.uint32)
+    expires = np.frombuffer(leases.cltts, dtype=np.int64) + np.frombuffer(leases.valid_lfts, dtype=np.uint32)
+    res_ips = _sorted_unique(np.array(_reservation_ips(reservations), dtype=np.uint32))
+
+    # Leases -> subnet row by subnet ID
+    subnet_ids = np.array([int(s["subnet_id"]) for s in rows], dtype=np.int64)
+    id_order = np.argsort(subnet_ids)
+    sorted_ids = subnet_ids[id_order]
+    pos = np.searchsorted(sorted_ids, lease_sids)
+    known = pos < count
+    known[known] = sorted_ids[pos[known]] == lease_sids[known]
+    lease_rows = id_order[pos[known]]
+    lease_counts = np.bincount(lease_rows, minlength=count)
+
+    soon = (expires[known] > now) & (expires[known] <= now + EXPIRING_SOON)
+    expiring = np.bincount(lease_rows[soon], minlength=count)
+
+    # Reservations -> subnet row by address
+    starts = np.array([r[0] for r in ranges], dtype=np.int64)
+    ends = np.array([r[1] for r in ranges], dtype=np.int64)
+    range_rows = np.array([r[2] for r in ranges], dtype=np.int64)
+    k = np.searchsorted(starts, res_ips, side="right") - 1
+    inside = k >= 0
+    inside[inside] = res_ips[inside] <= ends[k[inside]]
+    res_counts = np.bincount(range_rows[k[inside]], minlength=count)
+
+    # Distinct leased or reserved addresses inside a pool
+    pool_size = np.zeros(count, dtype=np.int64)
+    pool_used = np.zeros(count, dtype=np.int64)
+    if pools:
+        pool_starts = np.array([p[0] for p in pools], dtype=np.int64)
+        pool_ends = np.array([p[1] for p in pools], dtype=np.int64)
+        pool_rows = np.array([p[2] for p in pools], dtype=np.int64)
+        pool_size = np.bincount(pool_rows, weights=pool_ends - pool_starts + 1, minlength=count)
+
+        occupied = _sorted_unique(np.concatenate((lease_ips, res_ips)))
+        p = np.searchsorted(pool_starts, occupied, side="right") - 1
+        in_pool = p >= 0
+        in_pool[in_pool] = occupied[in_pool] <= pool_ends[p[in_pool]]
+        pool_used = np.bincount(pool_rows[p[in_pool]], minlength=count)
+
+    return _usage(rows, pool_size, lease_counts, res_counts, pool_used, expiring)
+
+
+def _utilization_python(subnets, leases, reservations, now):
+    rows, ranges, pools = _layout(subnets)
+    count = len(rows)
+    row_by_id = {int(s["subnet_id"]): row for row, s in enumerate(rows)}
+
+    lease_counts = [0] * count
+    expiring = [0] * count
+    soon = now + EXPIRING_SOON
+    for sid, cltt, lifetime in zip(leases.subnet_ids, leases.cltts, leases.valid_lfts):
+        row = row_by_id.get(sid)
+        if row is not None:
+            lease_counts[row] += 1
+            if now < cltt + lifetime <= soon:
+                expiring[row] += 1
+
+    def locate(starts, spans, ip_int):
+        n = bisect_right(starts, ip_int) - 1
+        return spans[n][2] if n >= 0 and ip_int <= spans[n][1] else None
+
+    res_ips = set(_reservation_ips(reservations))
+    starts = [r[0] for r in ranges]
+    res_counts = [0] * count
+    for ip_int in res_ips:
+        row = locate(starts, ranges, ip_int)
+        if row is not None:
+            res_counts[row] += 1
+
+    pool_size = [0] * count
+    pool_used = [0] * count
+    for first, last, row in pools:
+        pool_size[row] += last - first + 1
+    pool_starts = [p[0] for p in pools]
+    for ip_int in res_ips.union(leases.ips):
+        row = locate(pool_starts, pools, ip_int)
+        if row is not None:
+            pool_used[row] += 1
+
+    return _usage(rows, pool_size, lease_counts, res_counts, pool_used, expiring)
+
+
+def expiry_histogram(leases, now=None, edges=EXPIRY_EDGES):
+    """Returns lease counts per expiry bucket (see EXPIRY_LABELS), len(edges) + 1 of them."""
+    if not isinstance(leases, LeaseStore):
+        leases = LeaseStore(leases)
+    now = time.time() if now is None else now
+    with metrics.timed("analytics", "expiry_histogram") as span:
+        span.rows = len(leases)
+        if np is not None:
+            remaining = (np.frombuffer(leases.cltts, dtype=np.int64)
+                         + np.frombuffer(leases.valid_lfts, dtype=np.uint32) - now)
+            buckets = np.searchsorted(np.array(edges, dtype=np.float64), remaining, side="right")
+            return [int(n) for n in np.bincount(buckets, minlength=len(edges) + 1)]
+
+        counts = [0] * (len(edges) + 1)
+        for cltt, lifetime in zip(leases.cltts, leases.valid_lfts):
+            counts[bisect_right(edges, cltt + lifetime - now)] += 1
+        return counts
@@ -0,0 +1,312 @@
+from PyQt6.QtCore import QObject, QTimer, QEvent, pyqtSignal  # type: ignore
+from PyQt6 import sip  # type: ignore
+import hashlib
+import json
+import threading
+import kea_api
+from config_loader import AUTO_REFRESH, get_logger
+
+log = get_logger(__name__)
+
+# Delivered instead of data when a background fetch raised
+FETCH_FAILED = object()
+
+
+def lease_fingerprint(leases):
+    """Cheap change marker for a lease list: count, newest cltt and the cltt sum."""
+    if hasattr(leases, "fingerprint"):  # LeaseStore hashes its raw columns instead
+        return leases.fingerprint()
+    count = 0
+    newest = 0
+    total = 0
+    for lease in leases:
+        cltt = lease.get("cltt", 0) or 0
+        count += 1
+        total += cltt
+        if cltt > newest:
+            newest = cltt
+    return (count, newest, total)
+
+
+def reservation_fingerprint(reservations):
+    """Change marker for reservations, which carry no timestamps."""
+    return hash(tuple(
+        (r.get("ip-address"), str(r.get("dhcp_identifier")), r.get("hostname"))
+        for r in reservations
+    ))
+
+
+def subnet_fingerprint(subnets):
+    return hashlib.sha1(json.dumps(subnets, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def server_data_fingerprint(data):
+    """
+    Change marker for {server: (subnets, leases, reservations) or None} from a
+    fan-out read. Includes whether each server was served from the snapshot
+    cache, so going from cached to live data redraws the view.
+    """
+    return tuple(
+        (server, None) if result is None else
+        (server, kea_api.cached_since(server), subnet_fingerprint(result[0]),
+         lease_fingerprint(result[1]), reservation_fingerprint(result[2]))
+        for server, result in data.items()
+    )
+
+
+class AutoRefreshScheduler(QObject):
+    """
+    Periodically re-fetches data for one view and only hands it to the view
+    when its fingerprint changed.
+
+    The interval starts at `min_ms`, grows by `backoff` after every fetch that
+    found nothing new (up to `max_ms`) and snaps back to `min_ms` when the data
+    changes or `notify_edit()` is called. Polling stops while the window is
+    hidden or minimized and resumes when it is shown again.
+
+    Every fetch runs on a worker thread and its result is handed back to the
+    GUI thread through `fetched`, so a slow or unreachable server never freezes
+    the window; a tick is skipped while the previous fetch is still running.
+    `refresh_in_background()` starts one such fetch at once, e.g. to reconcile
+    a view drawn from the snapshot cache.
+    """
+
+    # Carries data fetched on a worker thread back to the GUI thread
+    fetched = pyqtSignal(object)
+
+    def __init__(self, widget, name, fetch, fingerprint, apply):
+        super().__init__(widget)
+        settings = AUTO_REFRESH.get(name, {})
+
+        self.widget = widget
+        self.name = name
+        self.fetch = fetch
+        self.fingerprint = fingerprint
+        self.apply = apply
+
+        self.enabled = AUTO_REFRESH.get("enabled", False)
+        self.min_ms = int(settings.get("min_ms", 5000))
+        self.max_ms = int(settings.get("max_ms", 120000))
+        self.backoff = float(AUTO_REFRESH.get("backoff", 2.0))
+        self.interval = self.min_ms
+        self.last_fingerprint = None
+        self.watched_window = None
+        self.fetching = False  # A fetch is running on a worker thread
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        self.fetched.connect(self._deliver)
+
+    def start(self):
+        """Begins polling once the view is on screen."""
+        if not self.enabled:
+            return
+        # Watch the view itself (hidden splitter pane) and its top-level window (minimized)
+        self.widget.installEventFilter(self)
+        window = self.widget.window()
+        if window is not self.widget and window is not self.watched_window:
+            if self.watched_window is not None:
+                self.watched_window.removeEventFilter(self)
+            window.installEventFilter(self)
+            self.watched_window = window
+        self._schedule()
+
+    def stop(self):
+        """Stops polling and detaches from the watched windows."""
+        self.timer.stop()
+        for watched in (self.widget, self.watched_window):
+            if watched is not None and not sip.isdeleted(watched):
+                watched.removeEventFilter(self)
+        self.watched_window = None
+
+    def _paused(self):
+        if sip.isdeleted(self.widget):
+            return True
+        window = self.widget.window()
+        return not self.widget.isVisible() or window.isMinimized()
+
+    def _schedule(self):
+        if self.enabled and not self._paused():
+            self.timer.start(self.interval)
+
+    def eventFilter(self, obj, event):
+        event_type = event.type()
+        if event_type in (QEvent.Type.Hide, QEvent.Type.WindowStateChange, QEvent.Type.Show):
+            if self._paused():
+                if self.timer.isActive():
+                    log.debug("Auto-refresh '%s' paused (window hidden)", self.name)
+                self.timer.stop()
+            elif not self.timer.isActive():
+                log.debug("Auto-refresh '%s' resumed", self.name)
+                self.interval = self.min_ms
+                self._schedule()
+        return False
+
+    def remember(self, data):
+        """Records the fingerprint of data the view loaded by itself (manual refresh)."""
+        self.last_fingerprint = self.fingerprint(data)
+
+    def notify_edit(self):
+        """Speeds polling back up after the user changed something."""
+        self.interval = self.min_ms
+        if self.enabled:
+            self.timer.stop()
+            self._schedule()
+
+    def refresh_in_background(self):
+        """Fetches once on a worker thread; the result is applied on the GUI thread. No-op while a fetch runs."""
+        if self.fetching:
+            return
+        self.fetching = True
+
+        def run():
+            try:
+                with kea_api.quiet_errors():
+                    data = self.fetch()
+            except Exception:
+                log.exception("Auto-refresh '%s' fetch failed", self.name)
+                data = FETCH_FAILED
+            if not sip.isdeleted(self):
+                self.fetched.emit(data)
+
+        self.timer.stop()
+        threading.Thread(target=run, name=f"refresh-{self.name}", daemon=True).start()
+
+    def _deliver(self, data):
+        self.fetching = False
+        if sip.isdeleted(self.widget):
+            return
+        if data is FETCH_FAILED:
+            self._schedule()
+            return
+        self._handle(data)
+
+    def tick(self):
+        if self._paused():
+            return
+        self.refresh_in_background()
+
+    def _handle(self, data):
+        fingerprint = self.fingerprint(data)
+
+        if fingerprint != self.last_fingerprint:
+            log.debug("Auto-refresh '%s': data changed, updating view", self.name)
+            self.last_fingerprint = fingerprint
+            self.apply(data)
+            self.interval = self.min_ms
+        else:
+            self.interval = min(int(self.interval * self.backoff), self.max_ms)
+            log.debug("Auto-refresh '%s': unchanged, next check in %s ms", self.name, self.interval)
+
+        self._schedule()
+
+
+class ServerReader(QObject):
+    """
+    Reads every server on the fan-out pool without blocking the GUI thread.
+
+    `read(server)` runs on the pool; as each server finishes,
+    `on_result(data)` is called on the GUI thread with {server: result} in
+    configured order: the servers answered so far, and the previous read's
+    result for the rest. A slow or unreachable server so holds up only its own
+    part of the view. A start() while a read is running is remembered and runs
+    once that read is done.
+    """
+
+    # (server, result) from a pool thread back to the GUI thread
+    result_ready = pyqtSignal(str, object)
+
+    def __init__(self, parent, read, on_result):
+        super().__init__(parent)
+        self.read = read
+        self.on_result = on_result
+        self.results = {}
+        self.last = {}  # Results of the last complete read
+        self.waiting = set()
+        self.again = False
+        self.result_ready.connect(self._deliver)
+
+    def start(self):
+        if self.waiting:
+            self.again = True
+            return
+        servers = kea_api.server_names()
+        self.results = {}
+        self.waiting = set(servers)
+        if not servers:
+            self.on_result({})
+            return
+
+        def read(server):
+            with kea_api.quiet_errors():
+                return self.read(server)
+
+        def ready(server, result):
+            if not sip.isdeleted(self):
+                self.result_ready.emit(server, result)
+
+        kea_api.fan_out_each(read, ready, servers)
+
+    def _deliver(self, server, result):
+        if server not in self.waiting:
+            return
+        self.waiting.discard(server)
+        self.results[server] = result
+        if not self.waiting:
+            self.last = self.results
+        self.on_result({
+            name: self.results[name] if name in self.results else self.last[name]
+            for name in kea_api.server_names() if name in self.results or name in self.last
+        })
+        if not self.waiting and self.again:
+            self.again = False
+            self.start()
+
+
+class LeaseFeedPoller(QObject):
+    """
+    Polls the incremental lease source (kea_api.poll_lease_store) every
+    `interval` ms on a worker thread, so a slow SSH or MySQL round trip never
+    holds up the GUI. Each non-empty (changed, removed) delta is handed to
+    `on_delta` on the GUI thread; a tick while a poll is running is skipped.
+    """
+
+    # (changed, removed) from the worker thread back to the GUI thread
+    polled = pyqtSignal(object, object)
+
+    def __init__(self, parent, interval, on_delta):
+        super().__init__(parent)
+        self.interval = int(interval)
+        self.on_delta = on_delta
+        self.polling = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.polled.connect(self._deliver)
+
+    def start(self):
+        self.timer.start(self.interval)
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        if self.polling:
+            return
+        self.polling = True
+
+        def run():
+            try:
+                changed, removed = kea_api.poll_lease_store()
+            except Exception as e:
+                log.error("Lease feed poll failed: %s", e)
+                changed, removed = [], []
+            if not sip.isdeleted(self):
+                self.polled.emit(changed, removed)
+
+        threading.Thread(target=run, name="lease-feed", daemon=True).start()
+
+    def _deliver(self, changed, removed):
+        self.polling = False
+        if changed or removed:
+            self.on_delta(changed, removed)
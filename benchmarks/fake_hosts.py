@@ -0,0 +1,138 @@
+# SQLite stand-in for Kea's MySQL `hosts` table.
+#
+# Implements just enough of the pymysql connection/cursor interface (with
+# %s placeholders, dict rows and the INET_ATON/INET_NTOA/HEX/UNHEX functions)
+# for kea_api's reservation queries to run unchanged.
+import ipaddress
+import re
+import sqlite3
+
+
+def _inet_ntoa(value):
+    return None if value is None else str(ipaddress.IPv4Address(int(value)))
+
+
+def _inet_aton(value):
+    return None if value is None else int(ipaddress.IPv4Address(value))
+
+
+def _unhex(value):
+    return None if value is None else bytes.fromhex(value)
+
+
+def _hex(value):
+    if value is None:
+        return None
+    return value.hex().upper() if isinstance(value, (bytes, bytearray)) else format(int(value), "X")
+
+
+_DUPLICATE_KEY = re.compile(r"\s+ON DUPLICATE KEY UPDATE\s+.*", re.IGNORECASE | re.DOTALL)
+
+
+def _translate(query):
+    """Rewrites the MySQL-only bits of kea_api's SQL for SQLite."""
+    query = query.replace("%s", "?")
+    if _DUPLICATE_KEY.search(query):
+        query = _DUPLICATE_KEY.sub("", query).replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+    return query.rstrip().rstrip(";")
+
+
+class Cursor:
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+        self.rowcount = -1
+
+    def execute(self, query, args=None):
+        self._cursor.execute(_translate(query), tuple(args or ()))
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def executemany(self, query, seq_of_args):
+        self._cursor.executemany(_translate(query), [tuple(a) for a in seq_of_args])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def _row(self, row):
+        return None if row is None else dict(zip([d[0] for d in self._cursor.description], row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        names = [d[0] for d in self._cursor.description]
+        return [dict(zip(names, row)) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        names = [d[0] for d in self._cursor.description]
+        for row in self._cursor:
+            yield dict(zip(names, row))
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, db):
+        self._db = db
+        self.open = True
+
+    def cursor(self):
+        return Cursor(self._db)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.open = False  # The shared in-memory database stays alive
+
+
+class FakeHostsDB:
+    """In-memory `hosts` table; connect() hands out pymysql-like connections."""
+
+    def __init__(self):
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.create_function("INET_NTOA", 1, _inet_ntoa)
+        self.db.create_function("INET_ATON", 1, _inet_aton)
+        self.db.create_function("UNHEX", 1, _unhex)
+        self.db.create_function("HEX", 1, _hex)
+        self.db.execute("""
+            CREATE TABLE hosts (
+                host_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dhcp_identifier BLOB NOT NULL,
+                dhcp_identifier_type INTEGER NOT NULL,
+                dhcp4_subnet_id INTEGER,
+                ipv4_address INTEGER UNIQUE,
+                hostname TEXT
+            )
+        """)
+
+    def populate(self, leases, ratio=0.1):
+        """Reserves every 1/ratio-th lease's address for its MAC."""
+        step = max(1, int(round(1 / ratio))) if ratio else 0
+        rows = []
+        if step:
+            for lease in leases[::step]:
+                rows.append((
+                    bytes.fromhex(lease["hw-address"].replace(":", "")),
+                    lease["subnet-id"],
+                    int(ipaddress.IPv4Address(lease["ip-address"])),
+                    f"reserved-{lease['hostname']}"
+                ))
+        self.db.executemany(
+            "INSERT INTO hosts (dhcp_identifier, dhcp_identifier_type, dhcp4_subnet_id, ipv4_address, hostname) VALUES (?, 0, ?, ?, ?)",
+            rows
+        )
+        self.db.commit()
+        return len(rows)
+
+    def connect(self, *args, **kwargs):
+        return Connection(self.db)
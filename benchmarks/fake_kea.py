@@ -0,0 +1,185 @@
+# In-process stand-in for the Kea control agent.
+#
+# Serves the subset of the control API that KEA DHCP Manager uses over real
+# HTTP on localhost, backed by an in-memory configuration and lease list, so
+# kea_api can be exercised end to end without a Kea server.
+import copy
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _answer(result=0, text="", arguments=None):
+    response = {"result": result, "text": text}
+    if arguments is not None:
+        response["arguments"] = arguments
+    return [response]
+
+
+def make_subnets(lease_count, per_subnet=50000):
+    """Enough /16 subnets (10.<n>.0.0/16) to hold `lease_count` leases."""
+    count = max(1, -(-lease_count // per_subnet))
+    return [
+        {
+            "id": n + 1,
+            "subnet": f"10.{n + 1}.0.0/16",
+            "valid-lifetime": 3600,
+            "renew-timer": 1800,
+            "rebind-timer": 3150,
+            "pools": [{"pool": f"10.{n + 1}.0.10-10.{n + 1}.255.250"}]
+        }
+        for n in range(count)
+    ]
+
+
+def make_leases(lease_count, subnets, now=None):
+    """Deterministic leases spread evenly over the subnets' pools."""
+    now = int(now or time.time())
+    per_subnet = -(-lease_count // len(subnets))
+    leases = []
+    for i in range(lease_count):
+        subnet = subnets[i // per_subnet]
+        offset = 10 + (i % per_subnet)
+        second = subnet["id"]
+        leases.append({
+            "ip-address": f"10.{second}.{offset >> 8}.{offset & 0xFF}",
+            "hw-address": ":".join(f"{b:02x}" for b in (0x02, 0x00, (i >> 24) & 0xFF, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF)),
+            "hostname": f"host-{i}",
+            "subnet-id": subnet["id"],
+            "cltt": now - (i % 3600),
+            "valid-lft": 3600,
+            "state": 0
+        })
+    return leases
+
+
+class FakeKeaState:
+    def __init__(self, subnets, leases):
+        self.lock = threading.Lock()
+        self.config = {"Dhcp4": {"subnet4": subnets, "valid-lifetime": 3600}}
+        self.leases = leases
+        self.writes = 0
+
+    def handle(self, command, arguments):
+        with self.lock:
+            if command == "config-get":
+                return _answer(arguments=copy.deepcopy(self.config))
+
+            if command == "config-set":
+                self.config = copy.deepcopy(arguments)
+                return _answer(text="Configuration successful.")
+
+            if command == "config-write":
+                self.writes += 1
+                return _answer(text="Configuration written.")
+
+            if command == "lease4-get-all":
+                subnet_ids = set((arguments or {}).get("subnets", []))
+                leases = [l for l in self.leases if not subnet_ids or l["subnet-id"] in subnet_ids]
+                if not leases:
+                    return _answer(3, "0 IPv4 lease(s) found.", {"leases": []})
+                return _answer(text=f"{len(leases)} IPv4 lease(s) found.", arguments={"leases": leases})
+
+            if command == "lease4-get-page":
+                start = (arguments or {}).get("from", "start")
+                limit = int((arguments or {}).get("limit", 1000))
+                index = 0
+                if start != "start":
+                    index = next((i + 1 for i, l in enumerate(self.leases) if l["ip-address"] == start), len(self.leases))
+                page = self.leases[index:index + limit]
+                if not page:
+                    return _answer(3, "0 IPv4 lease(s) found.", {"leases": [], "count": 0})
+                return _answer(text=f"{len(page)} IPv4 lease(s) found.", arguments={"leases": page, "count": len(page)})
+
+            if command == "lease4-get":
+                ip_address = (arguments or {}).get("ip-address")
+                lease = next((l for l in self.leases if l["ip-address"] == ip_address), None)
+                if lease is None:
+                    return _answer(3, "Lease not found.")
+                return _answer(text="IPv4 lease found.", arguments=lease)
+
+            if command == "lease4-del":
+                ip_address = (arguments or {}).get("ip-address")
+                before = len(self.leases)
+                self.leases = [l for l in self.leases if l["ip-address"] != ip_address]
+                if len(self.leases) == before:
+                    return _answer(3, "IPv4 lease not found.")
+                return _answer(text="IPv4 lease deleted.")
+
+            if command == "lease4-wipe":
+                subnet_id = (arguments or {}).get("subnet-id")
+                before = len(self.leases)
+                self.leases = [l for l in self.leases if subnet_id is not None and l["subnet-id"] != subnet_id]
+                return _answer(text=f"Deleted {before - len(self.leases)} IPv4 lease(s).")
+
+            if command in ("statistic-get-all", "stat-lease4-get"):
+                return _answer(arguments=self._statistics())
+
+            return _answer(2, f"'{command}' command not supported.")
+
+    def _statistics(self):
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        stats = {
+            "pkt4-received": [[len(self.leases) * 4, now]],
+            "pkt4-discover-received": [[len(self.leases), now]],
+            "pkt4-request-received": [[len(self.leases), now]],
+            "pkt4-ack-sent": [[len(self.leases), now]],
+            "pkt4-nak-sent": [[0, now]],
+            "v4-allocation-fail": [[0, now]],
+            "declined-addresses": [[0, now]]
+        }
+        assigned = {}
+        for lease in self.leases:
+            assigned[lease["subnet-id"]] = assigned.get(lease["subnet-id"], 0) + 1
+        for subnet in self.config["Dhcp4"].get("subnet4", []):
+            total = 0
+            for pool in subnet.get("pools", []):
+                start, end = pool["pool"].split("-")
+                total += int.from_bytes(bytes(map(int, end.split("."))), "big") - int.from_bytes(bytes(map(int, start.split("."))), "big") + 1
+            stats[f"subnet[{subnet['id']}].total-addresses"] = [[total, now]]
+            stats[f"subnet[{subnet['id']}].assigned-addresses"] = [[assigned.get(subnet["id"], 0), now]]
+            stats[f"subnet[{subnet['id']}].declined-addresses"] = [[0, now]]
+        return stats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't stall kept-alive connections
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        answer = self.server.state.handle(request.get("command"), request.get("arguments"))
+        body = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeKeaServer:
+    """Runs the fake control agent on an ephemeral localhost port."""
+
+    def __init__(self, subnets, leases):
+        self.state = FakeKeaState(subnets, leases)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.state = self.state
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-kea", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
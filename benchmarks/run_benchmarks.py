@@ -0,0 +1,197 @@
+# Benchmarks the data paths behind the main views against an in-process fake
+# Kea control agent and an SQLite stand-in for the MySQL `hosts` table.
+#
+#   python benchmarks/run_benchmarks.py                      # 1k, 10k, 100k, 1M leases
+#   python benchmarks/run_benchmarks.py --sizes 1000,10000   # quick run
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/<older>.json
+#
+# Qt runs on the offscreen platform, so no display is needed. Results are
+# written to benchmarks/results/ as JSON; --compare flags operations that got
+# more than --threshold slower than an earlier run.
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt6.QtWidgets import QApplication  # type: ignore
+from PyQt6.QtCore import QT_VERSION_STR  # type: ignore
+
+APP = QApplication.instance() or QApplication(sys.argv)
+
+import kea_api  # noqa: E402
+import dhcp_manager  # noqa: E402
+import show_leases_dialog  # noqa: E402
+import status_dialog  # noqa: E402
+import snapshot_cache  # noqa: E402
+import lease_history  # noqa: E402
+import utilization_history  # noqa: E402
+import pool_occupancy  # noqa: E402
+from config_loader import SNAPSHOT_CACHE, LEASE_HISTORY, UTILIZATION_HISTORY  # noqa: E402
+from benchmarks.fake_kea import FakeKeaServer, make_subnets, make_leases  # noqa: E402
+from benchmarks.fake_hosts import FakeHostsDB  # noqa: E402
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def measure(func, repeat):
+    """Runs func `repeat` times and returns timing stats in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+        APP.processEvents()
+    return {"min_s": min(samples), "median_s": statistics.median(samples), "runs": repeat}
+
+
+def use_real_paths():
+    """Points every module at the fake servers instead of dummy/alternate sources."""
+    for module in (kea_api, dhcp_manager, show_leases_dialog, status_dialog):
+        if hasattr(module, "DUMMY_DATA"):
+            module.DUMMY_DATA = False
+    kea_api.LEASE_SOURCE = "api"
+
+
+def reset_stores(directory):
+    """
+    Starts a size from scratch: the on-disk stores are reopened under
+    `directory` and the in-memory lease stores are emptied, so no read is
+    served from an earlier size's data and nothing is left in the cwd.
+    """
+    SNAPSHOT_CACHE["path"] = os.path.join(directory, "cache.sqlite")
+    LEASE_HISTORY["path"] = os.path.join(directory, "leases.sqlite")
+    UTILIZATION_HISTORY["path"] = os.path.join(directory, "history.sqlite")
+    snapshot_cache._cache = None
+    lease_history._history = None
+    lease_history._recorder = None  # The old one idles, bound to the old history
+    utilization_history._history = None
+    kea_api._lease_stores.clear()
+    kea_api._cached_stores.clear()
+    pool_occupancy._occupancy.clear()
+
+
+def bench_size(lease_count, repeat, reservation_ratio, directory):
+    reset_stores(directory)
+    subnets = make_subnets(lease_count)
+    leases = make_leases(lease_count, subnets)
+    hosts = FakeHostsDB()
+    reservation_count = hosts.populate(leases, reservation_ratio)
+
+    results = {"leases": lease_count, "subnets": len(subnets), "reservations": reservation_count, "timings": {}}
+    timings = results["timings"]
+
+    with FakeKeaServer(subnets, leases) as server, kea_api.quiet_errors():
+        kea_api.KEA_SERVER = server.url
+        kea_api.mysql_connect = hosts.connect
+
+        timings["get_active_leases"] = measure(kea_api.get_active_leases, repeat)
+        timings["get_reservations_from_db"] = measure(kea_api.get_reservations_from_db, repeat)
+        timings["get_lease_store"] = measure(kea_api.get_lease_store, repeat)
+
+        tree = dhcp_manager.TreeViewDialog()  # Builds the tree and lease table once
+        dialog = tree.leases_dialog
+        dialog.auto_refresh.stop()
+        tree.auto_refresh.stop()
+
+        timings["ShowLeasesDialog.load_leases"] = measure(lambda: dialog.load_leases(None), repeat)
+
+        # Filter on a hostname fragment that matches a small share of rows
+        dialog.filters[2].blockSignals(True)
+        dialog.filters[2].setText("host-1")
+        dialog.filters[2].blockSignals(False)
+        timings["ShowLeasesDialog.apply_filters"] = measure(dialog.apply_filters, repeat)
+
+        timings["TreeViewDialog.load_subnets"] = measure(lambda: tree.load_subnets(tree.fetch_servers()), repeat)
+
+        status = status_dialog.StatusDialog()
+        status.auto_refresh.stop()
+        timings["StatusDialog.update_status"] = measure(lambda: status.update_status(status.fetch_status_data()), repeat)
+
+        status.deleteLater()
+        tree.close()
+        tree.deleteLater()
+        APP.processEvents()
+
+    return results
+
+
+def compare(current, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for size, result in current["results"].items():
+        old = baseline.get("results", {}).get(size)
+        if not old:
+            continue
+        for name, timing in result["timings"].items():
+            before = old["timings"].get(name)
+            if not before or not before["min_s"]:
+                continue
+            ratio = timing["min_s"] / before["min_s"]
+            marker = "REGRESSION" if ratio > 1 + threshold else ""
+            print(f"  {size:>8} {name:<36} {before['min_s'] * 1000:10.1f} ms -> {timing['min_s'] * 1000:10.1f} ms  x{ratio:5.2f} {marker}")
+            if marker:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KEA DHCP Manager benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated lease counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per operation (minimum is reported)")
+    parser.add_argument("--reservation-ratio", type=float, default=0.1, help="Share of leases that also have a reservation")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    use_real_paths()
+    logging.getLogger("kea_manager").setLevel(logging.WARNING)  # Keep per-call debug logging out of the timings
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qt": QT_VERSION_STR,
+        "results": {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix="kea-bench-") as scratch:
+        for size in sizes:
+            print(f"Benchmarking {size} leases...")
+            directory = os.path.join(scratch, str(size))
+            os.makedirs(directory)
+            result = bench_size(size, args.repeat if size < 1000000 else 1, args.reservation_ratio, directory)
+            report["results"][str(size)] = result
+            for name, timing in result["timings"].items():
+                print(f"  {name:<36} {timing['min_s'] * 1000:10.1f} ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        print(f"Comparison with {args.compare}:")
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from PyQt6.QtWidgets import QProgressDialog  # type: ignore
+from PyQt6.QtCore import QObject, Qt, pyqtSignal  # type: ignore
+from PyQt6 import sip  # type: ignore
+import threading
+import kea_api
+from config_loader import get_logger
+
+log = get_logger(__name__)
+
+
+class LeaseDeleteJob(QObject):
+    """
+    Runs a bulk lease delete on a worker thread behind a progress dialog.
+
+    `work(progress, cancelled)` does the deleting (kea_api.delete_leases or
+    wipe_subnet_leases) and returns {ip_address: reason} for the leases it could
+    not delete. Cancel in the dialog sets `cancelled`; deletes already sent
+    still finish. `on_done(failures)` runs on the GUI thread afterwards.
+    """
+
+    # (done, total) from the worker thread; total 0 = unknown (single lease4-wipe)
+    progressed = pyqtSignal(int, int)
+    # failures, or None if the job raised
+    finished = pyqtSignal(object)
+
+    def __init__(self, parent, label, work, on_done):
+        super().__init__(parent)
+        self.work = work
+        self.on_done = on_done
+        self.cancelled = threading.Event()
+        self.last_percent = -1
+
+        self.dialog = QProgressDialog(label, "Cancel", 0, 0, parent)
+        self.dialog.setWindowTitle("Deleting Leases")
+        self.dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.dialog.setMinimumDuration(300)  # No flicker for quick jobs
+        self.dialog.canceled.connect(self.cancelled.set)
+
+        self.progressed.connect(self._show_progress)
+        self.finished.connect(self._finish)
+
+    def start(self):
+        threading.Thread(target=self._run, name="lease-delete", daemon=True).start()
+
+    def _run(self):
+        try:
+            with kea_api.quiet_errors():
+                failures = self.work(self._report, self.cancelled)
+        except Exception:
+            log.exception("Bulk lease delete failed")
+            failures = None
+        if not sip.isdeleted(self):
+            self.finished.emit(failures)
+
+    def _report(self, done, total):
+        # At most one signal per percent so 10k deletes don't flood the event queue
+        percent = done * 100 // total if total else 0
+        if percent != self.last_percent or done == total:
+            self.last_percent = percent
+            if not sip.isdeleted(self):
+                self.progressed.emit(done, total)
+
+    def _show_progress(self, done, total):
+        self.dialog.setMaximum(total)
+        self.dialog.setValue(done)
+        self.dialog.setLabelText(f"Deleted {done} of {total} leases...")
+
+    def _finish(self, failures):
+        self.dialog.reset()
+        self.dialog.deleteLater()
+        self.on_done(failures)
+        self.deleteLater()
@@ -0,0 +1,53 @@
+from PyQt6.QtCore import QObject, pyqtSignal  # type: ignore
+from PyQt6 import sip  # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+import kea_api
+from config_loader import get_logger
+
+log = get_logger(__name__)
+
+
+class CommitQueue(QObject):
+    """
+    Runs database writes on one worker thread so the GUI never waits for them.
+
+    Writes run one at a time in the order they were submitted, so a later edit
+    of the same row can't overtake an earlier one. Each write's callback is
+    called on the GUI thread as `on_done(result, error)`, where `error` is the
+    exception the write raised (None if it returned normally).
+    """
+
+    # Carries (callback, result, error) from the worker thread back to the GUI thread
+    finished = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="commit")
+        self.finished.connect(self._deliver)
+
+    def submit(self, write, on_done):
+        """Queues `write()`; `on_done(result, error)` runs on the GUI thread afterwards."""
+        self.pending += 1
+
+        def run():
+            result = error = None
+            try:
+                with kea_api.quiet_errors():
+                    result = write()
+            except Exception as e:  # The callback still has to run so the view can roll back
+                log.exception("Background commit failed")
+                error = e
+            if not sip.isdeleted(self):
+                self.finished.emit(on_done, result, error)
+
+        self.executor.submit(run)
+
+    def _deliver(self, on_done, result, error):
+        self.pending -= 1
+        on_done(result, error)
+
+    def drain(self):
+        """Blocks until every queued write has run, e.g. before the application exits."""
+        self.executor.shutdown(wait=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="commit")
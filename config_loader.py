@@ -1,6 +1,8 @@
 import json
+import logging
 import os
 import sys
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from PyQt6.QtGui import QGuiApplication # type: ignore
 
@@ -29,18 +31,154 @@ load_config()
 # Define global variables
 DEBUG = CONFIG.get("debug", "NO").strip().upper() == "YES"
 MYSQL_CONFIG = CONFIG.get("mysql", {})
-KEA_SERVER = f"http://{CONFIG['server_address']}:{CONFIG['server_port']}"
+
+def load_servers():
+    """
+    Returns one dict per Kea server (name, address, port, url, mysql, ssh_user,
+    ssh_password, ha_peer). Without a "servers" list the top-level
+    server_address/server_port/mysql settings describe the only server.
+    """
+    entries = CONFIG.get("servers") or [{
+        "name": CONFIG["server_address"],
+        "address": CONFIG["server_address"],
+        "port": CONFIG["server_port"]
+    }]
+
+    servers = []
+    for entry in entries:
+        server = dict(entry)
+        server.setdefault("name", entry["address"])
+        server.setdefault("port", 8000)
+        server.setdefault("mysql", MYSQL_CONFIG)
+        server.setdefault("ssh_user", CONFIG.get("ssh_user", ""))
+        server.setdefault("ssh_password", CONFIG.get("ssh_password", ""))
+        server.setdefault("ha_peer", None)
+        server["url"] = f"http://{server['address']}:{server['port']}"
+        servers.append(server)
+    return servers
+
+# The first server is the default one: lease feeds, "Start Services" and
+# single-server calls go to it
+SERVERS = load_servers()
+KEA_SERVER = SERVERS[0]["url"]
+MYSQL_CONFIG = SERVERS[0]["mysql"]
+
+# Concurrent reads across servers and pushing config changes to HA peers
+MULTI_SERVER = CONFIG.get("multi_server", {})
 WINDOW_SIZES = CONFIG.get("WINDOW_SIZES", {})
 SPLITTER_SIZES = CONFIG.get("SPLITTER_SIZES", {})
 DUMMY_DATA = CONFIG.get("dummy_data", False)
+DUMMY_CONFIG = CONFIG.get("dummy", {})
+
+# Where active leases come from: "api" (lease4-get-all), "memfile" (tail kea-leases4.csv)
+# or "mysql" (read the lease4 table in the database configured under "mysql")
+LEASE_SOURCE = str(CONFIG.get("lease_source", "api")).strip().lower()
+MEMFILE_CONFIG = CONFIG.get("memfile", {})
+MYSQL_LEASES_CONFIG = CONFIG.get("mysql_leases", {})
+
+# Background refresh of the lease table, tree and status dialog
+AUTO_REFRESH = CONFIG.get("auto_refresh", {})
+
+# Inline table edits are buffered and saved together after "flush_ms" of quiet (0: only on Save)
+EDIT_BUFFER = CONFIG.get("edit_buffer", {})
+
+# Bulk lease deletion: concurrent lease4-del workers, and whether subnet wipes try lease4-wipe first
+BULK_DELETE = CONFIG.get("bulk_delete", {})
+
+# Last good subnets/leases/reservations on disk, for instant startup and offline viewing
+SNAPSHOT_CACHE = CONFIG.get("snapshot_cache", {})
+
+# Live packet/allocation rates: statistic-get-all every "interval_ms", rates over "window_s" from the last "samples" polls
+PACKET_RATES = CONFIG.get("packet_rates", {})
+
+# Lease churn history: lease table deltas plus periodic checkpoints, for time travel and per-IP/MAC history
+LEASE_HISTORY = CONFIG.get("lease_history", {})
+
+# Per-subnet pool usage sampled from Kea's statistics, for trends in the Status window
+UTILIZATION_HISTORY = CONFIG.get("utilization_history", {})
+
+# MAC vendor lookup: sorted OUI table built by oui_lookup.py, memory-mapped on first use
+OUI_DATABASE = CONFIG.get("oui", {})
+
+# Profiler mode: cProfile/tracemalloc report per UI action, written to "report_dir"
+PROFILER = CONFIG.get("profiler", {})
+
+# Latency/payload metrics export (Prometheus text format)
+METRICS_CONFIG = CONFIG.get("metrics", {})
 
 # Check if screen resolution should be used
 USE_SCREEN_RESOLUTION = WINDOW_SIZES.get("use_screen_resolution", False)
 
-def debug_print(message):
-    """Prints debug messages if debugging is enabled."""
-    if DEBUG:
-        print(f"[DEBUG] {message}")
+# Logging: "logging.level" sets the default, "logging.modules" overrides it per module
+# (e.g. {"kea_api": "DEBUG"}), "logging.file" adds a rotating log file.
+# Without a "logging" block, "debug": "YES" means DEBUG and anything else WARNING.
+LOGGING_CONFIG = CONFIG.get("logging", {})
+LOG_PAYLOAD_LIMIT = int(LOGGING_CONFIG.get("max_payload_chars", 2000))
+
+
+class Truncated:
+    """
+    Wraps a log argument so it is only converted to text if the record is
+    actually emitted, and then cut to `limit` characters. Use it for API
+    responses and other payloads that can be megabytes long.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = LOG_PAYLOAD_LIMIT if limit is None else limit
+
+    def __str__(self):
+        text = str(self.value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... [{len(text) - self.limit} more chars]"
+        return text
+
+    __repr__ = __str__
+
+
+def setup_logging():
+    """Configures the `kea_manager` logger tree from config.json."""
+    root = logging.getLogger("kea_manager")
+    level = str(LOGGING_CONFIG.get("level", "DEBUG" if DEBUG else "WARNING")).upper()
+
+    # "OFF" short-circuits every logging call before any argument is looked at
+    if level == "OFF":
+        logging.disable(logging.CRITICAL)
+        return
+
+    root.setLevel(level)
+    root.propagate = False
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    if not root.handlers:
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        root.addHandler(console)
+
+        log_file = LOGGING_CONFIG.get("file", "")
+        if log_file:
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=int(LOGGING_CONFIG.get("max_bytes", 1048576)),
+                backupCount=int(LOGGING_CONFIG.get("backup_count", 3)),
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(formatter)
+            root.addHandler(file_handler)
+
+    for module, module_level in LOGGING_CONFIG.get("modules", {}).items():
+        logging.getLogger(f"kea_manager.{module}").setLevel(str(module_level).upper())
+
+
+def get_logger(name):
+    """Returns the logger for a module, e.g. get_logger(__name__)."""
+    return logging.getLogger(f"kea_manager.{name}")
+
+
+setup_logging()
+log = get_logger(__name__)
 
 def get_screen_size():
     """Returns the screen width and height (80% of the available screen)."""
@@ -50,14 +188,14 @@ def get_screen_size():
     
     screen = app.primaryScreen()
     if screen is None:
-        debug_print("Screen detection failed. Using default window size (1000x600).")
+        log.debug("Screen detection failed. Using default window size (1000x600).")
         return 1000, 600  # Safe fallback
 
     geometry = screen.geometry()
     screen_width = int(geometry.width() * 0.8)  # 80% width
     screen_height = int(geometry.height() * 0.8)  # 80% height
     
-    debug_print(f"Detected screen size: {geometry.width()}x{geometry.height()}, using 80% -> {screen_width}x{screen_height}.")
+    log.debug("Detected screen size: %sx%s, using 80%% -> %sx%s.", geometry.width(), geometry.height(), screen_width, screen_height)
     return screen_width, screen_height
 
 def apply_dynamic_window_sizes():
@@ -69,17 +207,17 @@ def apply_dynamic_window_sizes():
         if "main_window" in WINDOW_SIZES:
             WINDOW_SIZES["main_window"]["width"] = screen_width
             WINDOW_SIZES["main_window"]["height"] = screen_height
-            debug_print(f"Using detected resolution for main window: {screen_width}x{screen_height}")
+            log.debug("Using detected resolution for main window: %sx%s", screen_width, screen_height)
 
         # Override leases dialog size
         if "leases_dialog" in WINDOW_SIZES:
             WINDOW_SIZES["leases_dialog"]["width"] = screen_width
             WINDOW_SIZES["leases_dialog"]["height"] = screen_height
-            debug_print(f"Using detected resolution for leases dialog: {screen_width}x{screen_height}")
+            log.debug("Using detected resolution for leases dialog: %sx%s", screen_width, screen_height)
 
     else:
         # Using predefined resolution from config.json
         mw = WINDOW_SIZES.get("main_window", {})
         ld = WINDOW_SIZES.get("leases_dialog", {})
-        debug_print(f"Using resolution from config.json: Main Window {mw.get('width', 'N/A')}x{mw.get('height', 'N/A')}, "
-                    f"Leases Dialog {ld.get('width', 'N/A')}x{ld.get('height', 'N/A')}.")
+        log.debug("Using resolution from config.json: Main Window %sx%s, Leases Dialog %sx%s.",
+                  mw.get('width', 'N/A'), mw.get('height', 'N/A'), ld.get('width', 'N/A'), ld.get('height', 'N/A'))
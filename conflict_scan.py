@@ -0,0 +1,176 @@
+# Checks reservations against leases and subnets for conflicts and anomalies.
+#
+#   python conflict_scan.py                   # every configured server
+#   python conflict_scan.py --server site-b   # one server
+#   python conflict_scan.py --json            # machine-readable output
+#
+# Runs headless (no display needed); exits with 1 when any error-level
+# problem was found, so it can be used from cron or a monitoring check.
+import argparse
+import ipaddress
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+import metrics
+from config_loader import get_logger
+from lease_store import LeaseStore, NO_MAC, ip_to_int, pack_mac, unpack_mac
+from pool_occupancy import parse_pool
+
+log = get_logger(__name__)
+
+Conflict = namedtuple("Conflict", "severity kind server subnet_id ip_address hw_address detail")
+
+# kind -> (severity, description)
+KINDS = {
+    "leased_to_other_mac": ("error", "Reserved IP is leased to a different MAC"),
+    "duplicate_ip": ("error", "IP reserved more than once"),
+    "outside_subnet": ("error", "Reserved IP is in no configured subnet"),
+    "subnet_mismatch": ("error", "Reservation's subnet ID differs from the subnet containing the IP"),
+    "duplicate_mac": ("warning", "MAC reserved more than once"),
+    "outside_pool": ("info", "Reserved IP is outside its subnet's pools"),
+}
+SEVERITY_ORDER = {"error": 0, "warning": 1, "info": 2}
+
+
+def _subnet_ranges(subnets):
+    """
+    Returns (subnets, pools): sorted (first, last, subnet_id) tuples for the
+    subnets and sorted (first, last) tuples for all of their pools.
+    """
+    ranges = []
+    pools = []
+    for subnet in subnets:
+        try:
+            network = ipaddress.IPv4Network(subnet["subnet"], strict=False)
+            subnet_pools = [parse_pool(pool) for pool in subnet.get("pools", [])]
+        except (KeyError, ValueError, OSError) as e:
+            log.warning("Skipping subnet %s: %s", subnet.get("subnet_id"), e)
+            continue
+        ranges.append((int(network.network_address), int(network.broadcast_address), int(subnet["subnet_id"]), bool(subnet_pools)))
+        pools.extend(subnet_pools)
+    ranges.sort()
+    pools.sort()
+    return ranges, pools
+
+
+def scan(subnets, leases, reservations, server=None):
+    """
+    Returns the Conflicts of one server's data, errors first.
+
+    Every check is a lookup instead of a nested loop: the containing subnet and
+    pool are a bisect over sorted ranges, the lease on a reserved IP a bisect
+    over the LeaseStore's sorted address column, and duplicate IPs and MACs are
+    counted with Counters. Time is O(R log N) for R reservations and N leases.
+    """
+    if not isinstance(leases, LeaseStore):
+        leases = LeaseStore(leases)
+
+    with metrics.timed("scan", "conflicts") as span:
+        ranges, pools = _subnet_ranges(subnets)
+        subnet_starts = [first for first, _, _, _ in ranges]
+        pool_starts = [first for first, _ in pools]
+        lease_ips, lease_macs = leases.ips, leases.macs
+        conflicts = []
+
+        def report(kind, subnet_id, ip_address, mac, detail):
+            conflicts.append(Conflict(KINDS[kind][0], kind, server, subnet_id, ip_address, unpack_mac(mac), detail))
+
+        rows = []  # (ip_int, ip_address, mac, reserved_subnet) per valid reservation
+        for res in reservations:
+            ip_address = res.get("ip-address")
+            try:
+                ip_int = ip_to_int(ip_address)
+            except (OSError, TypeError):
+                continue
+            mac = pack_mac(res.get("dhcp_identifier"))
+            reserved_subnet = res.get("subnet_id")
+            reserved_subnet = int(reserved_subnet) if reserved_subnet not in (None, "") else None
+            rows.append((ip_int, ip_address, mac, reserved_subnet))
+
+            # Subnet and pool containing the address
+            n = bisect_right(subnet_starts, ip_int) - 1
+            if n < 0 or ip_int > ranges[n][1]:
+                report("outside_subnet", reserved_subnet, ip_address, mac, "")
+            else:
+                _, _, subnet_id, has_pools = ranges[n]
+                # Subnet ID 0 is a global reservation, valid in any subnet
+                if reserved_subnet and reserved_subnet != subnet_id:
+                    report("subnet_mismatch", reserved_subnet, ip_address, mac, f"IP belongs to subnet {subnet_id}")
+                p = bisect_right(pool_starts, ip_int) - 1
+                if has_pools and (p < 0 or ip_int > pools[p][1]):
+                    report("outside_pool", subnet_id, ip_address, mac, "")
+
+            # Active lease on the reserved address
+            i = bisect_left(lease_ips, ip_int)
+            if i < len(lease_ips) and lease_ips[i] == ip_int:
+                leased_mac = bytes(lease_macs[i * 6:i * 6 + 6])
+                if leased_mac != NO_MAC and mac != NO_MAC and leased_mac != mac:
+                    report("leased_to_other_mac", reserved_subnet, ip_address, mac, f"Leased to {unpack_mac(leased_mac)}")
+
+        # Count first (in C), then only group the few duplicates
+        ip_counts = Counter(row[0] for row in rows)
+        mac_counts = Counter(row[2] for row in rows)
+        mac_counts.pop(NO_MAC, None)
+        duplicate_macs = {}
+        for ip_int, ip_address, mac, reserved_subnet in rows:
+            if ip_counts[ip_int] > 1:
+                report("duplicate_ip", reserved_subnet, ip_address, mac, f"Reserved {ip_counts[ip_int]} times")
+            if mac_counts.get(mac, 0) > 1:
+                duplicate_macs.setdefault(mac, []).append((ip_address, reserved_subnet))
+
+        for mac, entries in duplicate_macs.items():
+            for ip_address, subnet_id in entries:
+                others = ", ".join(other for other, _ in entries if other != ip_address)
+                report("duplicate_mac", subnet_id, ip_address, mac, f"Also reserved at {others}")
+
+        conflicts.sort(key=lambda c: (SEVERITY_ORDER[c.severity], c.kind, ip_to_int(c.ip_address)))
+        span.rows = len(conflicts)
+    return conflicts
+
+
+def scan_servers(data):
+    """Scans {server: (subnets, leases, reservations) or None}; returns all Conflicts, errors first."""
+    conflicts = []
+    for server, result in data.items():
+        if result is None:
+            log.warning("Skipping %s: it could not be read", server)
+            continue
+        conflicts.extend(scan(*result, server=server))
+    conflicts.sort(key=lambda c: SEVERITY_ORDER[c.severity])  # Stable: keeps each server's order
+    return conflicts
+
+
+def main(argv=None):
+    import kea_api
+
+    parser = argparse.ArgumentParser(description="Find reservation conflicts and anomalies on Kea servers.")
+    parser.add_argument("--server", action="append", help="Server name to scan (repeatable; default: all)")
+    parser.add_argument("--json", action="store_true", help="Print the conflicts as JSON")
+    args = parser.parse_args(argv)
+
+    # No GUI: errors are logged instead of shown as popups
+    with kea_api.quiet_errors():
+        data = kea_api.fan_out(lambda server: (
+            kea_api.get_subnets(server),
+            kea_api.get_lease_store(server),
+            kea_api.get_reservations_from_db(server)
+        ), servers=args.server)
+    conflicts = scan_servers(data)
+
+    if args.json:
+        print(json.dumps([c._asdict() for c in conflicts], indent=2))
+    else:
+        for c in conflicts:
+            print(f"{c.severity:<8} {c.kind:<20} {c.server:<20} {str(c.subnet_id):<8} {c.ip_address:<16} {c.hw_address:<18} {c.detail}")
+        counts = {}
+        for c in conflicts:
+            counts[c.severity] = counts.get(c.severity, 0) + 1
+        print(", ".join(f"{counts.get(severity, 0)} {severity}s" for severity in SEVERITY_ORDER))
+
+    unreadable = [server for server, result in data.items() if result is None]
+    return 1 if unreadable or any(c.severity == "error" for c in conflicts) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+from PyQt6.QtWidgets import (  # type: ignore
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt  # type: ignore
+from notification_window import NotificationWindow
+from auto_refresh import ServerReader
+import conflict_scan
+
+
+class ConflictsDialog(QDialog):
+    """
+    Lists reservation conflicts and anomalies found by conflict_scan. Double-click
+    a row (or use "Jump to Row") to show the address in the tree and lease table.
+    """
+
+    def __init__(self, tree_view, data, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Reservation Conflicts")
+        self.setMinimumSize(1000, 500)
+        self.tree_view = tree_view
+        self.conflicts = []
+        self.server_reader = ServerReader(self, tree_view.read_server, self.load_conflicts)
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget()
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(lambda row, _col: self.jump_to_row(row))
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.jump_button = QPushButton("Jump to Row")
+        self.rescan_button = QPushButton("Rescan")
+        self.close_button = QPushButton("Close")
+
+        self.jump_button.clicked.connect(lambda: self.jump_to_row(self.table.currentRow()))
+        self.rescan_button.clicked.connect(self.rescan)
+        self.close_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(self.jump_button)
+        button_layout.addWidget(self.rescan_button)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+        self.load_conflicts(data)
+
+    def load_conflicts(self, data):
+        """Scans {server: (subnets, leases, reservations)} and fills the table."""
+        self.conflicts = conflict_scan.scan_servers(data)
+
+        headers = ["Severity", "Problem", "Server", "Subnet ID", "IP Address", "MAC Address", "Details"]
+        self.table.setSortingEnabled(False)
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(self.conflicts))
+
+        for row, conflict in enumerate(self.conflicts):
+            values = [
+                conflict.severity, conflict_scan.KINDS[conflict.kind][1], conflict.server,
+                "" if conflict.subnet_id is None else str(conflict.subnet_id),
+                conflict.ip_address, conflict.hw_address, conflict.detail
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.ItemDataRole.UserRole, row)  # Index into self.conflicts, survives sorting
+                self.table.setItem(row, col, item)
+
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        counts = {}
+        for conflict in self.conflicts:
+            counts[conflict.severity] = counts.get(conflict.severity, 0) + 1
+        if self.conflicts:
+            self.summary_label.setText(", ".join(f"{counts.get(s, 0)} {s}s" for s in conflict_scan.SEVERITY_ORDER))
+        else:
+            self.summary_label.setText("No conflicts found.")
+
+    def rescan(self):
+        """Reads the servers again in the background; the table fills in as each answers."""
+        self.server_reader.start()
+
+    def jump_to_row(self, row):
+        item = self.table.item(row, 0)
+        if item is None:
+            return
+        conflict = self.conflicts[item.data(Qt.ItemDataRole.UserRole)]
+        if not self.tree_view.jump_to_address(conflict.server, conflict.subnet_id, conflict.ip_address):
+            NotificationWindow(f"{conflict.ip_address} is no longer in the lease table.", "Info", parent=self).exec()
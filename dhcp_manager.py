@@ -1,25 +1,47 @@
 from PyQt6.QtWidgets import ( # type: ignore
-    QMainWindow, QVBoxLayout, QWidget, QPushButton,
-    QTreeWidget, QTreeWidgetItem, QSplitter, QMenu, QInputDialog, QHBoxLayout
+    QMainWindow, QVBoxLayout, QWidget, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
+    QTreeWidget, QTreeWidgetItem, QSplitter, QMenu, QInputDialog, QHBoxLayout, QMessageBox
 )
 from PyQt6.QtGui import QAction # type: ignore
 from PyQt6.QtCore import Qt # type: ignore
-from show_leases_dialog import ShowLeasesDialog
+from PyQt6 import sip  # type: ignore
+from show_leases_dialog import ShowLeasesDialog, failure_summary
 from add_reservation_dialog import AddReservationDialog
-from config_loader import WINDOW_SIZES, SPLITTER_SIZES, debug_print
+from config_loader import WINDOW_SIZES, SPLITTER_SIZES, get_logger
 from status_dialog import StatusDialog
-from config_loader import CONFIG, DUMMY_DATA
+from diagnostics_dialog import DiagnosticsDialog
+from conflicts_dialog import ConflictsDialog
+from packet_rates_dialog import PacketRatesDialog
+from pool_resize_dialog import PoolResizeDialog
+from notification_window import NotificationWindow
+from config_loader import SERVERS, DUMMY_DATA, LEASE_SOURCE, MEMFILE_CONFIG, MYSQL_LEASES_CONFIG
 import paramiko   # type: ignore
 import time
 import subprocess
 import sys
 import kea_api
+import metrics
+import profiler
+import snapshot_cache
+import pool_occupancy
+from lease_store import LeaseStore
+from auto_refresh import AutoRefreshScheduler, LeaseFeedPoller, ServerReader, server_data_fingerprint
+from search_index import SearchIndex
+from bulk_delete import LeaseDeleteJob
+
+log = get_logger(__name__)
+
+# Tree items carry the name of the server they belong to under this role
+SERVER_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Most results listed under the global search box
+SEARCH_LIMIT = 200
 
 class DHCPManager(QMainWindow):
     def __init__(self):
         super().__init__()
 
-        debug_print("DEBUG: Initializing DHCPManager...")
+        log.debug("Initializing DHCPManager...")
 
         # Use TreeViewDialog as the main UI
         self.tree_window = TreeViewDialog(self)
@@ -35,19 +57,32 @@ class DHCPManager(QMainWindow):
 
         self.setGeometry(x, y, width, height)
 
+        tools_menu = self.menuBar().addMenu("Tools")
+        self.profiler_action = QAction("Profiler Mode", self)
+        self.profiler_action.setCheckable(True)
+        self.profiler_action.setChecked(profiler.is_enabled())
+        self.profiler_action.toggled.connect(self.toggle_profiler)
+        tools_menu.addAction(self.profiler_action)
+        self.toggle_profiler(profiler.is_enabled())
+
         # Make sure the window actually appears!
         self.tree_window.show()
-        debug_print("DEBUG: TreeViewDialog should now be visible.")
+        log.debug("TreeViewDialog should now be visible.")
+
+    def toggle_profiler(self, enabled):
+        if enabled != profiler.is_enabled():
+            profiler.set_enabled(enabled)
+        self.setWindowTitle("KEA DHCP Manager" + (f" [Profiling → {profiler.REPORT_DIR}/]" if enabled else ""))
 
     def closeEvent(self, event):
         """Ensures proper cleanup on exit."""
-        debug_print("DEBUG: DHCPManager closing...")
+        log.debug("DHCPManager closing...")
         event.accept()
 
 class TreeViewDialog(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        debug_print("DEBUG: Initializing TreeViewDialog...")
+        log.debug("Initializing TreeViewDialog...")
 
         self.setWindowTitle("DHCP Manager - Tree View")
 
@@ -68,39 +103,123 @@ class TreeViewDialog(QWidget):
         self.splitter.setSizes(splitter_sizes)
 
         main_layout = QVBoxLayout(self)
+
+        # Global search over every server's leases and reservations
+        self.search_index = SearchIndex()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search all subnets by IP, CIDR, MAC prefix or hostname...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.run_search)
+        self.search_input.returnPressed.connect(self.jump_to_first_result)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(160)
+        self.search_results.itemClicked.connect(self.jump_to_search_result)
+        self.search_results.itemActivated.connect(self.jump_to_search_result)
+        self.search_results.hide()
+        main_layout.addWidget(self.search_input)
+        main_layout.addWidget(self.search_results)
+
         main_layout.addWidget(self.splitter)
 
         # Add button row below splitter
         self.button_layout = QHBoxLayout()
         self.reset_filters_button = QPushButton("Reset Filters")
         self.refresh_button = QPushButton("Refresh View")
+        self.save_button = QPushButton("Save Edits")
+        self.save_button.setEnabled(False)
         self.quit_button = QPushButton("Quit")
         self.status_button = QPushButton("Status")
+        self.diagnostics_button = QPushButton("Diagnostics")
+        self.conflicts_button = QPushButton("Conflicts")
+        self.packet_rates_button = QPushButton("Packet Rates")
 
         self.reset_filters_button.clicked.connect(self.leases_dialog.reset_filters)
         self.refresh_button.clicked.connect(self.leases_dialog.refresh_leases)
+        self.save_button.clicked.connect(lambda: self.leases_dialog.save_edits())
+        self.leases_dialog.edits_changed.connect(self.update_save_button)
+        self.leases_dialog.reservation_changed.connect(self.apply_reservation_change)
+        self.leases_dialog.lease_changed.connect(self.apply_lease_change)
+        self.leases_dialog.leases_removed.connect(self.apply_leases_removed)
         self.quit_button.clicked.connect(self.quit_app)
         self.status_button.clicked.connect(self.handle_status_button)
+        self.diagnostics_button.clicked.connect(self.show_diagnostics_dialog)
+        self.conflicts_button.clicked.connect(self.show_conflicts_dialog)
+        self.packet_rates_button.clicked.connect(self.show_packet_rates_dialog)
 
         self.button_layout.addWidget(self.reset_filters_button)
         self.button_layout.addWidget(self.refresh_button)
+        self.button_layout.addWidget(self.save_button)
         self.button_layout.addWidget(self.status_button)
+        self.button_layout.addWidget(self.conflicts_button)
+        self.button_layout.addWidget(self.packet_rates_button)
+        self.button_layout.addWidget(self.diagnostics_button)
         self.button_layout.addWidget(self.quit_button)
         main_layout.addLayout(self.button_layout)
+        self.packet_rates_dialog = None  # Created on first use, kept while open
 
-        self.show()
-        debug_print("DEBUG: Calling load_subnets()...")
+        # Last data the tree was drawn from, {server: (subnets, leases, reservations)}
+        self.server_data = {}
 
-        if DUMMY_DATA:
-            debug_print("[DUMMY] Dummy mode is ON — loading fake subnets.")
+        # Tree nodes kept by key so live lease deltas can update them in place
+        self.leases_nodes = {}
+        self.lease_items = {}
+        self.reservation_items = {}
+
+        self.server_reader = ServerReader(self, self.read_server, self.load_subnets)
+        self.auto_refresh = AutoRefreshScheduler(
+            self, "tree",
+            fetch=self.fetch_servers,
+            fingerprint=server_data_fingerprint,
+            apply=self.apply_refresh
+        )
+
+        self.show()
+        log.debug("Calling load_subnets()...")
+
+        # Draw the last snapshot straight away and reconcile with the servers in the background
+        cached = {server: kea_api.get_cached_snapshot(server) for server in kea_api.server_names()}
+        reconcile = any(cached.values())
+
+        if reconcile:
+            log.debug("Showing cached snapshot while the servers are read...")
+            self.load_subnets({server: result or ([], LeaseStore(), []) for server, result in cached.items()})
+            self.auto_refresh.last_fingerprint = None  # Always apply the first live read
+        elif DUMMY_DATA:
+            log.debug("[DUMMY] Dummy mode is ON — loading fake subnets.")
             self.load_subnets()
         else:
             subnets = kea_api.get_subnets()
             if not subnets:
-                debug_print("[DEBUG] No subnets returned — assuming server is offline.")
+                log.debug("No subnets returned — assuming server is offline.")
                 self.status_button.setText("Start Services")
             else:
                 self.load_subnets()
+        self.auto_refresh.start()
+        if reconcile:
+            self.auto_refresh.refresh_in_background()
+
+        # Live lease feed: push incremental lease changes into the views as they arrive
+        self.lease_feed = None
+        if kea_api.get_lease_source() is not None:
+            if LEASE_SOURCE == "mysql":
+                interval = MYSQL_LEASES_CONFIG.get("poll_interval_ms", 5000)
+            else:
+                interval = MEMFILE_CONFIG.get("poll_interval_ms", 2000)
+            self.lease_feed = LeaseFeedPoller(self, interval, self.apply_lease_feed)
+            self.lease_feed.start()
+
+    def apply_lease_feed(self, changed, removed):
+        """Applies lease changes picked up from the incremental source to the table and tree."""
+        log.debug("Lease feed delta: %s changed, %s removed", len(changed), len(removed))
+        result = self.server_data.get(kea_api.get_server()["name"])
+        if result is not None and isinstance(result[1], LeaseStore):
+            result[1].apply(changed, removed)  # A copy of the feed's store, so it needs the delta too
+            self.auto_refresh.remember(self.server_data)
+        self.search_index.invalidate()
+        if self.leases_dialog:
+            self.leases_dialog.apply_lease_delta(changed, removed)
+        self.apply_lease_delta(changed, removed)
+        pool_occupancy.get_occupancy(kea_api.get_server()["name"]).apply_lease_delta(changed, removed)
 
     def handle_status_button(self):
         if self.status_button.text() == "Start Services":
@@ -111,15 +230,15 @@ class TreeViewDialog(QWidget):
 
     def start_services(self):
         if DUMMY_DATA:
-            debug_print("[DUMMY] Skipping service start in dummy mode.")
+            log.debug("[DUMMY] Skipping service start in dummy mode.")
             return
 
-        server = CONFIG.get("server_address", "127.0.0.1")
-        username = CONFIG.get("ssh_user", "")
-        password = CONFIG.get("ssh_password", "")
+        server = SERVERS[0]["address"]
+        username = SERVERS[0]["ssh_user"]
+        password = SERVERS[0]["ssh_password"]
 
         try:
-            debug_print(f"[DEBUG] Connecting to {server} via SSH as root...")
+            log.debug("Connecting to %s via SSH as root...", server)
             client = paramiko.SSHClient()
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             client.connect(server, username=username, password=password)
@@ -134,42 +253,62 @@ class TreeViewDialog(QWidget):
                 output = stdout.read().decode()
                 error = stderr.read().decode()
                 if error:
-                    debug_print(f"[ERROR] {error.strip()}")
+                    log.error("SSH command error: %s", error.strip())
                 else:
-                    debug_print(f"[OUTPUT] {output.strip()}")
+                    log.info("SSH command output: %s", output.strip())
 
             client.close()
-            debug_print("[DEBUG] SSH commands completed. Waiting for Kea to become responsive...")
+            log.debug("SSH commands completed. Waiting for Kea to become responsive...")
 
             # Retry up to 5 seconds for Kea to respond
             for attempt in range(10):
                 subnets = kea_api.get_subnets()
                 if subnets:
-                    debug_print("[DEBUG] Kea API is responsive.")
+                    log.debug("Kea API is responsive.")
                     self.status_button.setText("Status")
                     self.load_subnets()
                     self.leases_dialog.refresh_leases()
                     return
                 else:
-                    debug_print(f"[DEBUG] Kea not ready yet (attempt {attempt+1}/10)...")
+                    log.debug("Kea not ready yet (attempt %s/10)...", attempt+1)
                     time.sleep(0.5)
 
-            debug_print("[ERROR] Kea API still not responding after retries.")
+            log.error("Kea API still not responding after retries.")
             self.status_button.setText("Start Services")
 
         except Exception as e:
-            debug_print(f"[ERROR] SSH connection or command failed: {e}")
+            log.error("SSH connection or command failed: %s", e)
 
     def show_status_dialog(self):
         status_dialog = StatusDialog(self)
         status_dialog.exec()
+
+    def update_save_button(self, count):
+        self.save_button.setEnabled(count > 0)
+        self.save_button.setText(f"Save Edits ({count})" if count else "Save Edits")
+
+    def show_packet_rates_dialog(self):
+        # Non-modal so the rates stay live next to the tree; reopening raises the same window
+        if self.packet_rates_dialog is None or sip.isdeleted(self.packet_rates_dialog):
+            self.packet_rates_dialog = PacketRatesDialog(self)
+            self.packet_rates_dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.packet_rates_dialog.show()
+        self.packet_rates_dialog.raise_()
+
+    def show_diagnostics_dialog(self):
+        DiagnosticsDialog(self).exec()
+
+    def show_conflicts_dialog(self):
+        """Scans the data the tree shows for reservation conflicts; the dialog can rescan live."""
+        ConflictsDialog(self, self.server_data, self).exec()
     
     def force_close(self):
         """Ensures both the tree view and the leases dialog close together."""
-        debug_print("DEBUG: Close button clicked, forcing full shutdown")
+        log.debug("Close button clicked, forcing full shutdown")
         
         if self.leases_dialog:
-            debug_print("DEBUG: Closing leases dialog from force_close()")
+            log.debug("Closing leases dialog from force_close()")
+            self.leases_dialog.auto_refresh.stop()
             self.leases_dialog.setParent(None)  
             self.leases_dialog.close()
             self.leases_dialog.deleteLater()
@@ -179,39 +318,140 @@ class TreeViewDialog(QWidget):
 
     def quit_app(self):
         """Closes the entire application."""
-        debug_print("DEBUG: Quit button clicked. Exiting application...")
+        log.debug("Quit button clicked. Exiting application...")
         self.close()  # Close TreeViewDialog
         sys.exit(0)  # Fully exit the program
 
         
     def closeEvent(self, event):
         """Ensures TreeViewDialog and leases dialog close cleanly without leaving an orphan window."""
-        debug_print("DEBUG: closeEvent() triggered")
+        log.debug("closeEvent() triggered")
+        self.auto_refresh.stop()
+        if self.lease_feed:
+            self.lease_feed.stop()
 
         if self.leases_dialog:
-            debug_print("DEBUG: Closing leases dialog...")
+            log.debug("Closing leases dialog...")
+            self.leases_dialog.save_edits(notify_success=False)
+            self.leases_dialog.commits.drain()  # Let queued writes finish before exiting
+            self.leases_dialog.auto_refresh.stop()
             self.leases_dialog.setParent(None)  # Detach from parent first
             self.leases_dialog.close()  
             self.leases_dialog.deleteLater()  # Ensure it gets destroyed
             self.leases_dialog = None  
 
+        snapshot_cache.flush()
+
         if self.parent():
             if hasattr(self.parent(), "tree_window"):
-                debug_print("DEBUG: Clearing parent reference to tree_window")
+                log.debug("Clearing parent reference to tree_window")
                 setattr(self.parent(), "tree_window", None)  
 
-        debug_print("DEBUG: TreeViewDialog has fully closed.")
+        log.debug("TreeViewDialog has fully closed.")
         event.accept()
 
-    def load_subnets(self):
-        """Loads subnets and their details into the tree view."""
-        debug_print("DEBUG: Calling load_subnets()...")
-        
-        subnets = kea_api.get_subnets()
-        leases = kea_api.get_active_leases()
-        reservations = kea_api.get_reservations_from_db()
+    def apply_refresh(self, data):
+        """Redraws the tree from refreshed data and offers "Start Services" while the default server is down."""
+        if self.leases_dialog and self.leases_dialog.commits.pending:
+            self.auto_refresh.last_fingerprint = None  # The data may predate changes still being saved; retry next tick
+            return
+        self.load_subnets(data)
+        if DUMMY_DATA:
+            return
+        default = data.get(kea_api.get_server()["name"])
+        offline = default is None or not default[0] or kea_api.cached_since(kinds=("subnets",)) is not None
+        self.status_button.setText("Start Services" if offline else "Status")
+
+    @staticmethod
+    def read_server(server):
+        """Returns (subnets, leases, reservations) of one server."""
+        return kea_api.get_subnets(server), kea_api.get_lease_store(server), kea_api.get_reservations_from_db(server)
+
+    def fetch_servers(self):
+        """
+        Reads subnets, leases and reservations from every configured server at
+        once. Returns {server: (subnets, leases, reservations)}, with None for a
+        server that failed. Blocks until all answered; only for worker threads.
+        """
+        return kea_api.fan_out(self.read_server)
+
+    @profiler.action
+    def load_subnets(self, data=None):
+        """
+        Loads subnets and their details into the tree view. `data` is the result
+        of fetch_servers(); with more than one server the subnets are grouped
+        under a node per server. Without `data` the servers are read in the
+        background and the tree is redrawn as each one answers.
+        """
+        log.debug("Calling load_subnets()...")
+
+        if data is None:
+            self.server_reader.start()
+            return
+        self._draw_subnets(data)
+
+    @metrics.instrumented("qt", "load_subnets")
+    def _draw_subnets(self, data):
+        """Rebuilds the tree from fetch_servers() data already in hand."""
+        self.auto_refresh.remember(data)
+        self.server_data = data
+        self.search_index.update(data)
+        for server, result in data.items():
+            if result is not None:
+                pool_occupancy.get_occupancy(server).sync(*result)
+
+        # Remember which nodes were open so a background reload doesn't collapse the tree
+        first_load = self.tree_widget.topLevelItemCount() == 0
+        expanded = set()
+        pending = [self.tree_widget.topLevelItem(i) for i in range(self.tree_widget.topLevelItemCount())]
+        while pending:
+            item = pending.pop()
+            role = item.data(0, Qt.ItemDataRole.UserRole)
+            if item.isExpanded():
+                expanded.add((item.data(0, SERVER_ROLE), role))
+            if not str(role).startswith("leases_"):  # Lease nodes have no open children
+                pending.extend(item.child(j) for j in range(item.childCount()))
 
         self.tree_widget.clear()
+        self.leases_nodes = {}
+        self.lease_items = {}
+        self.reservation_items = {}
+
+        for server, result in data.items():
+            server_item = None
+            if len(data) > 1:
+                label = server if result is not None else f"{server} (unreachable)"
+                cached_at = kea_api.cached_since(server)
+                if cached_at is not None:
+                    label += f" (cached, {snapshot_cache.format_age(cached_at)} old)"
+                server_item = QTreeWidgetItem([label])
+                server_item.setData(0, Qt.ItemDataRole.UserRole, f"server_{server}")
+                server_item.setData(0, SERVER_ROLE, server)
+                self.tree_widget.addTopLevelItem(server_item)
+                server_item.setExpanded(first_load or (server, f"server_{server}") in expanded)
+
+            if result is not None:
+                self._add_subnet_items(server_item, server, *result, expanded)
+
+        # Mark the view as stale while any server is shown from the snapshot cache
+        cached_at = [t for t in map(kea_api.cached_since, data) if t is not None]
+        header = "DHCP Scopes"
+        if cached_at:
+            header += f" (cached, {snapshot_cache.format_age(min(cached_at))} old)"
+        self.tree_widget.setHeaderLabels([header])
+
+        self.tree_widget.repaint()  # Ensure UI refresh
+
+    def _add_subnet_items(self, parent, server, subnets, leases, reservations, expanded):
+        """Adds one server's subnets under `parent` (top level when None)."""
+        if not isinstance(leases, LeaseStore):
+            leases = LeaseStore(leases)
+
+        # One pass over the store and the reservations instead of one scan of each per subnet
+        leases_by_subnet = leases.by_subnet()
+        reservations_by_subnet = {}
+        for res in reservations:
+            reservations_by_subnet.setdefault(str(res.get("subnet_id")), []).append(res)
 
         for subnet in subnets:
             subnet_id = str(subnet.get("subnet_id", "Unknown ID"))
@@ -220,59 +460,229 @@ class TreeViewDialog(QWidget):
 
             subnet_item = QTreeWidgetItem([formatted_text])
             subnet_item.setData(0, Qt.ItemDataRole.UserRole, subnet_id)
-            self.tree_widget.addTopLevelItem(subnet_item)
+            subnet_item.setData(0, SERVER_ROLE, server)
+            if parent is None:
+                self.tree_widget.addTopLevelItem(subnet_item)
+            else:
+                parent.addChild(subnet_item)
 
             # Add Leases Node (Shows Leases + Reservations)
             leases_item = QTreeWidgetItem(["Leases"])
             leases_item.setData(0, Qt.ItemDataRole.UserRole, f"leases_{subnet_id}")
+            leases_item.setData(0, SERVER_ROLE, server)
             subnet_item.addChild(leases_item)
+            self.leases_nodes[(server, subnet_id)] = leases_item
 
-            for lease in leases:
-                if str(lease.get("subnet_id")) == subnet_id:
-                    lease_text = f"{lease.get('ip-address', 'Unknown')} → {lease.get('hw-address', 'Unknown')}"
-                    lease_item = QTreeWidgetItem([lease_text])
-                    lease_item.setData(0, Qt.ItemDataRole.UserRole, "lease")
-                    leases_item.addChild(lease_item)
+            for lease in leases_by_subnet.get(subnet.get("subnet_id"), []):
+                self._add_lease_item(leases_item, lease, server)
 
-            for res in reservations:
-                if str(res.get("subnet_id")) == subnet_id:
-                    res_text = f"{res.get('ip-address', 'Unknown')} → {res.get('dhcp_identifier', 'Unknown')} (Res.)"
-                    res_item = QTreeWidgetItem([res_text])
-                    res_item.setData(0, Qt.ItemDataRole.UserRole, "reservation")
-                    leases_item.addChild(res_item)
+            for res in reservations_by_subnet.get(subnet_id, []):
+                self._add_reservation_item(leases_item, res, server)
+            self._update_leases_label(leases_item)
 
             # Add Pool Information (Prevent crash)
             pool_text = f"Pool: {', '.join(subnet.get('pools', []))}"
             pool_item = QTreeWidgetItem([pool_text])
             pool_item.setData(0, Qt.ItemDataRole.UserRole, None)  # Prevent crash
+            pool_item.setData(0, SERVER_ROLE, server)
             subnet_item.addChild(pool_item)
 
             # Add Lease Time (Prevent crash)
             lease_time_text = f"Lease Time: {subnet.get('valid_lifetime', 'N/A')} sec"
             lease_time_item = QTreeWidgetItem([lease_time_text])
             lease_time_item.setData(0, Qt.ItemDataRole.UserRole, None)  # Prevent crash
+            lease_time_item.setData(0, SERVER_ROLE, server)
             subnet_item.addChild(lease_time_item)
 
-        self.tree_widget.repaint()  # Ensure UI refresh
-
+            subnet_item.setExpanded((server, subnet_id) in expanded)
+            leases_item.setExpanded((server, f"leases_{subnet_id}") in expanded)
+
+
+    def _add_lease_item(self, leases_item, lease, server):
+        ip_address = lease.get("ip-address", "Unknown")
+        lease_item = QTreeWidgetItem([f"{ip_address} → {lease.get('hw-address', 'Unknown')}"])
+        lease_item.setData(0, Qt.ItemDataRole.UserRole, "lease")
+        lease_item.setData(0, SERVER_ROLE, server)
+        leases_item.addChild(lease_item)
+        self.lease_items[(server, ip_address)] = lease_item
+
+    @staticmethod
+    def _update_leases_label(leases_item):
+        """Shows a subnet's lease and reservation counts on its "Leases" node."""
+        reserved = sum(1 for i in range(leases_item.childCount()) if leases_item.child(i).data(0, Qt.ItemDataRole.UserRole) == "reservation")
+        leases_item.setText(0, f"Leases ({leases_item.childCount() - reserved}, {reserved} Res.)")
+
+    def _add_reservation_item(self, leases_item, res, server):
+        identifier = res.get("dhcp_identifier", "Unknown")
+        if isinstance(identifier, (bytes, bytearray)):  # Raw bytes from the hosts table
+            identifier = identifier.hex(":")
+        res_text = f"{res.get('ip-address', 'Unknown')} → {identifier} (Res.)"
+        res_item = QTreeWidgetItem([res_text])
+        res_item.setData(0, Qt.ItemDataRole.UserRole, "reservation")
+        res_item.setData(0, SERVER_ROLE, server)
+        leases_item.addChild(res_item)
+        self.reservation_items[(server, res.get("ip-address"))] = res_item
+
+    def apply_reservation_change(self, server, ip_address, reservation):
+        """
+        Updates one reservation (None = removed) in the tree, the search index
+        and the data they were drawn from, without reloading anything.
+        """
+        result = self.server_data.get(server)
+        if result is None:
+            return
+        subnets, leases, reservations = result
+        reservations = [res for res in reservations if res.get("ip-address") != ip_address]
+        if reservation is not None:
+            reservations.append(reservation)
+        self.server_data[server] = (subnets, leases, reservations)
+        self.auto_refresh.remember(self.server_data)
+        self.search_index.invalidate()
+
+        res_item = self.reservation_items.pop((server, ip_address), None)
+        if res_item is not None and res_item.parent():
+            old_parent = res_item.parent()
+            old_parent.removeChild(res_item)
+            self._update_leases_label(old_parent)
+        leases_item = self.leases_nodes.get((server, str(reservation.get("subnet_id")))) if reservation else None
+        if leases_item is not None:
+            self._add_reservation_item(leases_item, reservation, server)
+            self._update_leases_label(leases_item)
+
+    def apply_lease_change(self, server, ip_address, lease):
+        """Updates one lease (None = gone) after it was re-read from its server, without reloading anything."""
+        result = self.server_data.get(server)
+        if result is not None and isinstance(result[1], LeaseStore):
+            result[1].apply([lease] if lease else [], [] if lease else [ip_address])
+            self.auto_refresh.remember(self.server_data)
+        self.search_index.invalidate()
+        self.apply_lease_delta([lease] if lease else [], [] if lease else [ip_address], server)
+
+    def apply_leases_removed(self, server, ip_addresses):
+        """Drops deleted leases of one server from the tree, the search index and the tree's data."""
+        result = self.server_data.get(server)
+        if result is not None and isinstance(result[1], LeaseStore):
+            result[1].apply([], ip_addresses)
+            self.auto_refresh.remember(self.server_data)
+        self.search_index.invalidate()
+        self.apply_lease_delta([], ip_addresses, server)
+
+    def apply_lease_delta(self, changed, removed, server=None):
+        """
+        Updates lease nodes in the tree from a lease delta of `server` (the
+        default server if None, as for the live lease feed) and the counts of
+        the subnets it touched.
+        """
+        server = server or kea_api.get_server()["name"]
+        touched = {}  # id -> leases node whose counts changed; tree items are not hashable
+        for ip_address in removed:
+            lease_item = self.lease_items.pop((server, ip_address), None)
+            if lease_item is not None and lease_item.parent():
+                touched[id(lease_item.parent())] = lease_item.parent()
+                lease_item.parent().removeChild(lease_item)
+
+        for lease in changed:
+            ip_address = lease.get("ip-address")
+            leases_item = self.leases_nodes.get((server, str(lease.get("subnet-id"))))
+            lease_item = self.lease_items.get((server, ip_address))
+
+            # A lease may move between subnets; drop the old node first
+            if lease_item is not None and lease_item.parent() is not leases_item:
+                if lease_item.parent():
+                    touched[id(lease_item.parent())] = lease_item.parent()
+                    lease_item.parent().removeChild(lease_item)
+                del self.lease_items[(server, ip_address)]
+                lease_item = None
+
+            if lease_item is not None:
+                lease_item.setText(0, f"{ip_address} → {lease.get('hw-address', 'Unknown')}")
+            elif leases_item is not None:
+                self._add_lease_item(leases_item, lease, server)
+                touched[id(leases_item)] = leases_item
+
+        for leases_item in touched.values():
+            self._update_leases_label(leases_item)
 
     def handle_tree_click(self, item):
         """Handles clicks on tree nodes, including 'Add Reservation'."""
         selected_type = item.data(0, Qt.ItemDataRole.UserRole)
+        server = item.data(0, SERVER_ROLE)
 
         if selected_type is None:
             return  # Prevent crashes on non-interactive items (e.g., Lease Time, Pool)
 
         if selected_type.isdigit():  # Clicked a subnet (scope)
             subnet_id = selected_type
-            self.leases_dialog.load_leases(subnet_id)
+            self.leases_dialog.load_leases(subnet_id, server=server)
             self.leases_dialog.show()
 
         elif selected_type.startswith("leases_"):  # Clicked "Leases"
             subnet_id = selected_type.split("_")[1]
-            self.leases_dialog.load_leases(subnet_id)
+            self.leases_dialog.load_leases(subnet_id, server=server)
             self.leases_dialog.show()
 
+    def run_search(self, text):
+        """Lists the leases and reservations of all subnets matching the search box."""
+        self.search_results.clear()
+        if not text.strip():
+            self.search_results.hide()
+            return
+
+        hits, total = self.search_index.search(text, limit=SEARCH_LIMIT)
+        multi_server = len(self.server_data) > 1
+        for hit in hits:
+            label = f"{hit.ip_address}   {hit.hw_address or '-'}   {hit.hostname or '-'}   Subnet {hit.subnet_id}"
+            if multi_server:
+                label += f" on {hit.server}"
+            if hit.reserved:
+                label += " (Res.)"
+            item = QListWidgetItem(label)
+            item.setData(Qt.ItemDataRole.UserRole, hit)
+            self.search_results.addItem(item)
+
+        if total > len(hits):
+            note = QListWidgetItem(f"... {total - len(hits)} more matches, refine the search")
+        elif not hits:
+            note = QListWidgetItem("No matches")
+        else:
+            note = None
+        if note is not None:
+            note.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.search_results.addItem(note)
+        self.search_results.show()
+
+    def jump_to_first_result(self):
+        item = self.search_results.item(0)
+        if item is not None:
+            self.jump_to_search_result(item)
+
+    def jump_to_search_result(self, item):
+        """Selects the subnet of a search hit in the tree and its row in the lease table."""
+        hit = item.data(Qt.ItemDataRole.UserRole)
+        if hit is not None and not self.jump_to_address(hit.server, hit.subnet_id, hit.ip_address):
+            log.debug("Search hit %s is no longer in the lease table", hit.ip_address)
+
+    def jump_to_address(self, server, subnet_id, ip_address):
+        """
+        Selects a subnet in the tree and an address's row in the lease table.
+        Returns False if the address is not in the table.
+        """
+        leases_item = self.leases_nodes.get((server, str(subnet_id)))
+        if leases_item is not None:
+            subnet_item = leases_item.parent()
+            if subnet_item.parent() is not None:
+                subnet_item.parent().setExpanded(True)  # Server node
+            self.tree_widget.setCurrentItem(subnet_item)
+            self.tree_widget.scrollToItem(subnet_item)
+
+        return self.leases_dialog.show_address(ip_address, subnet_id, server)
+
+    def _subnet_item(self, item):
+        """Returns the subnet node an item belongs to (the item itself for a subnet)."""
+        while item is not None and not str(item.data(0, Qt.ItemDataRole.UserRole)).isdigit():
+            item = item.parent()
+        return item
+
 
     def show_reservations(self, subnet_id):
         """Displays only reservations for the selected subnet in the table view."""
@@ -296,9 +706,25 @@ class TreeViewDialog(QWidget):
         # Add "Add Reservation" option if clicked on a subnet
         if item.data(0, Qt.ItemDataRole.UserRole) and item.data(0, Qt.ItemDataRole.UserRole).isdigit():
             add_reservation_action = QAction("Add Reservation", self)
-            add_reservation_action.triggered.connect(lambda: self.open_add_reservation_dialog(item.data(0, Qt.ItemDataRole.UserRole)))
+            add_reservation_action.triggered.connect(
+                lambda: self.open_add_reservation_dialog(item.data(0, Qt.ItemDataRole.UserRole), item.data(0, SERVER_ROLE))
+            )
             menu.addAction(add_reservation_action)
 
+            reserve_free_action = QAction("Reserve Next Free IP", self)
+            reserve_free_action.triggered.connect(
+                lambda: self.open_add_reservation_dialog(item.data(0, Qt.ItemDataRole.UserRole), item.data(0, SERVER_ROLE), next_free=True)
+            )
+            menu.addAction(reserve_free_action)
+
+            free_ranges_action = QAction("Show Free Ranges", self)
+            free_ranges_action.triggered.connect(lambda: self.show_free_ranges(item))
+            menu.addAction(free_ranges_action)
+
+            wipe_action = QAction("Wipe Leases in Subnet", self)
+            wipe_action.triggered.connect(lambda: self.wipe_subnet_leases(item))
+            menu.addAction(wipe_action)
+
         item_text = item.text(0)
         # If the item is a subnet (contains "ID:")
         if "ID:" in item_text:
@@ -326,53 +752,106 @@ class TreeViewDialog(QWidget):
         if not menu.isEmpty():
             menu.exec(self.tree_widget.viewport().mapToGlobal(pos))
 
-    def open_add_reservation_dialog(self, subnet_id):
-        """Opens the Add Reservation dialog and prefills the subnet ID."""
+    def open_add_reservation_dialog(self, subnet_id, server=None, next_free=False):
+        """Opens the Add Reservation dialog and prefills the subnet ID (and the next free IP if asked)."""
         dialog = AddReservationDialog(self)
+        dialog.server = server
         dialog.subnet_input.setText(str(subnet_id))  # Pre-fill subnet
         dialog.subnet_input.setReadOnly(True)
+        if next_free:
+            dialog.suggest_free_ip()
         if dialog.exec():
-          self.load_subnets()
-          self.leases_dialog.refresh_leases()
+            # Shown at once in the tree and table; only this address changes, nothing is re-read
+            result = self.server_data.get(server)
+            ip_address = dialog.reservation["ip-address"]
+            previous = next((res for res in result[2] if res.get("ip-address") == ip_address), None) if result else None
+            self.leases_dialog.commit_reservation(ip_address, dialog.reservation, server=server, previous=previous)
+            self.notify_edit()
+
+    def show_free_ranges(self, item):
+        """Shows the pool usage and free address ranges of a subnet."""
+        subnet_item = self._subnet_item(item)
+        subnet_id = subnet_item.data(0, Qt.ItemDataRole.UserRole)
+        occupancy = pool_occupancy.get_occupancy(subnet_item.data(0, SERVER_ROLE))
+        NotificationWindow(occupancy.free_summary(subnet_id), f"Free Addresses - {subnet_item.text(0)}", parent=self).exec()
+
+    def wipe_subnet_leases(self, item):
+        """Deletes every lease of a subnet (reservations stay) behind a progress dialog."""
+        subnet_item = self._subnet_item(item)
+        subnet_id = subnet_item.data(0, Qt.ItemDataRole.UserRole)
+        server = subnet_item.data(0, SERVER_ROLE)
+        result = self.server_data.get(server)
+        count = len(result[1].rows(subnet_id)) if result is not None and isinstance(result[1], LeaseStore) else 0
+
+        answer = QMessageBox.question(
+            self, "Wipe Leases",
+            f"Delete all {count} leases of {subnet_item.text(0)}? Reservations are kept; clients keep their address until they renew or rebind."
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+
+        def done(failures):
+            if failures is None or "*" in failures:
+                reason = failures["*"] if failures else "see the log"
+                NotificationWindow(f"Wiping the leases of {subnet_item.text(0)} failed:\n{reason}", "Error", parent=self).exec()
+                return
+            result = self.server_data.get(server)
+            ips = [row.ip_address for row in result[1].rows(subnet_id)] if result is not None else []
+            deleted = [ip for ip in ips if ip not in failures]
+            self.apply_leases_removed(server, deleted)
+            if self.leases_dialog:
+                self.leases_dialog.remove_leases(server, deleted)
+            self.notify_edit()
+            if failures:
+                NotificationWindow(
+                    "Not all leases were deleted:\n" + failure_summary(failures), "Error", parent=self
+                ).exec()
+
+        LeaseDeleteJob(
+            self, f"Wiping the leases of {subnet_item.text(0)}...",
+            lambda progress, cancelled: kea_api.wipe_subnet_leases(subnet_id, server, progress, cancelled),
+            done
+        ).start()
 
     def change_lease_time(self, item):
-        parent = item.parent()
-        if parent is None:
-            # Clicked on a top-level subnet
-            subnet_id = item.data(0, Qt.ItemDataRole.UserRole)
-        else:
-            # Clicked on a lease — get its parent subnet
-            subnet_id = parent.data(0, Qt.ItemDataRole.UserRole)
+        # Clicked on a subnet or one of its entries — get the subnet
+        subnet_item = self._subnet_item(item)
+        subnet_id = subnet_item.data(0, Qt.ItemDataRole.UserRole)
 
         new_lifetime_hours, ok = QInputDialog.getInt(self, "Change Lease Time", "Enter new lease time (hours):", 1, 1, 9999)
         if ok:
-            kea_api.update_subnet_lifetime(subnet_id, new_lifetime_hours * 3600)
+            kea_api.update_subnet_lifetime(subnet_id, new_lifetime_hours * 3600, server=subnet_item.data(0, SERVER_ROLE))
             self.load_subnets()
+            self.notify_edit()
     
     def change_pool_range(self, item):
-        subnet_text = item.parent().text(0)  # Get subnet text (e.g., "192.168.1.0/24 (ID: 1)")
-        subnet_id = item.parent().data(0, Qt.ItemDataRole.UserRole)  # Get the subnet ID
-
-        # Extract the first three octets from the subnet
-        base_ip = subnet_text.split(" ")[0].rsplit(".", 1)[0]  # Get "192.168.1"
-
-        # Get user input (allowing only the last octet)
-        start_octet, ok1 = QInputDialog.getInt(self, "Change Pool Range", f"Enter the starting octet (e.g., 20) for {base_ip}.XX:", 20, 1, 254)
-        if not ok1:
+        """Edits the pools of a subnet after previewing which leases and reservations end up outside them."""
+        subnet_item = self._subnet_item(item)
+        subnet_id = subnet_item.data(0, Qt.ItemDataRole.UserRole)  # Get the subnet ID
+        server = subnet_item.data(0, SERVER_ROLE)
+
+        result = self.server_data.get(server)
+        subnet = next((s for s in result[0] if str(s.get("subnet_id")) == str(subnet_id)), None) if result else None
+        if subnet is None:
+            NotificationWindow(f"Subnet {subnet_id} is not loaded yet; refresh and try again.", "Error", parent=self).exec()
             return
 
-        end_octet, ok2 = QInputDialog.getInt(self, "Change Pool Range", f"Enter the ending octet (e.g., 240) for {base_ip}.XX:", 240, start_octet + 1, 254)
-        if not ok2:
+        dialog = PoolResizeDialog(subnet, result[1], result[2], self)
+        if not dialog.exec():
             return
 
-        new_pool_range = f"{base_ip}.{start_octet}-{base_ip}.{end_octet}"
-
-        #(f"Updating pool range for subnet {subnet_id} to {new_pool_range}")
-        kea_api.update_subnet_pool(subnet_id, new_pool_range)
-        debug_print("Finished updating, now refreshing the tree view...")
+        kea_api.update_subnet_pool(subnet_id, dialog.pools, server=server)
+        log.debug("Finished updating, now refreshing the tree view...")
 
         self.load_subnets()  # Reload tree
         self.tree_widget.repaint()
+        self.notify_edit()
+
+    def notify_edit(self):
+        """Tells the auto-refresh schedulers that the user just changed something."""
+        self.auto_refresh.notify_edit()
+        if self.leases_dialog:
+            self.leases_dialog.auto_refresh.notify_edit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+from PyQt6.QtWidgets import (  # type: ignore
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QHeaderView
+)
+from PyQt6.QtCore import Qt  # type: ignore
+from notification_window import NotificationWindow
+import metrics
+
+
+class DiagnosticsDialog(QDialog):
+    """Shows per-command latency, payload and error metrics for Kea, MySQL and Qt rendering."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(1000, 500)
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget()
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Refresh")
+        self.reset_button = QPushButton("Reset")
+        self.export_button = QPushButton("Export Prometheus File")
+        self.close_button = QPushButton("Close")
+
+        self.refresh_button.clicked.connect(self.load_metrics)
+        self.reset_button.clicked.connect(self.reset_metrics)
+        self.export_button.clicked.connect(self.export_metrics)
+        self.close_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.export_button)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+        self.load_metrics()
+
+    def load_metrics(self):
+        rows = metrics.snapshot()
+
+        headers = ["Layer", "Operation", "Calls", "Errors", "Total (ms)", "Avg (ms)", "p95 (ms)", "Max (ms)", "Bytes", "Rows"]
+        self.table.setSortingEnabled(False)
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(rows))
+
+        layer_totals = {}
+        for row, stats in enumerate(rows):
+            layer_totals[stats["layer"]] = layer_totals.get(stats["layer"], 0) + stats["total_ms"]
+            values = [
+                stats["layer"], stats["operation"], stats["count"], stats["errors"],
+                round(stats["total_ms"], 1), round(stats["avg_ms"], 1), round(stats["p95_ms"], 1),
+                round(stats["max_ms"], 1), stats["bytes"], stats["rows"]
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                # Numbers sort numerically
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, col, item)
+
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        if layer_totals:
+            parts = [f"{layer}: {total:.0f} ms" for layer, total in sorted(layer_totals.items(), key=lambda kv: -kv[1])]
+            self.summary_label.setText("Time spent by layer — " + ", ".join(parts))
+        else:
+            self.summary_label.setText("No operations recorded yet.")
+
+    def reset_metrics(self):
+        metrics.reset()
+        self.load_metrics()
+
+    def export_metrics(self):
+        try:
+            path = metrics.write_prometheus_file()
+        except OSError as e:
+            NotificationWindow(f"Failed to write metrics file:\n{e}", "Error", parent=self).exec()
+            return
+        NotificationWindow(f"Metrics written to {path}", "Success", parent=self).exec()
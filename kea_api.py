@@ -1,96 +1,357 @@
 import requests  # type: ignore
 import pymysql  # type: ignore
 from notification_window import NotificationWindow
-from config_loader import KEA_SERVER, MYSQL_CONFIG, DUMMY_DATA, debug_print
-import time
+from config_loader import KEA_SERVER, MYSQL_CONFIG, SERVERS, MULTI_SERVER, DUMMY_DATA, LEASE_SOURCE, BULK_DELETE, Truncated, get_logger
+import lease_feed
+import lease_db
+import metrics
+import kea_stream
+import synthetic_data
+import snapshot_cache
+import lease_history
+import pool_occupancy
+from lease_store import LeaseStore
+import paramiko  # type: ignore
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+log = get_logger(__name__)
+
+
+_ui_state = threading.local()
+
+@contextmanager
+def quiet_errors():
+    """
+    Suppresses error popups from read calls made inside the block (e.g. background
+    auto-refresh). Errors are still logged.
+    """
+    previous = getattr(_ui_state, "quiet", False)
+    _ui_state.quiet = True
+    try:
+        yield
+    finally:
+        _ui_state.quiet = previous
+
+# ---- Servers ---------------------------------------------------------------
+
+# Per-server request timeout (a server entry may override it with "timeout_s")
+SERVER_TIMEOUT = float(MULTI_SERVER.get("timeout_s", 30))
+
+# Shared by all fan-out calls, so reads never open more than this many connections at once
+_fanout_pool = ThreadPoolExecutor(
+    max_workers=max(1, int(MULTI_SERVER.get("max_workers", 8))),
+    thread_name_prefix="kea-fanout"
+)
+
+def server_names():
+    """Returns the configured server names, default server first."""
+    return [entry["name"] for entry in SERVERS]
+
+def get_server(server=None):
+    """Returns the config entry of a server by name; None means the default server."""
+    if server is None:
+        return SERVERS[0]
+    for entry in SERVERS:
+        if entry["name"] == server:
+            return entry
+    raise KeyError(f"Unknown Kea server: {server}")
+
+def _is_default(server):
+    return server is None or server == SERVERS[0]["name"]
+
+def _server_url(server):
+    if _is_default(server):
+        return KEA_SERVER
+    return get_server(server)["url"]
+
+def _server_timeout(server):
+    return float(get_server(server).get("timeout_s", SERVER_TIMEOUT))
+
+def _result_of(name, future):
+    try:
+        return future.result()
+    except Exception as e:
+        log.warning("Server %s failed: %s", name, e)
+        return None
+
+def fan_out(func, servers=None):
+    """
+    Calls func(server_name) for each server (all configured servers by default)
+    concurrently on a bounded thread pool and returns {server_name: result}.
+    A server whose call raises maps to None and is logged; since every request
+    carries the server's timeout, an unreachable server fails on its own
+    without holding up the others. Blocks until every server answered, so the
+    GUI thread uses fan_out_each() instead.
+    """
+    servers = server_names() if servers is None else list(servers)
+    futures = {name: _fanout_pool.submit(func, name) for name in servers}
+    wait(futures.values())
+    return {name: _result_of(name, future) for name, future in futures.items()}
+
+def fan_out_each(func, on_result, servers=None):
+    """
+    Like fan_out(), but returns at once and calls on_result(server_name, result)
+    from the pool thread as each server finishes (result None if it failed).
+    """
+    servers = server_names() if servers is None else list(servers)
+    for name in servers:
+        future = _fanout_pool.submit(func, name)
+        future.add_done_callback(lambda future, name=name: on_result(name, _result_of(name, future)))
+
+
+def kea_command(payload, server=None, session=None):
+    """
+    Sends one command to the Kea control agent of `server` (the default server
+    if None) and returns the decoded JSON. A requests.Session keeps the
+    connection open for the next command; without one each call connects anew.
+    Latency, response size, lease count and failures are recorded in `metrics`.
+    Raises requests.RequestException on HTTP errors and timeouts.
+    """
+    url = f"{_server_url(server)}/"
+    headers = {"Content-Type": "application/json"}
+
+    with metrics.timed("kea", payload.get("command", "unknown")) as span:
+        response = (session or requests).post(url, headers=headers, json=payload, timeout=_server_timeout(server))
+        span.bytes = len(response.content)
+        response.raise_for_status()
+        data = response.json()
+
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            if data[0].get("result", 0) not in (0, 3):  # 3 = empty result, not a failure
+                span.error = True
+            arguments = data[0].get("arguments") or {}
+            if isinstance(arguments, dict) and isinstance(arguments.get("leases"), list):
+                span.rows = len(arguments["leases"])
+        return data
+
+# Read size for streamed control-agent responses; bounds memory held per read
+STREAM_CHUNK_BYTES = 1 << 16
+
+def kea_command_stream(payload, key, depth=3, server=None):
+    """
+    Sends one command and returns a kea_stream.JSONArrayStream that yields the
+    objects of the `key` array (e.g. "leases") while the response is still
+    arriving, instead of buffering and decoding the whole body at once. The rest
+    of the response (result, text) is in the stream's `envelope` after iteration.
+    The request is sent when iteration starts; HTTP errors are raised from it.
+    """
+    stream = kea_stream.JSONArrayStream(None, key, depth)
+    stream.chunks = _streamed_body(payload, stream, server)
+    return stream
+
+def _streamed_body(payload, stream, server=None):
+    url = f"{_server_url(server)}/"
+    headers = {"Content-Type": "application/json"}
+
+    with metrics.timed("kea", payload.get("command", "unknown")) as span:
+        # The timeout applies to connecting and to each read, not to the whole body
+        with requests.post(url, headers=headers, json=payload, stream=True, timeout=_server_timeout(server)) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                span.bytes += len(chunk)
+                yield chunk
+        span.rows = stream.count
+
+def mysql_connect(cursorclass=pymysql.cursors.DictCursor, server=None):
+    """Opens a connection to the Kea database of `server` (the default server's `mysql` block if None)."""
+    mysql_config = MYSQL_CONFIG if _is_default(server) else get_server(server)["mysql"]
+    with metrics.timed("mysql", "connect"):
+        return pymysql.connect(
+            host=mysql_config.get("host", "127.0.0.1"),
+            user=mysql_config.get("user", "kea"),
+            password=mysql_config.get("password", ""),
+            database=mysql_config.get("database", "kea"),
+            connect_timeout=int(_server_timeout(server)),
+            cursorclass=cursorclass
+        )
+
+def sql_execute(cursor, operation, query, args=None):
+    """Runs one SQL statement, recording its latency and affected row count under `operation`."""
+    with metrics.timed("mysql", operation) as span:
+        cursor.execute(query, args)
+        span.rows = max(cursor.rowcount, 0)
+
+def _notify(message, title="Error", parent=None):
+    """Shows an error popup unless errors are suppressed or we are off the GUI thread."""
+    if getattr(_ui_state, "quiet", False) or threading.current_thread() is not threading.main_thread():
+        log.warning("[%s] %s", title, message)
+        return
+    NotificationWindow(message, title, parent).exec()
 
 
-def get_subnets():
+def _cache_save(server, kind, value):
+    cache = snapshot_cache.get_cache()
+    if cache is not None:
+        cache.save(get_server(server)["name"], kind, value)
+
+def _cache_fallback(server, kind):
+    """Returns the cached copy of `kind` for a server that could not be read, or None."""
+    cache = snapshot_cache.get_cache()
+    if cache is None:
+        return None
+    return cache.fallback(get_server(server)["name"], kind)
+
+def get_cached_snapshot(server=None):
+    """
+    Returns the cached (subnets, leases, reservations) of a server, marked stale,
+    or None in dummy mode or when nothing was cached yet. Used to draw views at
+    once on launch before the first live read finishes.
+    """
+    cache = snapshot_cache.get_cache()
+    if DUMMY_DATA or cache is None:
+        return None
+    return cache.load_server(get_server(server)["name"])
+
+def cached_since(server=None, kinds=snapshot_cache.KINDS):
+    """
+    Returns when the cached data being shown for a server was saved, or None
+    while its reads (of `kinds`: "subnets", "leases", "reservations") are live.
     """
-    Fetches the list of subnets from the Kea API.
+    cache = snapshot_cache.get_cache()
+    return None if cache is None else cache.stale_since(get_server(server)["name"], kinds)
+
+
+def get_subnets(server=None):
+    """
+    Fetches the list of subnets from the Kea API of `server` (the default server if None).
     """
     if DUMMY_DATA:
-        return [
-            {
-                "subnet_id": 1,
-                "subnet": "10.1.1.0/24",
-                "valid_lifetime": 3600,
-                "pools": ["10.1.1.20-10.1.1.21"]
-            },
-            {
-                "subnet_id": 2,
-                "subnet": "10.2.2.0/24",
-                "valid_lifetime": 7200,
-                "pools": ["10.2.2.50-10.2.2.52"]
-            },
-            {
-                "subnet_id": 3,
-                "subnet": "10.3.3.0/24",
-                "valid_lifetime": 1800,
-                "pools": ["10.3.3.30-10.3.3.210"]
-            },
-            {
-                "subnet_id": 4,
-                "subnet": "10.4.4.0/24",
-                "valid_lifetime": 5400,
-                "pools": ["10.4.4.40-10.4.4.220"]
-            },
-            {
-                "subnet_id": 5,
-                "subnet": "10.5.5.0/24",
-                "valid_lifetime": 3600,
-                "pools": ["10.5.5.10-10.5.5.230"]
-            },
-            {
-                "subnet_id": 6,
-                "subnet": "10.6.6.0/24",
-                "valid_lifetime": 9000,
-                "pools": ["10.6.6.60-10.6.6.250"]
-            }
-        ]
+        return synthetic_data.get_backend(server).subnets()
     
-    url = f"{KEA_SERVER}/"
-    headers = {"Content-Type": "application/json"}
     payload = {
         "command": "config-get",
         "service": ["dhcp4"]
     }
     
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        debug_print(f"Response: {data}")
-        if not data or "arguments" not in data[0] or "Dhcp4" not in data[0]["arguments"]:
-            raise ValueError("Invalid response from Kea API")
-        
-        subnets = data[0]["arguments"]["Dhcp4"].get("subnet4", [])
-        
-        return [
+        # Subnets are reduced to the fields we use as they arrive; the full
+        # subnet4 list is never held in memory at once
+        stream = kea_command_stream(payload, "subnet4", depth=4, server=server)
+        subnets = [
             {
                 "subnet_id": subnet["id"],
                 "subnet": subnet["subnet"],
                 "valid_lifetime": subnet["valid-lifetime"],
                 "pools": [pool["pool"] for pool in subnet.get("pools", [])]
             }
-            for subnet in subnets
+            for subnet in stream
         ]
+
+        data = stream.envelope
+        log.debug("Response: %s", Truncated(data))
+        if not data or "arguments" not in data[0] or "Dhcp4" not in data[0]["arguments"]:
+            raise ValueError("Invalid response from Kea API")
+
+        _cache_save(server, "subnets", subnets)
+        return subnets
     except (requests.RequestException, ValueError) as e:
-        NotificationWindow(f"Error fetching subnets from Kea API:\n{str(e)}", "API Error").exec()
-        return []
-    
-def update_subnet_lifetime(subnet_id, new_lifetime):
+        _notify(f"Error fetching subnets from Kea API ({get_server(server)['name']}):\n{str(e)}", "API Error")
+        return _cache_fallback(server, "subnets") or []
+
+def get_statistics(server=None):
+    """
+    Returns the `statistic-get-all` arguments of `server`: {name: [[value, timestamp], ...]},
+    newest sample first (e.g. "subnet[1].assigned-addresses"). Returns {} on failure.
+    """
+    if DUMMY_DATA:
+        return synthetic_data.get_backend(server).statistics()
+
+    payload = {
+        "command": "statistic-get-all",
+        "service": ["dhcp4"]
+    }
+
+    try:
+        data = kea_command(payload, server)
+        if not data or data[0].get("result") != 0:
+            raise ValueError(data[0].get("text", "Invalid response from Kea API") if data else "Empty response from Kea API")
+        return data[0].get("arguments") or {}
+    except (requests.RequestException, ValueError) as e:
+        _notify(f"Error fetching statistics from {get_server(server)['name']}:\n{str(e)}", "API Error")
+        return {}
+
+def update_subnet_lifetime(subnet_id, new_lifetime, server=None):
     """
     Updates the lease time for a given subnet and adjusts renew-timer and rebind-timer accordingly.
     Only writes to config if config-set is successful.
     """
+    renew_timer = int(new_lifetime * 0.5)  # Set renew-time (T1) to 50% of lifetime
+    rebind_timer = int(new_lifetime * 0.875)  # Set rebind-time (T2) to 87.5% of lifetime
+
+    def change(subnet):
+        subnet["valid-lifetime"] = new_lifetime
+        subnet["renew-timer"] = renew_timer
+        subnet["rebind-timer"] = rebind_timer
+
+        # Adjust min/max valid-lifetime
+        subnet["min-valid-lifetime"] = new_lifetime
+        subnet["max-valid-lifetime"] = new_lifetime
+
+    _push_subnet_change(
+        server, subnet_id, change,
+        lambda backend: backend.update_subnet_lifetime(subnet_id, new_lifetime),
+        f"Successfully updated lease time for subnet {subnet_id} to {new_lifetime} seconds.\n"
+        f"Renew Timer: {renew_timer} sec, Rebind Timer: {rebind_timer} sec.\nMin/Max Lifetime: {new_lifetime} sec"
+    )
+
+def update_subnet_pool(subnet_id, new_pool_range, server=None):
+    """
+    Workaround to update pool range: Get current config, modify pools, and reapply config.
+    `new_pool_range` is one Kea pool string or a list of them; pools that stay
+    keep their other settings (options, client classes), however either side
+    writes them ("a-b", "a - b" or "a/len").
+    """
+    pools = [new_pool_range] if isinstance(new_pool_range, str) else list(new_pool_range)
+
+    def change(subnet):
+        existing = {}
+        for pool in subnet.get("pools", []):
+            try:
+                existing[pool_occupancy.parse_pool(pool["pool"])] = pool
+            except (KeyError, ValueError, OSError):
+                continue
+        subnet["pools"] = [existing.get(pool_occupancy.parse_pool(pool), {"pool": pool}) for pool in pools]
+
+    _push_subnet_change(
+        server, subnet_id, change,
+        lambda backend: backend.update_subnet_pool(subnet_id, pools),
+        f"Successfully updated pool range for subnet {subnet_id} to {', '.join(pools)}."
+    )
+
+def _push_subnet_change(server, subnet_id, change, dummy_change, success_message):
+    """
+    Applies a subnet change on `server` and, when `push_to_ha_peer` is on and the
+    server has an `ha_peer`, on the peer at the same time. Shows one popup with
+    the outcome for each server.
+    """
+    targets = [get_server(server)["name"]]
+    peer = get_server(server)["ha_peer"]
+    if peer and peer in server_names() and MULTI_SERVER.get("push_to_ha_peer", True):
+        targets.append(peer)
+
+    results = fan_out(lambda name: _apply_subnet_change(name, subnet_id, change, dummy_change, success_message), targets)
+
+    messages = []
+    all_ok = True
+    for name, result in results.items():
+        ok, message = result or (False, "Unexpected error, see the log.")
+        all_ok = all_ok and ok
+        messages.append(message if len(targets) == 1 else f"[{name}] {message}")
+    NotificationWindow("\n\n".join(messages), "Notification" if all_ok else "Error").exec()
+
+def _apply_subnet_change(server, subnet_id, change, dummy_change, success_message):
+    """
+    Runs config-get, change(subnet), config-set and config-write against one
+    server. Returns (ok, message) instead of showing popups so it can run on a
+    fan-out thread.
+    """
     if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping update_subnet_lifetime for subnet {subnet_id} with lifetime {new_lifetime}")
-        NotificationWindow(f"[DUMMY MODE] Lease time change skipped for subnet {subnet_id}.", "Info").exec()
-        return
-
-    url = f"{KEA_SERVER}/"
-    headers = {"Content-Type": "application/json"}
+        if not dummy_change(synthetic_data.get_backend(server)):
+            return False, f"Subnet ID {subnet_id} not found in configuration."
+        log.info("[DUMMY] %s: %s", server, success_message.splitlines()[0])
+        return True, f"[DUMMY MODE] {success_message}"
 
     try:
         # Step 1: Fetch the current configuration
@@ -99,39 +360,24 @@ def update_subnet_lifetime(subnet_id, new_lifetime):
             "service": ["dhcp4"]
         }
 
-        response = requests.post(url, headers=headers, json=config_get_payload)
-        response.raise_for_status()
-        config_data = response.json()
+        config_data = kea_command(config_get_payload, server)
 
         if config_data[0]["result"] != 0:
-            debug_print(f"Error fetching config: {config_data[0]['text']}")
-            NotificationWindow(f"Error fetching config: {config_data[0]['text']}").exec()
-            return  # Stop execution if config-get fails
+            log.error("Error fetching config from %s: %s", server, config_data[0]['text'])
+            return False, f"Error fetching config: {config_data[0]['text']}"  # Stop if config-get fails
 
         # Step 2: Find and update the subnet in the configuration
         dhcp4_config = config_data[0]["arguments"]["Dhcp4"]
 
-        debug_print(f"[DEBUG] Checking for subnet ID: {subnet_id}")
+        log.debug("Checking for subnet ID %s on %s", subnet_id, server)
 
-        found = False
         for subnet in dhcp4_config.get("subnet4", []):
-            debug_print(f"[DEBUG] Checking subnet ID: {subnet['id']}")
             if int(subnet["id"]) == int(subnet_id):
-                subnet["valid-lifetime"] = new_lifetime
-                subnet["renew-timer"] = int(new_lifetime * 0.5)  # Set renew-time (T1) to 50% of lifetime
-                subnet["rebind-timer"] = int(new_lifetime * 0.875)  # Set rebind-time (T2) to 87.5% of lifetime
-                
-                # Adjust min/max valid-lifetime
-                subnet["min-valid-lifetime"] = new_lifetime
-                subnet["max-valid-lifetime"] = new_lifetime
-                
-                found = True
+                change(subnet)
                 break
-
-        if not found:
-            debug_print(f"Subnet ID {subnet_id} not found in configuration.")
-            NotificationWindow(f"Subnet ID {subnet_id} not found in configuration.").exec()
-            return  # Stop execution if subnet is not found
+        else:
+            log.warning("Subnet ID %s not found among %d subnets on %s.", subnet_id, len(dhcp4_config.get("subnet4", [])), server)
+            return False, f"Subnet ID {subnet_id} not found in configuration."  # Stop if subnet is not found
 
         # Step 3: Apply the updated configuration
         config_set_payload = {
@@ -140,19 +386,13 @@ def update_subnet_lifetime(subnet_id, new_lifetime):
             "arguments": {"Dhcp4": dhcp4_config}
         }
 
-        response = requests.post(url, headers=headers, json=config_set_payload)
-        response.raise_for_status()
-        result = response.json()
+        result = kea_command(config_set_payload, server)
 
         if result[0]["result"] != 0:
-            debug_print(f"Error updating lease time: {result[0]['text']}")
-            NotificationWindow(f"Error updating lease time: {result[0]['text']}").exec()
-            return  # Stop execution if config-set fails
+            log.error("Error applying config on %s: %s", server, result[0]['text'])
+            return False, f"Error applying configuration: {result[0]['text']}"  # Stop if config-set fails
 
-        debug_print(f"Successfully updated lease time for subnet {subnet_id} to {new_lifetime} seconds.")
-        debug_print(f"Renew Timer: {subnet['renew-timer']} sec, Rebind Timer: {subnet['rebind-timer']} sec.")
-        debug_print(f"Min/Max Lifetime: {subnet['min-valid-lifetime']} sec")
-        NotificationWindow(f"Successfully updated lease time for subnet {subnet_id} to {new_lifetime} seconds.\nRenew Timer: {subnet['renew-timer']} sec, Rebind Timer: {subnet['rebind-timer']} sec.\nMin/Max Lifetime: {subnet['min-valid-lifetime']} sec").exec()
+        log.info("%s: %s", server, success_message.splitlines()[0])
 
         # Step 4: Persist the change **only if config-set was successful**
         config_write_payload = {
@@ -160,428 +400,543 @@ def update_subnet_lifetime(subnet_id, new_lifetime):
             "service": ["dhcp4"]
         }
 
-        response = requests.post(url, headers=headers, json=config_write_payload)
-        response.raise_for_status()
-        result = response.json()
+        result = kea_command(config_write_payload, server)
 
         if result[0]["result"] != 0:
-            debug_print(f"Error writing config: {result[0]['text']}")
-            NotificationWindow(f"Error writing config: {result[0]['text']}").exec()
-        else:
-            debug_print("Configuration successfully written to file.")
-            NotificationWindow(f"Configuration successfully written to file.").exec()
+            log.error("Error writing config on %s: %s", server, result[0]['text'])
+            return False, f"{success_message}\nError writing config: {result[0]['text']}"
 
+        log.info("Configuration successfully written to file on %s.", server)
+        return True, f"{success_message}\nConfiguration successfully written to file."
 
     except requests.RequestException as e:
-        debug_print(f"Request failed: {e}")
-        NotificationWindow(f"Request failed: {e}").exec()
+        log.error("Request to %s failed: %s", server, e)
+        return False, f"Request failed: {e}"
 
-def update_subnet_pool(subnet_id, new_pool_range):
+
+def get_lease_source(server=None):
     """
-    Workaround to update pool range: Get current config, modify pools, and reapply config.
+    Returns the incremental lease source selected by `lease_source` in config.json,
+    or None when leases are fetched from the Kea API on every refresh.
+    Sources expose poll() -> (changed_leases, removed_ips) and leases().
+    Incremental sources follow the default server only; other servers always use the API.
     """
-    if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping update_subnet_pool for subnet {subnet_id} with pool {new_pool_range}")
-        NotificationWindow(f"[DUMMY MODE] Pool update skipped for subnet {subnet_id}.", "Info").exec()
-        return
-    
-    url = f"{KEA_SERVER}/"
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        # Step 1: Fetch current configuration
-        config_get_payload = {
-            "command": "config-get",
-            "service": ["dhcp4"]
-        }
-
-        response = requests.post(url, headers=headers, json=config_get_payload)
-        response.raise_for_status()
-        config_data = response.json()
-
-        if config_data[0]["result"] != 0:
-            NotificationWindow(f"Error fetching config: {config_data[0]['text']}", "API Error").exec()
-            return  # Stop execution if config-get fails
-
-        # Step 2: Locate the correct subnet and update its pool
-        dhcp4_config = config_data[0]["arguments"]["Dhcp4"]
-
-        found = False
-        for subnet in dhcp4_config.get("subnet4", []):
-            if int(subnet["id"]) == int(subnet_id):
-                subnet["pools"] = [{"pool": new_pool_range}]
-                found = True
-                break
-
-        if not found:
-            NotificationWindow(f"Subnet ID {subnet_id} not found in configuration.", "Error").exec()
-            return  # Stop execution if subnet is not found
-
-        # Step 3: Apply the updated configuration
-        config_set_payload = {
-            "command": "config-set",
-            "service": ["dhcp4"],
-            "arguments": {"Dhcp4": dhcp4_config}
-        }
-
-        response = requests.post(url, headers=headers, json=config_set_payload)
-        response.raise_for_status()
-        set_result = response.json()
-
-        if set_result[0]["result"] != 0:
-            NotificationWindow(f"Error applying new pool range: {set_result[0]['text']}", "API Error").exec()
-            return  # Stop execution if config-set fails
-
-        debug_print(f"Successfully updated pool range for subnet {subnet_id} to {new_pool_range}.")
-        NotificationWindow(f"Successfully updated pool range for subnet {subnet_id} to {new_pool_range}.").exec()
-
-        # Step 4: Persist the change only if config-set was successful
-        config_write_payload = {
-            "command": "config-write",
-            "service": ["dhcp4"]
-        }
-
-        response = requests.post(url, headers=headers, json=config_write_payload)
-        response.raise_for_status()
-        write_result = response.json()
-
-        if write_result[0]["result"] != 0:
-            NotificationWindow(f"Error writing config: {write_result[0]['text']}", "API Error").exec()
+    if DUMMY_DATA or not _is_default(server):
+        return None
+    if LEASE_SOURCE == "memfile":
+        return lease_feed.get_feed()
+    if LEASE_SOURCE == "mysql":
+        return lease_db.get_reader()
+    return None
+
+_lease_stores = {}
+_cached_stores = set()  # Servers whose store is a snapshot-cache copy
+_poll_lock = threading.Lock()
+
+def _store_for(server):
+    name = get_server(server)["name"]
+    store = _lease_stores.get(name)
+    if store is None:
+        store = _lease_stores[name] = LeaseStore()
+    return store
+
+def poll_lease_store():
+    """
+    Polls the incremental lease source once, applies the delta to the default
+    server's lease store and returns it as (changed_leases, removed_ips).
+    Source errors are raised to the caller. The shared store is only read or
+    changed under _poll_lock; everyone else gets a copy from get_lease_store().
+    """
+    source = get_lease_source()
+    name = get_server()["name"]
+    with _poll_lock:
+        changed, removed = source.poll()
+        if name in _cached_stores:
+            # A delta can't tell which cached leases are gone; start over from the source
+            _lease_stores[name] = LeaseStore(source.lease_map.values())
+            _cached_stores.discard(name)
         else:
-            debug_print("Configuration successfully written to file.")
-            NotificationWindow(f"Configuration successfully written to file.").exec()
-
-    except requests.RequestException as e:
-        NotificationWindow(f"Request failed: {e}", "API Error").exec()
+            _store_for(None).apply(changed, removed)
+    return changed, removed
 
+def get_lease_store(server=None):
+    """
+    Returns the compact LeaseStore of `server` (the default server if None),
+    brought up to date first. Incremental sources only apply their latest delta;
+    otherwise a new store is built from the lease list. Either way the caller
+    gets a store of its own, so a view may change it (and another thread may
+    serialize it) without touching the store the next poll updates. If the
+    server can't be read, the cached snapshot is returned when there is one.
+    """
+    name = get_server(server)["name"]
+    if get_lease_source(server) is None:
+        try:
+            # Leases go from the streamed response straight into the store's columns
+            store = LeaseStore(get_active_leases(server) if DUMMY_DATA else iter_api_leases(server))
+        except (requests.RequestException, ValueError) as e:
+            _notify(f"Error fetching leases from {name}:\n{str(e)}", "Error")
+            return _use_cached_store(server)
+        with _poll_lock:
+            _lease_stores[name] = store.copy()  # The caller may change `store` itself
+            _cached_stores.discard(name)
+        if not DUMMY_DATA:
+            _cache_save(server, "leases", store)
+        lease_history.observe(name, store)
+        return store
 
-def get_active_leases():
+    try:
+        poll_lease_store()
+        with _poll_lock:
+            store = _store_for(server).copy()
+        _cache_save(server, "leases", store)
+        lease_history.observe(name, store)
+        return store
+    except (OSError, paramiko.SSHException, pymysql.MySQLError) as e:
+        _notify(f"Error reading leases:\n{str(e)}", "Error")
+        with _poll_lock:
+            if len(_store_for(server)):
+                return _store_for(server).copy()
+        return _use_cached_store(server)  # Never synced this session; the cache is the best we have
+
+def _use_cached_store(server):
+    """Swaps the cached lease snapshot in as the server's store if there is one, and returns a copy of the store."""
+    cached = _cache_fallback(server, "leases")
+    name = get_server(server)["name"]
+    with _poll_lock:
+        if cached is not None:
+            _lease_stores[name] = cached
+            _cached_stores.add(name)
+        return _store_for(server).copy()
+
+def get_active_leases(server=None):
     if DUMMY_DATA:
-        now = int(time.time())
-        return [
-            {
-                "ip-address": "10.1.1.25",
-                "hw-address": "AA:BB:CC:DD:EE:01",
-                "hostname": "alpha",
-                "subnet-id": 1,
-                "cltt": now - 100,
-                "valid-lft": 1800
-            },
-            {
-                "ip-address": "10.2.2.66",
-                "hw-address": "AA:BB:CC:DD:EE:02",
-                "hostname": "beta",
-                "subnet-id": 2,
-                "cltt": now - 300,
-                "valid-lft": 3600
-            },
-            {
-                "ip-address": "10.3.3.77",
-                "hw-address": "AA:BB:CC:DD:EE:03",
-                "hostname": "gamma",
-                "subnet-id": 3,
-                "cltt": now - 400,
-                "valid-lft": 1200
-            },
-            {
-                "ip-address": "10.4.4.88",
-                "hw-address": "AA:BB:CC:DD:EE:04",
-                "hostname": "delta",
-                "subnet-id": 4,
-                "cltt": now - 200,
-                "valid-lft": 3600
-            },
-            {
-                "ip-address": "10.5.5.99",
-                "hw-address": "AA:BB:CC:DD:EE:05",
-                "hostname": "epsilon",
-                "subnet-id": 5,
-                "cltt": now - 500,
-                "valid-lft": 2400
-            },
-            {
-                "ip-address": "10.6.6.111",
-                "hw-address": "AA:BB:CC:DD:EE:06",
-                "hostname": "zeta",
-                "subnet-id": 6,
-                "cltt": now - 600,
-                "valid-lft": 9000
-            }
-        ]
+        return synthetic_data.get_backend(server).leases()
+
+    # Incremental sources follow the default server; other servers use the API below
+    if LEASE_SOURCE == "memfile" and _is_default(server):
+        try:
+            poll_lease_store()  # Keep the shared store in step with the feed
+            with _poll_lock:
+                return list(lease_feed.get_feed().lease_map.values())
+        except (OSError, paramiko.SSHException) as e:
+            _notify(f"Error reading lease file:\n{str(e)}", "Error")
+            return []
+
+    if LEASE_SOURCE == "mysql" and _is_default(server):
+        try:
+            poll_lease_store()
+            with _poll_lock:
+                return list(lease_db.get_reader().lease_map.values())
+        except pymysql.MySQLError as e:
+            _notify(f"Error reading leases from DB:\n{str(e)}", "Error")
+            return []
     
-    url = f"{KEA_SERVER}/"
-    headers = {"Content-Type": "application/json"}
+    try:
+        return list(iter_api_leases(server))
+    except (requests.RequestException, ValueError) as e:
+        _notify(f"Error fetching leases from {get_server(server)['name']}:\n{str(e)}", "Error")
+        cached = _cache_fallback(server, "leases")
+        return cached.to_dicts() if cached is not None else []
 
+def iter_api_leases(server=None, subnet_ids=None):
+    """
+    Yields leases from `lease4-get-all` on `server` one at a time while the response streams in,
+    only those of `subnet_ids` if given.
+    Raises requests.RequestException or ValueError (malformed response, or Kea
+    reporting an error, e.g. lease_cmds not loaded) to the caller once the
+    response has been read, so a failed read is never taken for an empty one.
+    """
     payload = {
         "command": "lease4-get-all",
         "service": ["dhcp4"]
     }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()  # Raise an error for HTTP failures
-        
-        data = response.json()
+    if subnet_ids:
+        payload["arguments"] = {"subnets": [int(subnet_id) for subnet_id in subnet_ids]}
 
-        # Ensure the response contains lease data
-        if isinstance(data, list) and len(data) > 0 and "arguments" in data[0]:
-            return data[0]["arguments"].get("leases", [])
-        
-        return []
-    
-    except requests.RequestException as e:
-        NotificationWindow(f"Error fetching leases:\n{str(e)}", "Error").exec()
-        return []
+    stream = kea_command_stream(payload, "leases", server=server)
+    yield from stream
 
-def get_reservations_from_db():
+    data = stream.envelope
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        if data[0].get("result", 0) not in (0, 3):
+            raise ValueError(f"lease4-get-all failed: {data[0].get('text')}")
+
+def get_lease(ip_address, server=None):
+    """
+    Reads the lease of one address with `lease4-get` on `server` (the default
+    server if None). Returns the lease dict, or None if the address has no lease.
+    Raises requests.RequestException or ValueError to the caller.
+    """
     if DUMMY_DATA:
-        return [
-            {
-                "ip-address": "10.1.1.240",
-                "dhcp_identifier": "AABBCCDDEEF0",
-                "hostname": "reserved-alpha",
-                "subnet_id": 1
-            },
-            {
-                "ip-address": "10.2.2.200",
-                "dhcp_identifier": "AABBCCDDEEF1",
-                "hostname": "reserved-beta",
-                "subnet_id": 2
-            },
-            {
-                "ip-address": "10.3.3.210",
-                "dhcp_identifier": "AABBCCDDEEF2",
-                "hostname": "reserved-gamma",
-                "subnet_id": 3
-            },
-            {
-                "ip-address": "10.4.4.220",
-                "dhcp_identifier": "AABBCCDDEEF3",
-                "hostname": "reserved-delta",
-                "subnet_id": 4
-            },
-            {
-                "ip-address": "10.5.5.230",
-                "dhcp_identifier": "AABBCCDDEEF4",
-                "hostname": "reserved-epsilon",
-                "subnet_id": 5
-            },
-            {
-                "ip-address": "10.6.6.250",
-                "dhcp_identifier": "AABBCCDDEEF5",
-                "hostname": "reserved-zeta",
-                "subnet_id": 6
-            }
-        ]
-    
-    try:
-        conn = pymysql.connect(
-            host=MYSQL_CONFIG.get("host", "127.0.0.1"),
-            user=MYSQL_CONFIG.get("user", "kea"),
-            password=MYSQL_CONFIG.get("password", ""),
-            database=MYSQL_CONFIG.get("database", "kea"),
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        cursor = conn.cursor()
+        return synthetic_data.get_backend(server).lease(ip_address)
 
-        query = "SELECT dhcp_identifier, dhcp_identifier_type, INET_NTOA(ipv4_address) as ip_address FROM hosts"
-        cursor.execute(query)
-        reservations = cursor.fetchall()
+    payload = {
+        "command": "lease4-get",
+        "service": ["dhcp4"],
+        "arguments": {"ip-address": ip_address}
+    }
+    data = kea_command(payload, server)
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+        raise ValueError(f"Unexpected lease4-get response: {data!r}")
+    if data[0].get("result") == 3:  # Empty: the address has no lease
+        return None
+    if data[0].get("result") != 0:
+        raise ValueError(f"lease4-get failed: {data[0].get('text')}")
+    return data[0].get("arguments")
+
+# Concurrent lease4-del commands for bulk deletes
+BULK_DELETE_WORKERS = max(1, int(BULK_DELETE.get("max_workers", 16)))
+
+def delete_lease(ip_address, server=None, session=None):
+    """
+    Deletes one lease with `lease4-del`. Returns (ok, message); a lease that is
+    already gone counts as deleted. Shows no popups.
+    """
+    if DUMMY_DATA:
+        synthetic_data.get_backend(server).delete_lease(ip_address)
+        return True, f"Lease {ip_address} deleted"
 
-        # Convert 'ip_address' to 'ip-address' to match lease API output
-        formatted_reservations = [
-            {"ip-address": res["ip_address"], "dhcp_identifier": res["dhcp_identifier"]}
-            for res in reservations
-        ]
+    payload = {
+        "command": "lease4-del",
+        "service": ["dhcp4"],
+        "arguments": {"ip-address": ip_address}
+    }
+    try:
+        data = kea_command(payload, server, session)
+    except (requests.RequestException, ValueError) as e:
+        return False, str(e)
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+        return False, f"Unexpected lease4-del response: {data!r}"
+    if data[0].get("result") not in (0, 3):  # 3 = no such lease
+        return False, data[0].get("text", "lease4-del failed")
+    return True, data[0].get("text", "")
+
+def delete_leases(ip_addresses, server=None, progress=None, cancelled=None):
+    """
+    Deletes many leases of `server` with up to BULK_DELETE_WORKERS concurrent
+    `lease4-del` commands; each worker thread reuses one HTTP connection.
+    `progress(done, total)` is called from the calling thread as results come
+    in, and the remaining deletes are skipped once the `cancelled` event is set.
+    Returns {ip_address: reason} for the leases that were not deleted.
+    """
+    ips = list(ip_addresses)
+    total = len(ips)
+    local = threading.local()
+    sessions = []
+
+    def delete(ip_address):
+        if cancelled is not None and cancelled.is_set():
+            return "Cancelled"
+        session = getattr(local, "session", None)
+        if session is None and not DUMMY_DATA:
+            session = local.session = requests.Session()
+            sessions.append(session)
+        ok, message = delete_lease(ip_address, server, session)
+        return None if ok else message
+
+    failures = {}
+    with metrics.timed("kea", "delete_leases") as span:
+        try:
+            with ThreadPoolExecutor(max_workers=1 if DUMMY_DATA else BULK_DELETE_WORKERS, thread_name_prefix="lease-del") as pool:
+                for done, (ip_address, failure) in enumerate(zip(ips, pool.map(delete, ips)), 1):
+                    if failure is not None:
+                        failures[ip_address] = failure
+                    if progress is not None:
+                        progress(done, total)
+        finally:
+            for session in sessions:
+                session.close()
+        span.rows = total - len(failures)
+
+    log.info("Deleted %d of %d leases on %s", total - len(failures), total, get_server(server)["name"])
+    return failures
+
+def wipe_subnet_leases(subnet_id, server=None, progress=None, cancelled=None):
+    """
+    Deletes every lease of one subnet: one `lease4-wipe` when enabled and the
+    server supports it, otherwise concurrent `lease4-del` commands for the
+    subnet's leases as read with `lease4-get-all`. Returns {ip_address: reason} for the
+    leases that were not deleted ({"*": reason} if the wipe itself failed).
+    """
+    if DUMMY_DATA:
+        count = synthetic_data.get_backend(server).wipe_leases(subnet_id)
+        log.info("[DUMMY] Wiped %d leases of subnet %s", count, subnet_id)
+        return {}
 
-        cursor.close()
-        conn.close()
-        return formatted_reservations
+    if BULK_DELETE.get("use_wipe", True):
+        payload = {
+            "command": "lease4-wipe",
+            "service": ["dhcp4"],
+            "arguments": {"subnet-id": int(subnet_id)}
+        }
+        try:
+            data = kea_command(payload, server)
+        except (requests.RequestException, ValueError) as e:
+            return {"*": str(e)}
+        result = data[0].get("result") if isinstance(data, list) and data and isinstance(data[0], dict) else None
+        if result in (0, 3):
+            log.info("lease4-wipe of subnet %s on %s: %s", subnet_id, get_server(server)["name"], data[0].get("text"))
+            return {}
+        log.info("lease4-wipe unavailable on %s (%s); deleting leases one by one", get_server(server)["name"], data)
 
-    except pymysql.connect.Error as e:
-        debug_print(f"Error fetching leases from DB:\n{str(e)}")
-        NotificationWindow(f"Error fetching leases from DB:\n{str(e)}", "Error").exec()
-        return []
-    
-def add_reservation_to_db(ip_address, mac_address, hostname, subnet_id, parent=None):
+    try:
+        ips = [lease["ip-address"] for lease in iter_api_leases(server, [subnet_id])]
+    except (requests.RequestException, ValueError) as e:
+        return {"*": str(e)}
+    return delete_leases(ips, server, progress, cancelled)
+
+def _format_reservation(row):
+    """Converts a hosts row to a reservation; 'ip_address' becomes 'ip-address' to match lease API output."""
+    return {
+        "ip-address": row["ip_address"],
+        "dhcp_identifier": row["dhcp_identifier"],
+        "subnet_id": row["dhcp4_subnet_id"],
+        "hostname": row["hostname"]
+    }
+
+def get_reservations_by_ip(ip_addresses, server=None):
     """
-    Inserts a reservation into the Kea MySQL database.
+    Reads the reservations of the given addresses from the hosts table of
+    `server` with primary-key lookups (one query per 1000 addresses) instead of
+    reading the whole table. Returns {ip_address: reservation} for the addresses
+    that are reserved. Raises pymysql.MySQLError to the caller.
     """
     if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping real DB insert for reservation {ip_address} → {mac_address}")
-        NotificationWindow(f"[DUMMY MODE] Reservation added for {ip_address} (not really).", "Success", parent).exec()
-        return True
-    
+        backend = synthetic_data.get_backend(server)
+        found = {ip_address: backend.reservation(ip_address) for ip_address in ip_addresses}
+        return {ip_address: res for ip_address, res in found.items() if res is not None}
+
+    ips = list(ip_addresses)
+    found = {}
+    if not ips:
+        return found
+    conn = mysql_connect(server=server)
     try:
-        if not mac_address or mac_address.strip() == "":
-            error_msg = f"[DEBUG] ERROR: MAC address is empty for {ip_address}"
-            NotificationWindow(error_msg, "Error", parent).exec()
-            return False
-
-        # Convert MAC address to HEX format
-        mac_binary = mac_address.replace(":", "").replace("-", "").upper().strip()
-
-        if len(mac_binary) != 12 or not all(c in "0123456789ABCDEF" for c in mac_binary):
-            error_msg = f"[DEBUG] ERROR: Invalid MAC address format -> {mac_binary}"
-            NotificationWindow(error_msg, "Error", parent).exec()
-            return False
-
-        conn = pymysql.connect(
-            host=MYSQL_CONFIG.get("host", "127.0.0.1"),
-            user=MYSQL_CONFIG.get("user", "kea"),
-            password=MYSQL_CONFIG.get("password", ""),
-            database=MYSQL_CONFIG.get("database", "kea"),
-            cursorclass=pymysql.cursors.DictCursor
-        )
         cursor = conn.cursor()
-
-        query = """
-            INSERT INTO hosts (dhcp_identifier, dhcp_identifier_type, dhcp4_subnet_id, ipv4_address, hostname)
-            VALUES (UNHEX(%s), 0, %s, INET_ATON(%s), %s)
-            ON DUPLICATE KEY UPDATE hostname = VALUES(hostname), dhcp4_subnet_id = VALUES(dhcp4_subnet_id);
-        """
-
-        cursor.execute(query, (mac_binary, subnet_id, ip_address, hostname))
-        conn.commit()
-
-        rows_affected = cursor.rowcount
-
-        cursor.close()
+        for start in range(0, len(ips), 1000):
+            chunk = ips[start:start + 1000]
+            sql_execute(
+                cursor, "get_reservations_by_ip",
+                "SELECT dhcp_identifier, dhcp_identifier_type, dhcp4_subnet_id, hostname, INET_NTOA(ipv4_address) as ip_address"
+                " FROM hosts WHERE ipv4_address IN (" + ", ".join(["INET_ATON(%s)"] * len(chunk)) + ")",
+                chunk
+            )
+            for row in cursor.fetchall():
+                found[row["ip_address"]] = _format_reservation(row)
+    finally:
         conn.close()
+    return found
 
-        if rows_affected > 0:
-            return True  # Success
-
-        error_msg = f"[DEBUG] WARNING: No rows inserted for {ip_address}. Possible duplicate or invalid input."
-        NotificationWindow(error_msg, "Warning", parent).exec()
-        return False
-
-    except pymysql.connector.Error as e:
-        error_msg = f"[DEBUG] ERROR: MySQL Exception: {e}"
-        NotificationWindow(error_msg, "Database Error", parent).exec()
-        return False
-
-
-def delete_reservation_from_db(ip_address, parent=None):
+def get_address(ip_address, server=None):
     """
-    Deletes a reservation from the Kea database.
+    Re-reads one address after a change: returns (lease, reservation), either
+    None when the address has none, or None if the server could not be read.
+    Two small lookups instead of reloading every lease and reservation.
     """
+    try:
+        lease = get_lease(ip_address, server)
+        reservation = get_reservations_by_ip([ip_address], server).get(ip_address)
+    except (requests.RequestException, ValueError, pymysql.MySQLError) as e:
+        log.warning("Could not re-read %s on %s: %s", ip_address, get_server(server)["name"], e)
+        return None
+    return lease, reservation
+
+def get_reservations_from_db(server=None):
     if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping real DB delete for {ip_address}")
-        NotificationWindow(f"[DUMMY MODE] Reservation for {ip_address} deleted (not really).", "Success", parent).exec()
-        return True
+        return synthetic_data.get_backend(server).reservations()
     
     try:
-        conn = pymysql.connect(
-            host=MYSQL_CONFIG.get("host", "127.0.0.1"),
-            user=MYSQL_CONFIG.get("user", "kea"),
-            password=MYSQL_CONFIG.get("password", ""),
-            database=MYSQL_CONFIG.get("database", "kea"),
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        conn = mysql_connect(server=server)
         cursor = conn.cursor()
 
-        query = "DELETE FROM hosts WHERE ipv4_address = INET_ATON(%s)"
-
-        cursor.execute(query, (ip_address,))
-        conn.commit()
+        query = "SELECT dhcp_identifier, dhcp_identifier_type, dhcp4_subnet_id, hostname, INET_NTOA(ipv4_address) as ip_address FROM hosts"
+        sql_execute(cursor, "get_reservations", query)
+        reservations = cursor.fetchall()
 
-        rows_deleted = cursor.rowcount
+        formatted_reservations = [_format_reservation(res) for res in reservations]
 
         cursor.close()
         conn.close()
+        _cache_save(server, "reservations", formatted_reservations)
+        return formatted_reservations
 
-        if rows_deleted > 0:
-            return True
-        else:
-            NotificationWindow(f"No reservation found for {ip_address}.", "Warning", parent).exec()
-            return False
-
-    except pymysql.connector.Error as e:
-        NotificationWindow(f"Error deleting reservation from DB: {e}", "Database Error", parent).exec()
-        return False
-
+    except pymysql.MySQLError as e:
+        log.error("Error fetching reservations from DB: %s", e)
+        _notify(f"Error fetching leases from DB:\n{str(e)}", "Error")
+        return _cache_fallback(server, "reservations") or []
+    
+def _track_reservation(server, ip_address, reserved):
+    """Keeps the server's free-address maps current after a reservation was added or deleted."""
+    pool_occupancy.get_occupancy(get_server(server)["name"]).set_reserved(ip_address, reserved)
 
+def reservation_record(ip_address, mac_address, hostname, subnet_id):
+    """
+    Returns a reservation shaped like the entries of get_reservations_from_db(),
+    so views can show a reservation before it has been read back. Returns None
+    if the MAC address is not valid.
+    """
+    mac_hex = _mac_hex(mac_address)
+    if mac_hex is None:
+        return None
+    return {
+        "ip-address": ip_address,
+        "dhcp_identifier": mac_hex if DUMMY_DATA else bytes.fromhex(mac_hex),
+        "subnet_id": int(subnet_id) if str(subnet_id).isdigit() else subnet_id,
+        "hostname": hostname
+    }
 
-def update_hostname(ip_address, hostname):
+def try_add_reservation(ip_address, mac_address, hostname, subnet_id, server=None):
     """
-    Updates the hostname for a reservation in the Kea database.
+    Inserts a reservation into the Kea MySQL database of `server` (the default
+    server if None). Returns (ok, message) instead of showing popups so it can
+    run on a background commit thread.
     """
     if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping real DB hostname update for {ip_address} → {hostname}")
-        return True
-    
-    try:
-        conn = pymysql.connect(
-            host=MYSQL_CONFIG.get("host", "127.0.0.1"),
-            user=MYSQL_CONFIG.get("user", "kea"),
-            password=MYSQL_CONFIG.get("password", ""),
-            database=MYSQL_CONFIG.get("database", "kea"),
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        cursor = conn.cursor()
+        log.debug("[DUMMY] Adding reservation %s → %s", ip_address, mac_address)
+        if not synthetic_data.get_backend(server).add_reservation(ip_address, mac_address, hostname, subnet_id):
+            return False, f"[DUMMY MODE] No subnet found for {ip_address}."
+        _track_reservation(server, ip_address, True)
+        return True, f"Reservation added for {ip_address}"
 
-        query = "UPDATE hosts SET hostname = %s WHERE ipv4_address = INET_ATON(%s)"
-        cursor.execute(query, (hostname, ip_address))
-        conn.commit()
+    if not mac_address:
+        return False, f"MAC address is empty for {ip_address}"
 
-        cursor.close()
-        conn.close()
-        return True
+    # Convert MAC address to HEX format
+    mac_binary = _mac_hex(mac_address)
+    if mac_binary is None:
+        return False, f"Invalid MAC address format -> {mac_address}"
 
-    except pymysql.connector.Error as e:
-        NotificationWindow(f"Error updating hostname in DB:\n{str(e)}", "Error").exec()
-        return False
-
-def update_mac_address(ip_address, mac_address, parent=None):
+    try:
+        conn = mysql_connect(server=server)
+        try:
+            cursor = conn.cursor()
+
+            query = """
+                INSERT INTO hosts (dhcp_identifier, dhcp_identifier_type, dhcp4_subnet_id, ipv4_address, hostname)
+                VALUES (UNHEX(%s), 0, %s, INET_ATON(%s), %s)
+                ON DUPLICATE KEY UPDATE hostname = VALUES(hostname), dhcp4_subnet_id = VALUES(dhcp4_subnet_id);
+            """
+
+            sql_execute(cursor, "add_reservation", query, (mac_binary, subnet_id, ip_address, hostname))
+            conn.commit()
+            rows_affected = cursor.rowcount
+        finally:
+            conn.close()
+    except pymysql.MySQLError as e:
+        log.error("Adding reservation for %s on %s failed: %s", ip_address, get_server(server)["name"], e)
+        return False, f"MySQL Exception: {e}"
+
+    if rows_affected > 0:
+        _track_reservation(server, ip_address, True)
+        return True, f"Reservation added for {ip_address}"
+    return False, f"No rows inserted for {ip_address}. Possible duplicate or invalid input."
+
+def try_delete_reservation(ip_address, server=None):
     """
-    Updates the MAC address for a reservation in the Kea database.
-    The MAC address is stored in binary format using UNHEX().
+    Deletes a reservation from the Kea database of `server` (the default server
+    if None). Returns (ok, message) instead of showing popups.
     """
     if DUMMY_DATA:
-        debug_print(f"[DUMMY] Skipping real MAC update for {ip_address} → {mac_address}")
-        NotificationWindow(f"[DUMMY MODE] MAC address updated for {ip_address} (not really).", "Success", parent).exec()
-        return True
-    
-    try:
-        if not mac_address or mac_address.strip() == "":
-            NotificationWindow(f"Error: MAC address is empty for {ip_address}", "Error", parent).exec()
-            return False  # Prevent empty MAC addresses
-
-        # Convert MAC address (format "00:1A:2B:3C:4D:5E") to "001A2B3C4D5E" for UNHEX
-        mac_binary = mac_address.replace(":", "").replace("-", "").upper().strip()
-
-        # Ensure MAC address is valid (must be 12 hex characters)
-        if len(mac_binary) != 12 or not all(c in "0123456789ABCDEF" for c in mac_binary):
-            NotificationWindow(f"Error: Invalid MAC address format for {ip_address} -> {mac_address}", "Error", parent).exec()
-            return False
-
-        conn = pymysql.connect(
-            host=MYSQL_CONFIG.get("host", "127.0.0.1"),
-            user=MYSQL_CONFIG.get("user", "kea"),
-            password=MYSQL_CONFIG.get("password", ""),
-            database=MYSQL_CONFIG.get("database", "kea"),
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        cursor = conn.cursor()
-
-        query = "UPDATE hosts SET dhcp_identifier = UNHEX(%s) WHERE ipv4_address = INET_ATON(%s)"
+        log.debug("[DUMMY] Deleting reservation for %s", ip_address)
+        if not synthetic_data.get_backend(server).delete_reservation(ip_address):
+            return False, f"No reservation found for {ip_address}."
+        _track_reservation(server, ip_address, False)
+        return True, f"Reservation for {ip_address} deleted"
 
-        cursor.execute(query, (mac_binary, ip_address))
-        conn.commit()
-
-        rows_affected = cursor.rowcount
-
-        cursor.close()
-        conn.close()
-
-        if rows_affected > 0:
-            NotificationWindow(f"MAC address successfully updated for {ip_address}", "Success", parent).exec()
-            return True
+    try:
+        conn = mysql_connect(server=server)
+        try:
+            cursor = conn.cursor()
+            query = "DELETE FROM hosts WHERE ipv4_address = INET_ATON(%s)"
+            sql_execute(cursor, "delete_reservation", query, (ip_address,))
+            conn.commit()
+            rows_deleted = cursor.rowcount
+        finally:
+            conn.close()
+    except pymysql.MySQLError as e:
+        log.error("Deleting reservation for %s on %s failed: %s", ip_address, get_server(server)["name"], e)
+        return False, f"Error deleting reservation from DB: {e}"
+
+    if rows_deleted > 0:
+        _track_reservation(server, ip_address, False)
+        return True, f"Reservation for {ip_address} deleted"
+    return False, f"No reservation found for {ip_address}."
+
+def _mac_hex(mac_address):
+    """Returns "001A2B3C4D5E" for a MAC like "00:1a:2b:3c:4d:5e", or None if it is not a valid MAC."""
+    if isinstance(mac_address, (bytes, bytearray)):  # Raw dhcp_identifier from the hosts table
+        return mac_address.hex().upper() if len(mac_address) == 6 else None
+    mac_hex = (mac_address or "").replace(":", "").replace("-", "").upper().strip()
+    if len(mac_hex) != 12 or not all(c in "0123456789ABCDEF" for c in mac_hex):
+        return None
+    return mac_hex
+
+def apply_reservation_edits(edits, server=None):
+    """
+    Writes buffered reservation edits, {ip_address: {"hostname": ..., "mac": ...}},
+    to the hosts table of `server` in one transaction: one connection, one
+    executemany per column. An IP's edits are applied together or not at all.
+    Returns {ip_address: reason} for the IPs that were not saved; shows no popups.
+    """
+    failures = {}
+    valid = {}
+    for ip_address, fields in edits.items():
+        if "mac" in fields and _mac_hex(fields["mac"]) is None:
+            failures[ip_address] = f"Invalid MAC address: {fields['mac']!r}"
         else:
-            NotificationWindow(f"No rows updated. Possible issue with IP {ip_address}", "Warning", parent).exec()
-            return False
+            valid[ip_address] = fields
 
-    except pymysql.connector.Error as e:
-        NotificationWindow(f"Error updating MAC address in DB: {e}", "Database Error", parent).exec()
-        return False
+    if DUMMY_DATA:
+        backend = synthetic_data.get_backend(server)
+        for ip_address, fields in valid.items():
+            log.debug("[DUMMY] Saving edits for %s: %s", ip_address, fields)
+            if "mac" in fields and not backend.update_mac_address(ip_address, fields["mac"]):
+                failures[ip_address] = "No reservation for this IP"
+            elif "hostname" in fields:
+                backend.update_hostname(ip_address, fields["hostname"])
+        return failures
+
+    if not valid:
+        return failures
+
+    try:
+        conn = mysql_connect(server=server)
+        try:
+            cursor = conn.cursor()
+
+            # Only reserved IPs have a hosts row; an UPDATE on any other IP would silently do nothing
+            ips = list(valid)
+            reserved = set()
+            for start in range(0, len(ips), 1000):
+                chunk = ips[start:start + 1000]
+                sql_execute(
+                    cursor, "select_reserved",
+                    "SELECT INET_NTOA(ipv4_address) AS ip FROM hosts WHERE ipv4_address IN ("
+                    + ", ".join(["INET_ATON(%s)"] * len(chunk)) + ")",
+                    chunk
+                )
+                reserved.update(row["ip"] for row in cursor.fetchall())
+            for ip_address in ips:
+                if ip_address not in reserved:
+                    failures[ip_address] = "No reservation for this IP"
+
+            hostname_rows = [(f["hostname"], ip) for ip, f in valid.items() if ip in reserved and "hostname" in f]
+            mac_rows = [(_mac_hex(f["mac"]), ip) for ip, f in valid.items() if ip in reserved and "mac" in f]
+            with metrics.timed("mysql", "apply_reservation_edits") as span:
+                if hostname_rows:
+                    cursor.executemany("UPDATE hosts SET hostname = %s WHERE ipv4_address = INET_ATON(%s)", hostname_rows)
+                if mac_rows:
+                    cursor.executemany("UPDATE hosts SET dhcp_identifier = UNHEX(%s) WHERE ipv4_address = INET_ATON(%s)", mac_rows)
+                span.rows = len(hostname_rows) + len(mac_rows)
+            conn.commit()
+        except pymysql.MySQLError:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    except pymysql.MySQLError as e:
+        log.error("Saving %d reservation edits on %s failed: %s", len(valid), get_server(server)["name"], e)
+        for ip_address in valid:
+            failures[ip_address] = f"Database error: {e}"
+
+    return failures
@@ -0,0 +1,114 @@
+import codecs
+import json
+import re
+
+SPECIAL = re.compile(r'["{}\[\]]')
+STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+ARRAY_START = re.compile(r'\s*:\s*\[')
+ARRAY_START_PARTIAL = re.compile(r'\s*(?::\s*)?$')
+SEPARATORS = re.compile(r'[\s,]*')
+
+# Drop consumed text from the buffer once this much has piled up
+COMPACT_AT = 1 << 16
+
+
+class JSONArrayStream:
+    """
+    Incrementally parses a JSON document that arrives in chunks and yields the
+    elements of one array as soon as each is complete.
+
+    The array is the value of `key` at nesting `depth` (a Kea response
+    `[{"arguments": {"leases": [...]}}]` has "leases" at depth 3). Elements must
+    be JSON objects, as Kea's are. The rest of the document is small; once
+    iteration finishes it is available as `envelope`, with the streamed array
+    left empty. If the key never appears, `envelope` holds the whole document.
+    """
+
+    def __init__(self, chunks, key, depth):
+        self.chunks = chunks
+        self.key = json.dumps(key)
+        self.depth = depth
+        self.envelope = None
+        self.count = 0
+        self.bytes = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        element_decoder = json.JSONDecoder()
+        chunks = iter(self.chunks)
+
+        buf = ""
+        pos = 0
+        depth = 0
+        eof = False
+        state = "prefix"
+        outside = []  # Document text before the streamed array
+
+        while True:
+            # Step 1: Advance through the buffer as far as the data allows
+            while state == "prefix":
+                match = SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                i = match.start()
+                if buf[i] != '"':
+                    depth += 1 if buf[i] in "{[" else -1
+                    pos = i + 1
+                    continue
+
+                string = STRING.match(buf, i)
+                if string is None:  # String continues in the next chunk
+                    pos = i
+                    break
+                pos = string.end()
+                if depth != self.depth or string.group() != self.key:
+                    continue
+
+                start = ARRAY_START.match(buf, pos)
+                if start is None:
+                    if not eof and ARRAY_START_PARTIAL.match(buf, pos):
+                        pos = i  # Need more data to see what follows the key
+                        break
+                    continue
+                outside.append(buf[:start.end()])
+                buf, pos = buf[start.end():], 0
+                state = "array"
+
+            while state == "array":
+                pos = SEPARATORS.match(buf, pos).end()
+                if pos == len(buf):
+                    break
+                if buf[pos] == "]":
+                    buf, pos = buf[pos:], 0
+                    state = "suffix"
+                    break
+                try:
+                    element, pos = element_decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError("Truncated or malformed JSON array in streamed response")
+                    break  # Element continues in the next chunk
+                self.count += 1
+                yield element
+                if pos > COMPACT_AT:
+                    buf, pos = buf[pos:], 0
+
+            # Step 2: Read the next chunk
+            if eof:
+                break
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                buf += decoder.decode(b"", final=True)
+            else:
+                self.bytes += len(chunk)
+                buf += decoder.decode(chunk)
+
+        # Step 3: Parse what was left around the array
+        if state == "array":
+            raise ValueError("Streamed response ended inside the array")
+        if state == "prefix":
+            self.envelope = json.loads(buf) if buf.strip() else None
+        else:
+            self.envelope = json.loads("".join(outside) + buf)
@@ -0,0 +1,210 @@
+import pymysql  # type: ignore
+import metrics
+from config_loader import SERVERS, MULTI_SERVER, MYSQL_CONFIG, MYSQL_LEASES_CONFIG, get_logger
+from lease_store import ip_to_int
+
+log = get_logger(__name__)
+
+LEASE_COLUMNS = """
+    INET_NTOA(address) AS ip_address,
+    HEX(hwaddr) AS hwaddr,
+    valid_lifetime,
+    UNIX_TIMESTAMP(expire) AS expire,
+    subnet_id,
+    hostname,
+    state
+"""
+
+# Allowance for rows committed while a sync is running
+WATERMARK_SKEW = 5
+
+
+def row_to_lease(row):
+    """Converts a lease4 row into a dict shaped like the `lease4-get-all` output."""
+    hwaddr = row["hwaddr"] or ""
+    valid_lft = int(row["valid_lifetime"] or 0)
+    expire = int(row["expire"] or 0)
+    return {
+        "ip-address": row["ip_address"],
+        "hw-address": ":".join(hwaddr[i:i + 2] for i in range(0, len(hwaddr), 2)),
+        "hostname": row["hostname"] or "",
+        "subnet-id": int(row["subnet_id"]),
+        "cltt": expire - valid_lft,
+        "valid-lft": valid_lft,
+        "state": int(row["state"] or 0)
+    }
+
+
+class MySQLLeaseReader:
+    """
+    Reads leases straight from Kea's `lease4` table.
+
+    The first sync streams the whole table through a server-side cursor. Later
+    syncs only pull rows written since the previous sync: a lease renewed at
+    cltt >= last_sync has expire = cltt + its lifetime, so `expire >= last_sync
+    + the shortest lifetime currently in the table` is one range on the expire
+    index, and `expire - valid_lifetime >= last_sync` drops the unchanged rows
+    it still covers. The shortest lifetime is read again on every sync, so
+    lifetime changes are picked up at once.
+    Deletions don't leave a row behind, so per-subnet row counts and XORs of
+    the addresses are compared and only subnets where either changed are
+    re-read; the XOR catches a lease deleted and another added in between.
+    """
+
+    def __init__(self):
+        self.lease_map = {}
+        self.subnet_counts = {}  # subnet_id -> (leases, XOR of their address ints)
+        self.last_sync = None
+        self.syncs_since_full = 0
+        self.full_resync_every = int(MYSQL_LEASES_CONFIG.get("full_resync_every", 60))
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None or not self.conn.open:
+            # Same per-server timeout as the Kea API requests
+            timeout = int(float(SERVERS[0].get("timeout_s", MULTI_SERVER.get("timeout_s", 30))))
+            self.conn = pymysql.connect(
+                host=MYSQL_CONFIG.get("host", "127.0.0.1"),
+                user=MYSQL_CONFIG.get("user", "kea"),
+                password=MYSQL_CONFIG.get("password", ""),
+                database=MYSQL_CONFIG.get("database", "kea"),
+                connect_timeout=timeout,
+                read_timeout=timeout,
+                write_timeout=timeout,
+                cursorclass=pymysql.cursors.SSDictCursor
+            )
+        else:
+            self.conn.ping(reconnect=True)
+        return self.conn
+
+    def _stream(self, operation, query, args=None):
+        """Yields rows one at a time from a server-side cursor."""
+        with metrics.timed("mysql", operation) as span:
+            cursor = self._connect().cursor()
+            try:
+                cursor.execute(query, args)
+                for row in cursor:
+                    span.rows += 1
+                    yield row
+            finally:
+                cursor.close()
+
+    def _server_time(self):
+        rows = list(self._stream("lease4_server_time", "SELECT UNIX_TIMESTAMP() AS now"))
+        return int(rows[0]["now"])
+
+    def _remember(self, lease, changed):
+        """Stores a lease, recording it as changed only if something differs."""
+        ip_address = lease["ip-address"]
+        if self.lease_map.get(ip_address) != lease:
+            self.lease_map[ip_address] = lease
+            changed[ip_address] = lease
+
+    def _recount(self):
+        self.subnet_counts = {}
+        for ip_address, lease in self.lease_map.items():
+            subnet_id = lease["subnet-id"]
+            count, checksum = self.subnet_counts.get(subnet_id, (0, 0))
+            self.subnet_counts[subnet_id] = (count + 1, checksum ^ ip_to_int(ip_address))
+
+    def _full_sync(self):
+        changed = {}
+        seen = set()
+        for row in self._stream("lease4_full", f"SELECT {LEASE_COLUMNS} FROM lease4"):
+            lease = row_to_lease(row)
+            seen.add(lease["ip-address"])
+            self._remember(lease, changed)
+
+        removed = [ip for ip in self.lease_map if ip not in seen]
+        for ip_address in removed:
+            del self.lease_map[ip_address]
+
+        self._recount()
+        self.syncs_since_full = 0
+        log.debug("Full lease4 sync: %s leases", len(self.lease_map))
+        return changed, removed
+
+    def _incremental_sync(self, since):
+        changed = {}
+
+        # Step 1: Per-subnet counts and checksums (to catch deleted leases) and the shortest lifetime in the table now
+        counts = {}
+        shortest = None
+        for row in self._stream(
+            "lease4_counts",
+            "SELECT subnet_id, COUNT(*) AS total, BIT_XOR(address) AS checksum, MIN(valid_lifetime) AS shortest"
+            " FROM lease4 GROUP BY subnet_id"
+        ):
+            counts[int(row["subnet_id"])] = (int(row["total"]), int(row["checksum"]))
+            if row["shortest"] is not None and (shortest is None or int(row["shortest"]) < shortest):
+                shortest = int(row["shortest"])
+
+        # Step 2: Rows renewed or added since the last sync
+        if shortest is not None:
+            query = (
+                f"SELECT {LEASE_COLUMNS} FROM lease4"
+                " WHERE expire >= FROM_UNIXTIME(%s) AND UNIX_TIMESTAMP(expire) - valid_lifetime >= %s"
+            )
+            for row in self._stream("lease4_incremental", query, (since + shortest, since)):
+                self._remember(row_to_lease(row), changed)
+            self._recount()
+
+        # Step 3: Re-read the subnets whose count or checksum changed
+        stale = [
+            sid for sid in set(counts) | set(self.subnet_counts)
+            if counts.get(sid, (0, 0)) != self.subnet_counts.get(sid, (0, 0))
+        ]
+
+        removed = []
+        for subnet_id in stale:
+            log.debug("Leases changed in subnet %s, re-reading it", subnet_id)
+            seen = set()
+            for row in self._stream("lease4_subnet", f"SELECT {LEASE_COLUMNS} FROM lease4 WHERE subnet_id = %s", (subnet_id,)):
+                lease = row_to_lease(row)
+                seen.add(lease["ip-address"])
+                self._remember(lease, changed)
+            for ip_address, lease in list(self.lease_map.items()):
+                if lease["subnet-id"] == subnet_id and ip_address not in seen:
+                    del self.lease_map[ip_address]
+                    changed.pop(ip_address, None)
+                    removed.append(ip_address)
+        if stale:
+            self._recount()
+
+        return changed, removed
+
+    def poll(self):
+        """
+        Syncs with the lease4 table and returns (changed_leases, removed_ips).
+        The first call performs the full load and reports every lease as changed.
+        """
+        sync_started = self._server_time() - WATERMARK_SKEW
+
+        if self.last_sync is None or self.syncs_since_full >= self.full_resync_every:
+            changed, removed = self._full_sync()
+        else:
+            changed, removed = self._incremental_sync(self.last_sync)
+            self.syncs_since_full += 1
+
+        self.last_sync = sync_started
+        return list(changed.values()), removed
+
+    def leases(self):
+        """Returns the current lease list after picking up any pending changes."""
+        self.poll()
+        return list(self.lease_map.values())
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+_reader = None
+
+def get_reader():
+    """Returns the shared lease4 table reader, creating it on first use."""
+    global _reader
+    if _reader is None:
+        _reader = MySQLLeaseReader()
+    return _reader
@@ -0,0 +1,228 @@
+import os
+import shlex
+import paramiko  # type: ignore
+import metrics
+from config_loader import SERVERS, MEMFILE_CONFIG, MULTI_SERVER, get_logger
+
+log = get_logger(__name__)
+
+# Column layout written by Kea's memfile backend (kea-leases4.csv). The header
+# line in the file always wins, this is only used until one has been read.
+DEFAULT_COLUMNS = [
+    "address", "hwaddr", "client_id", "valid_lifetime", "expire", "subnet_id",
+    "fqdn_fwd", "fqdn_rev", "hostname", "state", "user_context", "pool_id"
+]
+
+
+def parse_lease_line(line, columns):
+    """
+    Converts one CSV row from kea-leases4.csv into a lease dict shaped like the
+    `lease4-get-all` output. Returns None for malformed rows.
+    """
+    fields = line.rstrip("\r\n").split(",")
+    if len(fields) < 6:
+        return None
+
+    row = dict(zip(columns, fields))
+    try:
+        valid_lft = int(row.get("valid_lifetime", 0) or 0)
+        expire = int(row.get("expire", 0) or 0)
+        subnet_id = int(row.get("subnet_id", 0) or 0)
+        state = int(row.get("state", 0) or 0)
+    except ValueError:
+        return None
+
+    # Kea escapes commas inside text columns
+    hostname = row.get("hostname", "").replace("&#x2c", ",")
+
+    return {
+        "ip-address": row.get("address", ""),
+        "hw-address": row.get("hwaddr", "").upper(),
+        "hostname": hostname,
+        "subnet-id": subnet_id,
+        "cltt": expire - valid_lft,
+        "valid-lft": valid_lft,
+        "state": state
+    }
+
+
+class MemfileLeaseFeed:
+    """
+    Tails kea-leases4.csv (locally or over SSH) and keeps a rolling lease map.
+
+    Kea's memfile backend only ever appends to the lease file: every new lease,
+    renewal or release is written as a new row, and a row with a valid lifetime
+    of 0 marks a deleted lease. Reading just the bytes appended since the last
+    poll is enough to keep the map current, so steady-state traffic follows
+    lease churn rather than lease count.
+    """
+
+    def __init__(self, path=None, via_ssh=None):
+        self.path = path or MEMFILE_CONFIG.get("path", "/var/lib/kea/kea-leases4.csv")
+        self.via_ssh = MEMFILE_CONFIG.get("via_ssh", True) if via_ssh is None else via_ssh
+
+        self.lease_map = {}
+        self.columns = list(DEFAULT_COLUMNS)
+        self.offset = 0
+        self.inode = None
+        self.loaded = False
+        self.ssh_client = None
+
+    # ---- Transport -------------------------------------------------------
+
+    def _ssh(self):
+        """Returns an open SSH connection to the Kea server, reconnecting if needed."""
+        transport = self.ssh_client.get_transport() if self.ssh_client else None
+        if transport is None or not transport.is_active():
+            server = SERVERS[0]  # The feed follows the default server
+            log.debug("Opening SSH lease feed to %s:%s", server["address"], self.path)
+            self.ssh_client = paramiko.SSHClient()
+            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            self.ssh_client.connect(
+                server["address"],
+                username=server["ssh_user"],
+                password=server["ssh_password"],
+                timeout=self._timeout(),
+                banner_timeout=self._timeout(),
+                auth_timeout=self._timeout()
+            )
+        return self.ssh_client
+
+    @staticmethod
+    def _timeout():
+        # Same per-server timeout as the Kea API requests
+        return float(SERVERS[0].get("timeout_s", MULTI_SERVER.get("timeout_s", 30)))
+
+    def _run(self, command):
+        with metrics.timed("ssh", command.split()[0]) as span:
+            stdin, stdout, stderr = self._ssh().exec_command(command, timeout=self._timeout())
+            output = stdout.read()
+            span.bytes = len(output)
+        return output
+
+    def _stat(self, path):
+        """Returns (inode, size) for a lease file, or (None, 0) if it does not exist."""
+        if not self.via_ssh:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None, 0
+            return st.st_ino, st.st_size
+
+        output = self._run(f"stat -c '%i %s' {shlex.quote(path)} 2>/dev/null").decode().split()
+        if len(output) != 2:
+            return None, 0
+        return int(output[0]), int(output[1])
+
+    def _read_from(self, path, offset):
+        """Reads everything in `path` from byte `offset` to the current end of file."""
+        if not self.via_ssh:
+            try:
+                with metrics.timed("file", "read_lease_file") as span, open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+                    span.bytes = len(data)
+                    return data
+            except OSError:
+                return b""
+
+        return self._run(f"tail -c +{offset + 1} {shlex.quote(path)} 2>/dev/null")
+
+    # ---- Parsing ---------------------------------------------------------
+
+    def _apply_chunk(self, data, changed, removed):
+        """
+        Applies complete lines from `data` to the lease map and returns the
+        number of bytes consumed. A trailing partial line is left for the next poll.
+        """
+        end = data.rfind(b"\n")
+        if end < 0:
+            return 0
+
+        for raw in data[:end].split(b"\n"):
+            line = raw.decode("utf-8", errors="replace")
+            if not line:
+                continue
+            if line.startswith("address,"):
+                self.columns = line.rstrip("\r").split(",")
+                continue
+
+            lease = parse_lease_line(line, self.columns)
+            if lease is None:
+                continue
+
+            ip_address = lease["ip-address"]
+            if lease["valid-lft"] == 0:
+                if self.lease_map.pop(ip_address, None) is not None:
+                    changed.pop(ip_address, None)
+                    removed.add(ip_address)
+            else:
+                self.lease_map[ip_address] = lease
+                changed[ip_address] = lease
+                removed.discard(ip_address)
+
+        return end + 1
+
+    def _load_all(self):
+        """Full initial load: previous LFC generations first, then the live file."""
+        changed, removed = {}, set()
+        for suffix in (".1", ".2"):
+            self.columns = list(DEFAULT_COLUMNS)
+            self._apply_chunk(self._read_from(self.path + suffix, 0), changed, removed)
+
+        self.columns = list(DEFAULT_COLUMNS)
+        self.inode, _ = self._stat(self.path)
+        self.offset = self._apply_chunk(self._read_from(self.path, 0), changed, removed)
+        self.loaded = True
+        log.debug("Memfile feed loaded %s leases (offset %s)", len(self.lease_map), self.offset)
+
+    # ---- Public API ------------------------------------------------------
+
+    def poll(self):
+        """
+        Reads newly appended rows and returns (changed_leases, removed_ips).
+        The first call performs the full load and reports every lease as changed.
+        """
+        if not self.loaded:
+            self._load_all()
+            return list(self.lease_map.values()), []
+
+        changed, removed = {}, set()
+        inode, size = self._stat(self.path)
+
+        # LFC moves the live file aside to <path>.2 and Kea starts a fresh one.
+        # Finish reading the moved file, then start over at byte 0.
+        if inode is not None and (inode != self.inode or size < self.offset):
+            log.debug("Lease file rotated (inode %s -> %s), restarting at offset 0", self.inode, inode)
+            rotated_inode, rotated_size = self._stat(self.path + ".2")
+            if rotated_inode == self.inode and rotated_size > self.offset:
+                self._apply_chunk(self._read_from(self.path + ".2", self.offset), changed, removed)
+            self.inode = inode
+            self.offset = 0
+            self.columns = list(DEFAULT_COLUMNS)
+
+        if size > self.offset:
+            data = self._read_from(self.path, self.offset)
+            self.offset += self._apply_chunk(data, changed, removed)
+
+        return list(changed.values()), sorted(removed)
+
+    def leases(self):
+        """Returns the current lease list after picking up any pending changes."""
+        self.poll()
+        return list(self.lease_map.values())
+
+    def close(self):
+        if self.ssh_client:
+            self.ssh_client.close()
+            self.ssh_client = None
+
+
+_feed = None
+
+def get_feed():
+    """Returns the shared memfile lease feed, creating it on first use."""
+    global _feed
+    if _feed is None:
+        _feed = MemfileLeaseFeed()
+    return _feed
@@ -0,0 +1,376 @@
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+import metrics
+from config_loader import LEASE_HISTORY, DUMMY_DATA, get_logger
+from lease_store import NO_MAC, ip_to_int, int_to_ip, pack_mac, unpack_mac
+
+log = get_logger(__name__)
+
+# One change of one address: kind is "added", "changed" or "removed" (mac/hostname are then the last ones seen),
+# or "in use" for what the address had when the retained history starts
+Event = namedtuple("Event", "ts ip_address hw_address hostname subnet_id kind")
+
+KINDS = {"a": "added", "c": "changed", "r": "removed"}
+INITIAL = "in use"
+
+# Times are stored as integer milliseconds, so two reads within one second stay in order
+MS = 1000
+
+# Later than any recorded time
+END_OF_TIME = 1 << 62
+
+COUNT = struct.Struct("!I")
+
+
+class LeaseState:
+    """
+    Who holds which address at one moment: sorted uint32 addresses with the
+    packed MAC, hostname and subnet of each, the same columns a LeaseStore uses.
+    """
+
+    __slots__ = ("ips", "macs", "hostnames", "subnet_ids")
+
+    def __init__(self, ips=None, macs=b"", hostnames=(), subnet_ids=None):
+        self.ips = ips if ips is not None else array("I")
+        self.macs = macs
+        self.hostnames = list(hostnames)
+        self.subnet_ids = subnet_ids if subnet_ids is not None else array("I")
+
+    @classmethod
+    def from_store(cls, store):
+        """Copies the columns of a LeaseStore; cheap enough to do on the thread that read it."""
+        table = list(store.hostnames)
+        return cls(array("I", store.ips), bytes(store.macs), [table[h] for h in store.host_ids], array("I", store.subnet_ids))
+
+    def __len__(self):
+        return len(self.ips)
+
+    def same_as(self, other):
+        return (
+            self.ips == other.ips and self.macs == other.macs
+            and self.subnet_ids == other.subnet_ids and self.hostnames == other.hostnames
+        )
+
+    def entry(self, i):
+        return self.ips[i], self.macs[i * 6:i * 6 + 6], self.hostnames[i], self.subnet_ids[i]
+
+    def to_bytes(self):
+        """Packs the state for a checkpoint: count, address/subnet arrays, MACs, NUL-joined hostnames; compressed."""
+        return zlib.compress(b"".join((
+            COUNT.pack(len(self.ips)), self.ips.tobytes(), self.subnet_ids.tobytes(), self.macs,
+            "\0".join(self.hostnames).encode("utf-8")
+        )))
+
+    @classmethod
+    def from_bytes(cls, blob):
+        data = zlib.decompress(blob)
+        count = COUNT.unpack_from(data)[0]
+        offset = COUNT.size
+        ips, subnet_ids = array("I"), array("I")
+        ips.frombytes(data[offset:offset + count * ips.itemsize])
+        offset += count * ips.itemsize
+        subnet_ids.frombytes(data[offset:offset + count * subnet_ids.itemsize])
+        offset += count * subnet_ids.itemsize
+        macs = data[offset:offset + count * 6]
+        hostnames = data[offset + count * 6:].decode("utf-8").split("\0") if count else []
+        return cls(ips, macs, hostnames, subnet_ids)
+
+    def as_dict(self):
+        """{ip_int: (mac, hostname, subnet_id)}, for replaying events on top of a checkpoint."""
+        return {self.ips[i]: self.entry(i)[1:] for i in range(len(self.ips))}
+
+    @classmethod
+    def from_dict(cls, entries):
+        ips = array("I", sorted(entries))
+        rows = [entries[ip_int] for ip_int in ips]
+        return cls(ips, b"".join(row[0] for row in rows), [row[1] for row in rows], array("I", (row[2] for row in rows)))
+
+
+def diff(old, new):
+    """
+    Returns the events turning `old` into `new` as (ip_int, mac, hostname, subnet_id, kind code)
+    by merging the two sorted address columns; removed entries keep their last MAC and hostname.
+    """
+    if old.same_as(new):
+        return []
+    events = []
+    i = j = 0
+    old_count, new_count = len(old), len(new)
+    while i < old_count or j < new_count:
+        a = old.ips[i] if i < old_count else None
+        b = new.ips[j] if j < new_count else None
+        if b is None or (a is not None and a < b):
+            events.append(old.entry(i) + ("r",))
+            i += 1
+        elif a is None or b < a:
+            events.append(new.entry(j) + ("a",))
+            j += 1
+        else:
+            entry = new.entry(j)
+            if entry != old.entry(i):
+                events.append(entry + ("c",))
+            i += 1
+            j += 1
+    return events
+
+
+class LeaseHistory:
+    """
+    Who held each address over time, per server, without a copy per snapshot.
+
+    The first lease table read of a server is stored as a checkpoint; every
+    later one is diffed against the previous one and only the differences
+    are appended to the `event` table (one row per address added,
+    changed or removed, keyed by its integer IP). Every `checkpoint_events`
+    events or `checkpoint_hours` hours the full state is stored as one
+    compressed blob, so rebuilding the table as of any time reads the nearest
+    checkpoint before it and replays the events after it. Indexes on IP and MAC
+    answer per-address and per-device history directly.
+    """
+
+    def __init__(self, path, retention_days=30, checkpoint_events=20000, checkpoint_hours=24):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            " server TEXT NOT NULL, ts INTEGER NOT NULL, state BLOB NOT NULL, PRIMARY KEY (server, ts)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS event ("
+            " server TEXT NOT NULL, ts INTEGER NOT NULL, ip INTEGER NOT NULL, mac BLOB NOT NULL,"
+            " hostname TEXT NOT NULL, subnet_id INTEGER NOT NULL, kind TEXT NOT NULL,"
+            " PRIMARY KEY (server, ts, ip)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS event_ip ON event (server, ip, ts);"
+            "CREATE INDEX IF NOT EXISTS event_mac ON event (server, mac, ts);"
+        )
+        self.conn.commit()
+        self.retention = retention_days * 86400
+        self.checkpoint_events = checkpoint_events
+        self.checkpoint_seconds = checkpoint_hours * 3600
+        self.states = {}  # server -> last LeaseState recorded
+        self.since_checkpoint = {}  # server -> (events since the last checkpoint, its time)
+
+    # ---- Recording -------------------------------------------------------
+
+    def _last_state(self, server):
+        state = self.states.get(server)
+        if state is None:
+            state = self.states[server] = self._state_at(server, END_OF_TIME)
+        return state
+
+    def record(self, server, ts, state):
+        """Stores the differences between `state` (read at `ts`) and the last recorded state of the server."""
+        ts = int(ts * MS)
+        with self.lock, metrics.timed("history", "record_leases") as span:
+            previous = self._last_state(server)
+            self.states[server] = state
+            if previous is None:
+                self._checkpoint(server, ts, state)
+                self.since_checkpoint[server] = (0, ts)
+                self.conn.commit()
+                return 0
+            events = diff(previous, state)
+            if not events:
+                return 0
+            span.rows = len(events)
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO event (server, ts, ip, mac, hostname, subnet_id, kind) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((server, ts) + event for event in events)
+            )
+            count, checkpoint_ts = self.since_checkpoint.get(server) or self._checkpoint_age(server)
+            count += len(events)
+            if count >= self.checkpoint_events or ts - checkpoint_ts >= self.checkpoint_seconds * MS:
+                self._checkpoint(server, ts, state)
+                count, checkpoint_ts = 0, ts
+            self.since_checkpoint[server] = (count, checkpoint_ts)
+            self.conn.commit()
+            return len(events)
+
+    def _checkpoint_age(self, server):
+        row = self.conn.execute("SELECT MAX(ts) FROM checkpoint WHERE server = ?", (server,)).fetchone()
+        count = self.conn.execute("SELECT COUNT(*) FROM event WHERE server = ? AND ts > ?", (server, row[0])).fetchone()[0]
+        return count, row[0]
+
+    def _checkpoint(self, server, ts, state):
+        blob = state.to_bytes()
+        self.conn.execute("INSERT OR REPLACE INTO checkpoint (server, ts, state) VALUES (?, ?, ?)", (server, ts, blob))
+        log.debug("Lease history checkpoint for %s: %d leases in %d bytes", server, len(state), len(blob))
+
+        # Past the retention only the newest checkpoint before the cutoff is needed, as the base for what follows it
+        base = self.conn.execute(
+            "SELECT MAX(ts) FROM checkpoint WHERE server = ? AND ts <= ?", (server, ts - self.retention * MS)
+        ).fetchone()[0]
+        if base is not None:
+            self.conn.execute("DELETE FROM checkpoint WHERE server = ? AND ts < ?", (server, base))
+            self.conn.execute("DELETE FROM event WHERE server = ? AND ts <= ?", (server, base))
+
+    # ---- Queries ---------------------------------------------------------
+
+    def _state_at(self, server, ts):
+        """Rebuilds the state as of `ts` from the nearest checkpoint at or before it; None before the first one."""
+        row = self.conn.execute(
+            "SELECT ts, state FROM checkpoint WHERE server = ? AND ts <= ? ORDER BY ts DESC LIMIT 1", (server, ts)
+        ).fetchone()
+        if row is None:
+            return None
+        checkpoint_ts, blob = row
+        state = LeaseState.from_bytes(blob)
+        events = self.conn.execute(
+            "SELECT ip, mac, hostname, subnet_id, kind FROM event WHERE server = ? AND ts > ? AND ts <= ? ORDER BY ts",
+            (server, checkpoint_ts, ts)
+        ).fetchall()
+        if not events:
+            return state
+        entries = state.as_dict()
+        for ip_int, mac, hostname, subnet_id, kind in events:
+            if kind == "r":
+                entries.pop(ip_int, None)
+            else:
+                entries[ip_int] = (bytes(mac), hostname, subnet_id)
+        return LeaseState.from_dict(entries)
+
+    def leases_at(self, server, ts):
+        """
+        Returns the leases of a server as of `ts` as lease dicts (address, MAC,
+        hostname, subnet), or None if nothing was recorded that early.
+        """
+        with self.lock, metrics.timed("history", "leases_at") as span:
+            state = self._state_at(server, int(ts * MS))
+            if state is None:
+                return None
+            span.rows = len(state)
+            return [
+                {"ip-address": int_to_ip(ip_int), "hw-address": unpack_mac(mac), "hostname": hostname, "subnet-id": subnet_id}
+                for ip_int, mac, hostname, subnet_id in map(state.entry, range(len(state)))
+            ]
+
+    def _history(self, server, query, key, matches):
+        """Entries of the oldest checkpoint for which `matches(state)` yields indexes, then the matching events."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT ts, state FROM checkpoint WHERE server = ? ORDER BY ts LIMIT 1", (server,)
+            ).fetchone()
+            rows = self.conn.execute(query, (server, key)).fetchall()
+        history = []
+        if row is not None:
+            state = LeaseState.from_bytes(row[1])
+            for i in matches(state):
+                ip_int, mac, hostname, subnet_id = state.entry(i)
+                history.append(Event(row[0] / MS, int_to_ip(ip_int), unpack_mac(mac), hostname, subnet_id, INITIAL))
+        history.extend(
+            Event(ts / MS, int_to_ip(ip_int), unpack_mac(bytes(mac)), hostname, subnet_id, KINDS[kind])
+            for ts, ip_int, mac, hostname, subnet_id, kind in rows
+        )
+        return history
+
+    def address_history(self, server, ip_address):
+        """Who held one address when the retained history starts, and every change since, oldest first."""
+        ip_int = ip_to_int(ip_address)
+
+        def matches(state):
+            i = bisect_left(state.ips, ip_int)
+            return [i] if i < len(state.ips) and state.ips[i] == ip_int else []
+
+        return self._history(
+            server, "SELECT ts, ip, mac, hostname, subnet_id, kind FROM event WHERE server = ? AND ip = ? ORDER BY ts",
+            ip_int, matches
+        )
+
+    def device_history(self, server, hw_address):
+        """The addresses one MAC held when the retained history starts, and every change of them since, oldest first."""
+        mac = pack_mac(hw_address)
+        if mac == NO_MAC:
+            return []
+
+        def matches(state):
+            found = []
+            position = state.macs.find(mac)
+            while position != -1:
+                if position % 6 == 0:
+                    found.append(position // 6)
+                position = state.macs.find(mac, position + 1)
+            return found
+
+        return self._history(
+            server, "SELECT ts, ip, mac, hostname, subnet_id, kind FROM event WHERE server = ? AND mac = ? ORDER BY ts",
+            mac, matches
+        )
+
+    def first_recorded(self, server):
+        """Time of the oldest checkpoint of a server (the earliest time that can be shown), or None."""
+        with self.lock:
+            ts = self.conn.execute("SELECT MIN(ts) FROM checkpoint WHERE server = ?", (server,)).fetchone()[0]
+        return ts / MS if ts is not None else None
+
+
+class LeaseHistoryRecorder(threading.Thread):
+    """
+    Diffs and stores lease snapshots off the thread that read them. When reads
+    arrive faster than they are stored, only the newest snapshot of each server
+    is kept.
+    """
+
+    def __init__(self, history):
+        super().__init__(name="lease-history", daemon=True)
+        self.history = history
+        self.pending = {}
+        self.ready = threading.Condition()
+
+    def submit(self, server, ts, state):
+        with self.ready:
+            self.pending[server] = (ts, state)
+            self.ready.notify()
+
+    def run(self):
+        while True:
+            with self.ready:
+                while not self.pending:
+                    self.ready.wait()
+                server, (ts, state) = self.pending.popitem()
+            try:
+                self.history.record(server, ts, state)
+            except Exception:  # Keep recording after an unexpected error
+                log.exception("Recording lease history of %s failed", server)
+
+
+_history = None
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_history():
+    """Returns the shared lease history, or None when it is disabled or cannot be opened."""
+    global _history
+    if _history is None and LEASE_HISTORY.get("enabled", True):
+        # Dummy data is made up on every launch; keep its history out of the file
+        path = ":memory:" if DUMMY_DATA else os.path.expanduser(LEASE_HISTORY.get("path", "kea_manager_leases.sqlite"))
+        try:
+            _history = LeaseHistory(
+                path,
+                retention_days=float(LEASE_HISTORY.get("retention_days", 30)),
+                checkpoint_events=int(LEASE_HISTORY.get("checkpoint_events", 20000)),
+                checkpoint_hours=float(LEASE_HISTORY.get("checkpoint_hours", 24))
+            )
+        except sqlite3.Error as e:
+            log.error("Cannot open lease history %s: %s", path, e)
+            LEASE_HISTORY["enabled"] = False
+    return _history
+
+
+def observe(server, store):
+    """Queues a freshly read LeaseStore of `server` (a name) for recording; a no-op when the history is disabled."""
+    global _recorder
+    history = get_history()
+    if history is None:
+        return
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = LeaseHistoryRecorder(history)
+            _recorder.start()
+    _recorder.submit(server, time.time(), LeaseState.from_store(store))
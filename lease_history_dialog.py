@@ -0,0 +1,83 @@
+from PyQt6.QtWidgets import (  # type: ignore
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt  # type: ignore
+import datetime
+import lease_history
+import oui_lookup
+
+
+class LeaseHistoryDialog(QDialog):
+    """
+    Who held one address, or which addresses one device held, over the
+    recorded lease history. Double-click a row (or use "Show Leases Then") to
+    show the whole lease table as of that moment.
+    """
+
+    def __init__(self, server_name, ip_address=None, hw_address=None, travel=None, parent=None):
+        super().__init__(parent)
+        self.travel = travel
+        subject = ip_address if ip_address is not None else hw_address
+        self.setWindowTitle(f"Lease History of {subject} ({server_name})")
+        self.setMinimumSize(900, 400)
+
+        history = lease_history.get_history()
+        if history is None:
+            events = []
+        elif ip_address is not None:
+            events = history.address_history(server_name, ip_address)
+        else:
+            events = history.device_history(server_name, hw_address)
+        self.events = events
+
+        layout = QVBoxLayout(self)
+        first = history.first_recorded(server_name) if history is not None else None
+        if first is None:
+            text = "No lease history recorded for this server yet."
+        else:
+            text = f"{len(events)} entries since {self._format_time(first)}"
+            if hw_address is not None and oui_lookup.available():
+                text += f"  Vendor: {oui_lookup.vendor(hw_address) or 'unknown'}"
+        layout.addWidget(QLabel(text))
+
+        headers = ["Time", "IP Address", "MAC Address", "Hostname", "Subnet ID", "Event"]
+        self.table = QTableWidget(len(events), len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(lambda row, _col: self.show_leases_then(row))
+        for row, event in enumerate(events):
+            values = [
+                self._format_time(event.ts), event.ip_address, event.hw_address.upper(), event.hostname,
+                str(event.subnet_id), event.kind
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.ItemDataRole.UserRole, row)  # Index into self.events, survives sorting
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.travel_button = QPushButton("Show Leases Then")
+        self.travel_button.setEnabled(travel is not None and bool(events))
+        self.travel_button.clicked.connect(lambda: self.show_leases_then(self.table.currentRow()))
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.travel_button)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    @staticmethod
+    def _format_time(ts):
+        return datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+    def show_leases_then(self, row):
+        """Shows the lease table as of the selected entry."""
+        item = self.table.item(row, 0) if row >= 0 else None
+        if item is None or self.travel is None:
+            return
+        self.travel(self.events[item.data(Qt.ItemDataRole.UserRole)].ts)
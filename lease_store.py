@@ -0,0 +1,372 @@
+import json
+import socket
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Kea JSON key -> LeaseRow attribute, so rows can stand in for lease dicts
+LEASE_KEYS = {
+    "ip-address": "ip_address",
+    "hw-address": "hw_address",
+    "hostname": "hostname",
+    "subnet-id": "subnet_id",
+    "cltt": "cltt",
+    "valid-lft": "valid_lft",
+    "state": "state"
+}
+
+NO_MAC = bytes(6)
+
+# Above this many changes in one delta, rebuilding beats inserting row by row
+BULK_THRESHOLD = 1024
+
+
+IP_STRUCT = struct.Struct("!I")
+
+
+def ip_to_int(ip_address):
+    return IP_STRUCT.unpack(socket.inet_aton(ip_address))[0]
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(IP_STRUCT.pack(value))
+
+
+def pack_mac(hw_address):
+    """Packs "AA:BB:CC:DD:EE:FF" (or bare hex) into 6 bytes; empty or unparsable MACs become zeros."""
+    if isinstance(hw_address, (bytes, bytearray)):
+        raw = bytes(hw_address)
+    else:
+        try:
+            raw = bytes.fromhex((hw_address or "").replace(":", " ").replace("-", " "))
+        except ValueError:
+            raw = b""
+    if len(raw) == 6:
+        return raw
+    return raw[:6].ljust(6, b"\x00")
+
+
+def unpack_mac(raw):
+    if raw == NO_MAC:
+        return ""
+    return raw.hex(":")  # Kea's own format: lowercase, colon-separated
+
+
+class LeaseRow:
+    """
+    Read-only view of one lease in a LeaseStore. Supports attribute access and
+    the `lease.get("ip-address")` style used for Kea lease dicts. A row points
+    at a position in the store, so it is only valid until the store next changes.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def ip_int(self):
+        return self.store.ips[self.index]
+
+    @property
+    def ip_address(self):
+        return int_to_ip(self.store.ips[self.index])
+
+    @property
+    def hw_address(self):
+        start = self.index * 6
+        return unpack_mac(bytes(self.store.macs[start:start + 6]))
+
+    @property
+    def hostname(self):
+        return self.store.hostnames[self.store.host_ids[self.index]]
+
+    @property
+    def subnet_id(self):
+        return self.store.subnet_ids[self.index]
+
+    @property
+    def cltt(self):
+        return self.store.cltts[self.index]
+
+    @property
+    def valid_lft(self):
+        return self.store.valid_lfts[self.index]
+
+    @property
+    def state(self):
+        return self.store.states[self.index]
+
+    @property
+    def expire(self):
+        return self.cltt + self.valid_lft
+
+    def get(self, key, default=None):
+        attr = LEASE_KEYS.get(key)
+        return getattr(self, attr) if attr else default
+
+    def __getitem__(self, key):
+        attr = LEASE_KEYS.get(key)
+        if attr is None:
+            raise KeyError(key)
+        return getattr(self, attr)
+
+    def to_dict(self):
+        return {key: getattr(self, attr) for key, attr in LEASE_KEYS.items()}
+
+    def __repr__(self):
+        return f"LeaseRow({self.to_dict()!r})"
+
+
+class LeaseStore:
+    """
+    Column-oriented lease table kept sorted by IP address.
+
+    Addresses are stored as uint32, MACs as 6 packed bytes per lease,
+    subnet id / cltt / valid-lft / state as integer arrays and hostnames as
+    indexes into an interned string table. Compared with one Kea JSON dict per
+    lease this takes a few dozen bytes per lease instead of well over a
+    kilobyte, and counting or grouping by subnet runs over flat arrays.
+    """
+
+    def __init__(self, leases=()):
+        self.replace(leases)
+
+    def _clear(self):
+        self.ips = array("I")
+        self.macs = bytearray()
+        self.subnet_ids = array("I")
+        self.cltts = array("q")
+        self.valid_lfts = array("I")
+        self.states = array("B")
+        self.host_ids = array("I")
+        self.hostnames = [""]
+        self.hostname_ids = {"": 0}
+
+    def _intern(self, hostname):
+        hostname = hostname or ""
+        host_id = self.hostname_ids.get(hostname)
+        if host_id is None:
+            host_id = self.hostname_ids[hostname] = len(self.hostnames)
+            self.hostnames.append(hostname)
+        return host_id
+
+    @staticmethod
+    def _columns(lease):
+        """Converts a lease dict (or LeaseRow) into a tuple of column values, sort key first."""
+        return (
+            ip_to_int(lease["ip-address"]),
+            pack_mac(lease.get("hw-address", "")),
+            lease.get("hostname") or "",
+            int(lease.get("subnet-id", 0) or 0),
+            int(lease.get("cltt", 0) or 0),
+            int(lease.get("valid-lft", 0) or 0),
+            int(lease.get("state", 0) or 0)
+        )
+
+    def replace(self, leases):
+        """
+        Replaces the whole table with `leases` (dicts shaped like lease4-get-all
+        output, or any iterable of them). Leases are packed into the columns as
+        they are read and sorted afterwards, so a streamed source never has to be
+        held as dicts.
+        """
+        self._clear()
+        # Same conversion as _columns()/_append(), inlined: this loop runs once per lease
+        ips, macs, host_ids = self.ips, self.macs, self.host_ids
+        subnet_ids, cltts, valid_lfts, states = self.subnet_ids, self.cltts, self.valid_lfts, self.states
+        intern, inet_aton, unpack = self._intern, socket.inet_aton, IP_STRUCT.unpack
+        for lease in leases:
+            get = lease.get
+            ips.append(unpack(inet_aton(lease["ip-address"]))[0])
+            macs += pack_mac(get("hw-address", ""))
+            host_ids.append(intern(get("hostname")))
+            subnet_ids.append(int(get("subnet-id", 0) or 0))
+            cltts.append(int(get("cltt", 0) or 0))
+            valid_lfts.append(int(get("valid-lft", 0) or 0))
+            states.append(int(get("state", 0) or 0))
+        self._sort()
+
+    def _append(self, columns):
+        ip_int, mac, hostname, subnet_id, cltt, valid_lft, state = columns
+        self.ips.append(ip_int)
+        self.macs += mac
+        self.host_ids.append(self._intern(hostname))
+        self.subnet_ids.append(subnet_id)
+        self.cltts.append(cltt)
+        self.valid_lfts.append(valid_lft)
+        self.states.append(state)
+
+    def _sort(self):
+        """Puts the columns in address order; for duplicate addresses the last one read wins."""
+        ips = self.ips
+        order = sorted(range(len(ips)), key=ips.__getitem__)  # Stable, so duplicates stay in read order
+        order = [i for n, i in enumerate(order) if n + 1 == len(order) or ips[order[n + 1]] != ips[i]]
+        if all(n == i for n, i in enumerate(order)):
+            return
+
+        macs = self.macs
+        self.ips = array("I", (ips[i] for i in order))
+        self.macs = bytearray(b"".join(macs[i * 6:i * 6 + 6] for i in order))
+        for name in ("host_ids", "subnet_ids", "cltts", "valid_lfts", "states"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[i] for i in order)))
+
+    def _row_columns(self, i):
+        start = i * 6
+        return (
+            self.ips[i], bytes(self.macs[start:start + 6]), self.hostnames[self.host_ids[i]],
+            self.subnet_ids[i], self.cltts[i], self.valid_lfts[i], self.states[i]
+        )
+
+    def apply(self, changed, removed):
+        """Applies an incremental delta: `changed` lease dicts are upserted, `removed` IPs dropped."""
+        if len(changed) + len(removed) > max(BULK_THRESHOLD, len(self.ips) // 16):
+            dropped = {ip_to_int(ip_address) for ip_address in removed}
+            kept = [self._row_columns(i) for i in range(len(self.ips)) if self.ips[i] not in dropped]
+            self._clear()
+            for columns in kept:
+                self._append(columns)
+            for lease in changed:
+                self._append(self._columns(lease))  # Sorting keeps the last copy of an address
+            self._sort()
+            return
+
+        for ip_address in removed:
+            i = self._find(ip_to_int(ip_address))
+            if i is not None:
+                self._delete(i)
+        for lease in changed:
+            self._upsert(self._columns(lease))
+
+    def _find(self, ip_int):
+        i = bisect_left(self.ips, ip_int)
+        if i < len(self.ips) and self.ips[i] == ip_int:
+            return i
+        return None
+
+    def _delete(self, i):
+        del self.ips[i]
+        del self.macs[i * 6:i * 6 + 6]
+        del self.host_ids[i]
+        del self.subnet_ids[i]
+        del self.cltts[i]
+        del self.valid_lfts[i]
+        del self.states[i]
+
+    def _upsert(self, columns):
+        ip_int, mac, hostname, subnet_id, cltt, valid_lft, state = columns
+        i = bisect_left(self.ips, ip_int)
+        if i < len(self.ips) and self.ips[i] == ip_int:
+            self.macs[i * 6:i * 6 + 6] = mac
+            self.host_ids[i] = self._intern(hostname)
+            self.subnet_ids[i] = subnet_id
+            self.cltts[i] = cltt
+            self.valid_lfts[i] = valid_lft
+            self.states[i] = state
+            return
+        self.ips.insert(i, ip_int)
+        self.macs[i * 6:i * 6] = mac
+        self.host_ids.insert(i, self._intern(hostname))
+        self.subnet_ids.insert(i, subnet_id)
+        self.cltts.insert(i, cltt)
+        self.valid_lfts.insert(i, valid_lft)
+        self.states.insert(i, state)
+
+    # ---- Reading ---------------------------------------------------------
+
+    def __len__(self):
+        return len(self.ips)
+
+    def __iter__(self):
+        for i in range(len(self.ips)):
+            yield LeaseRow(self, i)
+
+    def get(self, ip_address):
+        """Returns the LeaseRow for an address, or None."""
+        i = self._find(ip_to_int(ip_address))
+        return None if i is None else LeaseRow(self, i)
+
+    def by_subnet(self):
+        """Returns {subnet_id: [LeaseRow, ...]} in address order, in one pass over the table."""
+        groups = {}
+        for i, subnet_id in enumerate(self.subnet_ids):
+            rows = groups.get(subnet_id)
+            if rows is None:
+                rows = groups[subnet_id] = []
+            rows.append(LeaseRow(self, i))
+        return groups
+
+    def rows(self, subnet_id=None):
+        """Returns the rows of one subnet (all rows if subnet_id is None)."""
+        if subnet_id is None:
+            return list(self)
+        try:
+            subnet_id = int(subnet_id)
+        except ValueError:
+            return []
+        return [LeaseRow(self, i) for i, sid in enumerate(self.subnet_ids) if sid == subnet_id]
+
+    def subnet_counts(self):
+        """Returns {subnet_id: lease count}."""
+        return Counter(self.subnet_ids)
+
+    def fingerprint(self):
+        """Change marker covering every column, computed over the raw buffers."""
+        hostnames = tuple(self.hostnames[h] for h in set(self.host_ids))
+        return hash((
+            self.ips.tobytes(), bytes(self.macs), self.subnet_ids.tobytes(), self.cltts.tobytes(),
+            self.valid_lfts.tobytes(), self.states.tobytes(), self.host_ids.tobytes(), hostnames
+        ))
+
+    # ---- Serialization ---------------------------------------------------
+
+    ARRAY_COLUMNS = ("ips", "subnet_ids", "cltts", "valid_lfts", "states", "host_ids")
+    HEADER_SIZE = struct.Struct("!I")
+
+    def to_bytes(self):
+        """
+        Serializes the table as its raw column buffers plus the hostname table,
+        e.g. for the on-disk snapshot cache. Arrays use the machine's native
+        layout, so the bytes are only meant to be read back on the same host.
+        """
+        parts = [getattr(self, name).tobytes() for name in self.ARRAY_COLUMNS] + [bytes(self.macs)]
+        header = json.dumps({"sizes": [len(part) for part in parts], "hostnames": self.hostnames}).encode()
+        return self.HEADER_SIZE.pack(len(header)) + header + b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuilds a store from to_bytes() output without going through lease dicts."""
+        data = memoryview(data)
+        (header_size,) = cls.HEADER_SIZE.unpack(data[:cls.HEADER_SIZE.size])
+        offset = cls.HEADER_SIZE.size + header_size
+        header = json.loads(bytes(data[cls.HEADER_SIZE.size:offset]))
+
+        store = cls()
+        for name, size in zip(cls.ARRAY_COLUMNS + ("macs",), header["sizes"]):
+            chunk = data[offset:offset + size]
+            offset += size
+            if name == "macs":
+                store.macs = bytearray(chunk)
+            else:
+                column = getattr(store, name)
+                column.frombytes(chunk)
+        store.hostnames = header["hostnames"]
+        store.hostname_ids = {hostname: i for i, hostname in enumerate(store.hostnames)}
+        return store
+
+    def copy(self):
+        """Returns an independent copy; cheap, since every column is a flat buffer."""
+        store = LeaseStore()
+        for name in self.ARRAY_COLUMNS:
+            setattr(store, name, getattr(self, name)[:])
+        store.macs = bytearray(self.macs)
+        store.hostnames = list(self.hostnames)
+        store.hostname_ids = dict(self.hostname_ids)
+        return store
+
+    def to_dicts(self):
+        """Expands the store back into lease dicts (for code that needs real dicts)."""
+        return [row.to_dict() for row in self]
@@ -2,11 +2,15 @@ from PyQt6.QtWidgets import QApplication  # type: ignore
 from dhcp_manager import DHCPManager
 import sys
 from config_loader import CONFIG, DEBUG, KEA_SERVER, MYSQL_CONFIG, WINDOW_SIZES, apply_dynamic_window_sizes  # Import global config
+import metrics
+import utilization_history
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     apply_dynamic_window_sizes()
+    metrics.start_http_server()  # No-op unless metrics.http_port is set
+    utilization_history.start_sampler()  # No-op when utilization_history is disabled
     window = DHCPManager()
     
     window.show()
@@ -0,0 +1,206 @@
+import threading
+import time
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config_loader import METRICS_CONFIG, get_logger
+
+log = get_logger(__name__)
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class OperationStats:
+    """Latency histogram plus byte/row/error counters for one (layer, operation)."""
+
+    __slots__ = ("bucket_counts", "count", "total_seconds", "max_seconds", "bytes", "rows", "errors")
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.rows = 0
+        self.errors = 0
+
+    def observe(self, seconds, nbytes, rows, error):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += nbytes
+        self.rows += rows
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Approximate quantile from the histogram (upper bound of the bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bound in enumerate(BUCKETS):
+            seen += self.bucket_counts[i]
+            if seen >= target:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def record(layer, operation, seconds, nbytes=0, rows=0, error=False):
+    """Adds one observation for `operation` in `layer` ("kea", "mysql", "ssh", "qt")."""
+    with _lock:
+        stats = _stats.get((layer, operation))
+        if stats is None:
+            stats = _stats[(layer, operation)] = OperationStats()
+        stats.observe(seconds, nbytes, rows, error)
+
+
+class Span:
+    """Mutable handle yielded by timed() so the caller can attach bytes and rows."""
+
+    __slots__ = ("bytes", "rows", "error")
+
+    def __init__(self):
+        self.bytes = 0
+        self.rows = 0
+        self.error = False
+
+
+@contextmanager
+def timed(layer, operation):
+    """Times the enclosed block; an exception counts as an error and is re-raised."""
+    span = Span()
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.error = True
+        raise
+    finally:
+        record(layer, operation, time.perf_counter() - start, span.bytes, span.rows, span.error)
+
+
+def instrumented(layer, operation=None):
+    """Decorator form of timed(), named after the function by default."""
+    def decorator(func):
+        name = operation or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(layer, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Returns one summary dict per operation, sorted by layer and total time."""
+    with _lock:
+        items = list(_stats.items())
+
+    rows = []
+    for (layer, operation), stats in items:
+        rows.append({
+            "layer": layer,
+            "operation": operation,
+            "count": stats.count,
+            "errors": stats.errors,
+            "total_ms": stats.total_seconds * 1000,
+            "avg_ms": (stats.total_seconds / stats.count * 1000) if stats.count else 0.0,
+            "p95_ms": stats.quantile(0.95) * 1000,
+            "max_ms": stats.max_seconds * 1000,
+            "bytes": stats.bytes,
+            "rows": stats.rows
+        })
+    rows.sort(key=lambda r: (r["layer"], -r["total_ms"]))
+    return rows
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def export_prometheus():
+    """Renders every metric in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted(_stats.items())
+
+    lines = [
+        "# HELP kea_manager_operation_seconds Latency of Kea commands, SQL statements and UI rendering.",
+        "# TYPE kea_manager_operation_seconds histogram"
+    ]
+    for (layer, operation), stats in items:
+        labels = f'layer="{_escape(layer)}",operation="{_escape(operation)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, stats.bucket_counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'kea_manager_operation_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"kea_manager_operation_seconds_sum{{{labels}}} {stats.total_seconds:.6f}")
+        lines.append(f"kea_manager_operation_seconds_count{{{labels}}} {stats.count}")
+
+    for metric, attr, help_text in (
+        ("kea_manager_response_bytes_total", "bytes", "Response payload bytes received."),
+        ("kea_manager_rows_total", "rows", "Rows or leases returned."),
+        ("kea_manager_errors_total", "errors", "Failed operations.")
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for (layer, operation), stats in items:
+            lines.append(f'{metric}{{layer="{_escape(layer)}",operation="{_escape(operation)}"}} {getattr(stats, attr)}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path=None):
+    """Writes the current metrics to a .prom file (e.g. for node_exporter's textfile collector)."""
+    path = path or METRICS_CONFIG.get("export_file", "kea_manager_metrics.prom")
+    with open(path, "w") as f:
+        f.write(export_prometheus())
+    log.debug("Metrics written to %s", path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = export_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+
+_server = None
+
+def start_http_server(port=None, host="127.0.0.1"):
+    """Serves /metrics on a local port from a daemon thread. Returns the server or None."""
+    global _server
+    port = int(port if port is not None else METRICS_CONFIG.get("http_port", 0))
+    if not port or _server is not None:
+        return _server
+
+    _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return _server
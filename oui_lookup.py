@@ -0,0 +1,249 @@
+# MAC address vendor lookup from the IEEE OUI registries.
+#
+#   python oui_lookup.py --fetch                              # download the IEEE CSVs and build oui.bin
+#   python oui_lookup.py --build oui.csv mam.csv oui36.csv    # build from downloaded CSVs
+#   python oui_lookup.py --lookup dc:a6:32:00:00:01
+#
+# The MA-L (24-bit), MA-M (28-bit) and MA-S/IAB (36-bit) prefixes are compiled
+# into one sorted binary table:
+#
+#   b"OUI1", count, name offsets at, names at   (4s I I I, little-endian)
+#   count x key                                 (Q), sorted
+#   count x name offset                         (I), same order
+#   vendor names, UTF-8, NUL-terminated, deduplicated
+#
+# with key = (prefix shifted into the 48-bit MAC space) << 8 | prefix bits.
+# The file is memory-mapped on the first lookup and binary-searched in place,
+# so startup parses nothing and only the pages touched are ever read.
+import argparse
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from functools import lru_cache
+from config_loader import OUI_DATABASE, get_logger
+
+log = get_logger(__name__)
+
+DATABASE_PATH = OUI_DATABASE.get("path", "oui.bin")
+CACHE_SIZE = int(OUI_DATABASE.get("cache_size", 65536))
+
+IEEE_CSV_URLS = (
+    "https://standards-oui.ieee.org/oui/oui.csv",
+    "https://standards-oui.ieee.org/oui28/mam.csv",
+    "https://standards-oui.ieee.org/oui36/oui36.csv",
+    "https://standards-oui.ieee.org/iab/iab.csv"
+)
+
+HEADER = struct.Struct("<4sIII")
+KEY = struct.Struct("<Q")
+NAME_OFFSET = struct.Struct("<I")
+MAGIC = b"OUI1"
+
+# Most specific first: a 36-bit MA-S block sits inside an IEEE-owned MA-L block
+PREFIX_BITS = (36, 28, 24)
+
+# Shown for randomized/private MACs (locally administered bit set), which no registry covers
+LOCAL_VENDOR = "Locally administered"
+
+
+def _key(mac, bits):
+    return ((mac >> (48 - bits)) << (48 - bits)) << 8 | bits
+
+
+class _Keys:
+    """Sequence view of the keys for bisect where memoryview can't read them natively (big-endian hosts)."""
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return KEY.unpack_from(self.data, HEADER.size + index * KEY.size)[0]
+
+
+class OUIDatabase:
+    """Longest-prefix vendor lookup over one memory-mapped oui.bin."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.name_offsets, self.names = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an OUI database")
+        if sys.byteorder == "little":
+            # The key array is 8-byte aligned, so bisect can search it in C without copying it
+            self.keys = memoryview(self.data)[HEADER.size:HEADER.size + count * KEY.size].cast("Q")
+        else:
+            self.keys = _Keys(self.data, count)
+        # 24-bit prefix -> vendor, for the (vast majority of) prefixes with no smaller blocks inside
+        self.by_oui = {}
+
+    def _find(self, key):
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def _name(self, index):
+        offset = self.names + NAME_OFFSET.unpack_from(self.data, self.name_offsets + index * NAME_OFFSET.size)[0]
+        return self.data[offset:self.data.find(b"\0", offset)].decode("utf-8", "replace")
+
+    def lookup(self, mac):
+        """Vendor of a MAC given as a 48-bit integer, or "" if it is not registered."""
+        oui = mac >> 24
+        vendor = self.by_oui.get(oui)
+        if vendor is not None:
+            return vendor
+
+        for bits in PREFIX_BITS:
+            index = self._find(_key(mac, bits))
+            if index is not None:
+                vendor = self._name(index)
+                break
+        else:
+            vendor = ""
+
+        # Cache by OUI only when no 28/36-bit block lies inside it, otherwise the answer depends on more bits
+        first = bisect_left(self.keys, ((oui << 24) << 8) | 25)
+        last = bisect_left(self.keys, (((oui + 1) << 24) << 8))
+        if first == last:
+            self.by_oui[oui] = vendor
+        return vendor
+
+
+_database = None
+_load_failed = False
+
+
+def get_database():
+    """Maps the database on first use; None if it is missing or unreadable."""
+    global _database, _load_failed
+    if _database is None and not _load_failed:
+        try:
+            _database = OUIDatabase(DATABASE_PATH)
+            log.debug("OUI database %s mapped (%d prefixes)", DATABASE_PATH, len(_database.keys))
+        except (OSError, ValueError, struct.error) as e:
+            _load_failed = True
+            log.info("No MAC vendor lookup: %s (build it with `python oui_lookup.py --fetch`)", e)
+    return _database
+
+
+def available():
+    return get_database() is not None
+
+
+def mac_to_int(mac_address):
+    """48-bit integer of a MAC ("aa:bb:cc:dd:ee:ff", "AABBCCDDEEFF", "aa-bb-..." or 6 bytes), None if unparsable."""
+    if isinstance(mac_address, (bytes, bytearray)):
+        return int.from_bytes(mac_address, "big") if len(mac_address) == 6 else None
+    digits = mac_address.replace(":", "").replace("-", "").replace(".", "")
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def vendor(mac_address):
+    """Vendor name for a MAC; "" if unknown, unparsable or no database is installed."""
+    mac = mac_to_int(mac_address)
+    if not mac:
+        return ""
+    if mac >> 40 & 0x02:
+        return LOCAL_VENDOR
+    database = get_database()
+    return database.lookup(mac) if database is not None else ""
+
+
+def read_registry_csv(stream):
+    """Yields (prefix, bits, organization) from one IEEE registry CSV (oui.csv, mam.csv, oui36.csv, iab.csv)."""
+    for row in csv.DictReader(stream):
+        assignment = (row.get("Assignment") or "").strip()
+        name = (row.get("Organization Name") or "").strip()
+        if not assignment or not name:
+            continue
+        try:
+            yield int(assignment, 16), len(assignment) * 4, name
+        except ValueError:
+            continue
+
+
+def build(entries, path=DATABASE_PATH):
+    """Writes (prefix, bits, organization) entries as a sorted table to `path`; returns the record count."""
+    records = {}
+    for prefix, bits, name in entries:
+        if bits in PREFIX_BITS:
+            records[(prefix << (48 - bits)) << 8 | bits] = name
+
+    keys = sorted(records)
+    names = bytearray()
+    name_offsets = {}
+    offsets = []
+    for key in keys:
+        name = records[key]
+        offset = name_offsets.get(name)
+        if offset is None:
+            offset = name_offsets[name] = len(names)
+            names += name.encode("utf-8") + b"\0"
+        offsets.append(offset)
+
+    offsets_at = HEADER.size + len(keys) * KEY.size
+    names_at = offsets_at + len(keys) * NAME_OFFSET.size
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), offsets_at, names_at))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        f.write(struct.pack(f"<{len(keys)}I", *offsets))
+        f.write(names)
+    os.replace(temp_path, path)  # A running application keeps its old mapping
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the MAC vendor database from the IEEE OUI registries.")
+    parser.add_argument("--build", nargs="+", metavar="CSV", help="IEEE registry CSV files (oui.csv, mam.csv, oui36.csv, iab.csv)")
+    parser.add_argument("--fetch", action="store_true", help="Download the IEEE registry CSVs and build the database")
+    parser.add_argument("--output", default=DATABASE_PATH, help=f"Database file to write (default: {DATABASE_PATH})")
+    parser.add_argument("--lookup", nargs="+", metavar="MAC", help="Print the vendor of the given MAC addresses")
+    args = parser.parse_args(argv)
+
+    entries = []
+    if args.fetch:
+        import requests
+        for url in IEEE_CSV_URLS:
+            response = requests.get(url, timeout=60, headers={"User-Agent": "kea-dhcp-manager"})
+            response.raise_for_status()
+            entries.extend(read_registry_csv(io.StringIO(response.content.decode("utf-8", "replace"))))
+            print(f"{url}: {len(entries)} prefixes so far")
+    for path in args.build or ():
+        with open(path, newline="", encoding="utf-8", errors="replace") as f:
+            entries.extend(read_registry_csv(f))
+    if args.fetch or args.build:
+        print(f"Wrote {build(entries, args.output)} prefixes to {args.output}")
+
+    if args.lookup:
+        database = OUIDatabase(args.output)
+        for mac_address in args.lookup:
+            mac = mac_to_int(mac_address)
+            if mac is None:
+                name = "(not a MAC address)"
+            else:
+                name = LOCAL_VENDOR if mac >> 40 & 0x02 else database.lookup(mac) or "(unknown)"
+            print(f"{mac_address}  {name}")
+    if not (args.fetch or args.build or args.lookup):
+        parser.print_help()
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import re
+from array import array
+from config_loader import PACKET_RATES, get_logger
+from utilization_history import SPARK_BARS
+
+log = get_logger(__name__)
+
+# Server-wide Kea counters shown as per-second rates: statistic name -> column label
+SERVER_COUNTERS = {
+    "pkt4-discover-received": "DISCOVER",
+    "pkt4-offer-sent": "OFFER",
+    "pkt4-request-received": "REQUEST",
+    "pkt4-ack-sent": "ACK",
+    "pkt4-nak-sent": "NAK",
+    "pkt4-decline-received": "DECLINE",
+    "v4-allocation-fail": "Alloc. fail",
+    "pkt4-receive-drop": "Dropped"
+}
+# Per-subnet counters shown as rates
+SUBNET_COUNTERS = {
+    "cumulative-assigned-addresses": "Allocations",
+    "v4-allocation-fail": "Alloc. fail"
+}
+# Values shown as they are (gauges, not counters)
+SERVER_GAUGES = {"declined-addresses": "Declined"}
+SUBNET_GAUGES = {"assigned-addresses": "Assigned", "declined-addresses": "Declined"}
+
+SUBNET_STAT = re.compile(r"subnet\[(\d+)\]\.(.+)$")
+
+INTERVAL_MS = int(PACKET_RATES.get("interval_ms", 5000))
+WINDOW_S = float(PACKET_RATES.get("window_s", 60))
+SAMPLES = max(2, int(PACKET_RATES.get("samples", 120)))
+
+
+def parse_stats(stats):
+    """
+    Splits `statistic-get-all` arguments into counters and gauges, each keyed
+    by (subnet_id, name) with subnet_id 0 for server-wide statistics. Only the
+    newest sample of each statistic is used.
+    """
+    counters = {}
+    gauges = {}
+    for name, samples in stats.items():
+        if not samples:
+            continue
+        match = SUBNET_STAT.match(name)
+        subnet_id, stat = (int(match.group(1)), match.group(2)) if match else (0, name)
+        if subnet_id:
+            counter, gauge = stat in SUBNET_COUNTERS, stat in SUBNET_GAUGES
+        else:
+            counter, gauge = stat in SERVER_COUNTERS, stat in SERVER_GAUGES
+        if counter:
+            counters[(subnet_id, stat)] = float(samples[0][0])
+        elif gauge:
+            gauges[(subnet_id, stat)] = samples[0][0]
+    return counters, gauges
+
+
+def sparkline(values):
+    """Draws values as a row of block characters scaled to their maximum."""
+    top = max(values, default=0)
+    if top <= 0:
+        return SPARK_BARS[0] * len(values)
+    return "".join(SPARK_BARS[min(len(SPARK_BARS) - 1, int(v / top * (len(SPARK_BARS) - 1) + 0.5))] for v in values)
+
+
+class RateRing:
+    """
+    Fixed-size ring of counter samples for one server.
+
+    Each sample is one row of `len(names)` doubles in a single flat array, so
+    memory stays the same however long the dashboard is open and rates are
+    plain subtractions between neighbouring rows.
+    """
+
+    def __init__(self, names, size):
+        self.names = names
+        self.columns = {name: i for i, name in enumerate(names)}
+        self.width = len(names)
+        self.size = size
+        self.times = array("d", [0.0]) * size
+        self.values = array("d", [0.0]) * (size * self.width)
+        self.head = 0  # Slot the next sample goes into
+        self.count = 0
+
+    def append(self, ts, values):
+        base = self.head * self.width
+        self.values[base:base + self.width] = array("d", values)
+        self.times[self.head] = ts
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def _slot(self, back):
+        """Slot of the sample `back` steps before the newest one."""
+        return (self.head - 1 - back) % self.size
+
+    def _rate(self, newer, older, column):
+        duration = self.times[newer] - self.times[older]
+        if duration <= 0:
+            return 0.0
+        delta = self.values[newer * self.width + column] - self.values[older * self.width + column]
+        if delta < 0:  # Counter reset (server restart or statistic-reset): it counted up from 0
+            delta = self.values[newer * self.width + column]
+        return delta / duration
+
+    def rates(self, window):
+        """
+        Returns {name: per-second rate} over the newest samples spanning at most
+        `window` seconds (at least the last two), or {} with fewer than two samples.
+        """
+        if self.count < 2:
+            return {}
+        newest = self._slot(0)
+        back = 1
+        while back + 1 < self.count and self.times[newest] - self.times[self._slot(back + 1)] <= window:
+            back += 1
+        elapsed = self.times[newest] - self.times[self._slot(back)]
+        if elapsed <= 0:
+            return {}
+        # Sum the deltas interval by interval so a reset inside the window only loses what it should
+        totals = [0.0] * self.width
+        for step in range(back):
+            newer, older = self._slot(step), self._slot(step + 1)
+            duration = self.times[newer] - self.times[older]
+            for column in range(self.width):
+                totals[column] += self._rate(newer, older, column) * duration
+        return {name: totals[column] / elapsed for name, column in self.columns.items()}
+
+    def series(self, name, count):
+        """Per-interval rates of one column, oldest first, for up to `count` intervals."""
+        column = self.columns.get(name)
+        if column is None:
+            return []
+        steps = min(count, self.count - 1)
+        return [self._rate(self._slot(back), self._slot(back + 1), column) for back in range(steps - 1, -1, -1)]
+
+
+class PacketRateMonitor:
+    """
+    Turns periodic `statistic-get-all` snapshots into packet and allocation
+    rates per server and per subnet. Only counter deltas are kept, in one
+    RateRing per server; the cost per sample depends on the number of subnets,
+    not on the number of leases.
+    """
+
+    def __init__(self, size=SAMPLES):
+        self.size = size
+        self.rings = {}
+        self.gauges = {}
+
+    def record(self, server, ts, stats):
+        counters, gauges = parse_stats(stats)
+        if not counters and not gauges:
+            return
+        names = sorted(counters)
+        ring = self.rings.get(server)
+        if ring is None or ring.names != names:
+            if ring is not None:
+                log.debug("Statistics of %s changed shape; restarting its rate history", server)
+            ring = self.rings[server] = RateRing(names, self.size)
+        ring.append(ts, [counters[name] for name in names])
+        self.gauges[server] = gauges
+
+    def servers(self):
+        return list(self.rings)
+
+    def server_rates(self, server, window=WINDOW_S):
+        """Returns ({statistic: rate/s}, {statistic: value}) for the server-wide statistics."""
+        ring = self.rings.get(server)
+        rates = ring.rates(window) if ring is not None else {}
+        gauges = self.gauges.get(server, {})
+        return (
+            {stat: rate for (subnet_id, stat), rate in rates.items() if not subnet_id},
+            {stat: value for (subnet_id, stat), value in gauges.items() if not subnet_id}
+        )
+
+    def subnet_rates(self, server, window=WINDOW_S):
+        """Returns {subnet_id: ({statistic: rate/s}, {statistic: value})} for every subnet with statistics."""
+        ring = self.rings.get(server)
+        subnets = {}
+        for (subnet_id, stat), rate in (ring.rates(window) if ring is not None else {}).items():
+            if subnet_id:
+                subnets.setdefault(subnet_id, ({}, {}))[0][stat] = rate
+        for (subnet_id, stat), value in self.gauges.get(server, {}).items():
+            if subnet_id:
+                subnets.setdefault(subnet_id, ({}, {}))[1][stat] = value
+        return subnets
+
+    def sparkline(self, server, stat, width=24):
+        ring = self.rings.get(server)
+        return sparkline(ring.series((0, stat), width)) if ring is not None else ""
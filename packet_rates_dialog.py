@@ -0,0 +1,148 @@
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QHeaderView  # type: ignore
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal  # type: ignore
+from PyQt6 import sip  # type: ignore
+import threading
+import time
+import kea_api
+import metrics
+from config_loader import get_logger
+from packet_rates import (
+    PacketRateMonitor, SERVER_COUNTERS, SERVER_GAUGES, SUBNET_COUNTERS, SUBNET_GAUGES, INTERVAL_MS, WINDOW_S
+)
+
+log = get_logger(__name__)
+
+
+def _number_item(value, decimals=2):
+    """Table item that sorts numerically."""
+    item = QTableWidgetItem()
+    item.setData(Qt.ItemDataRole.DisplayRole, round(value, decimals) if decimals else value)
+    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+    return item
+
+
+class PacketRatesDialog(QDialog):
+    """
+    Live DHCP packet and allocation rates per server and per subnet.
+
+    Polls `statistic-get-all` on every server once per interval on a worker
+    thread (one request per server, sized by the number of subnets, not leases)
+    while the window is open, and shows the counter deltas as rates.
+    """
+
+    # Statistics of every server, fetched on a worker thread
+    fetched = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Packet & Allocation Rates")
+        self.setMinimumSize(1000, 700)
+
+        self.monitor = PacketRateMonitor()
+        self.polling = False
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel("Waiting for the first two samples...")
+        layout.addWidget(self.status_label)
+
+        self.server_headers = (
+            ["Server"] + [f"{label}/s" for label in SERVER_COUNTERS.values()]
+            + list(SERVER_GAUGES.values()) + ["ACK/s trend"]
+        )
+        self.server_table = QTableWidget(0, len(self.server_headers))
+        self.server_table.setHorizontalHeaderLabels(self.server_headers)
+        self.server_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.server_table.setMaximumHeight(180)
+        layout.addWidget(self.server_table)
+
+        layout.addWidget(QLabel("Per subnet:"))
+        self.subnet_headers = (
+            ["Server", "Subnet ID"] + [f"{label}/s" for label in SUBNET_COUNTERS.values()] + list(SUBNET_GAUGES.values())
+        )
+        self.subnet_table = QTableWidget(0, len(self.subnet_headers))
+        self.subnet_table.setHorizontalHeaderLabels(self.subnet_headers)
+        self.subnet_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.subnet_table)
+
+        self.fetched.connect(self.apply_sample)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(INTERVAL_MS)
+        self.poll()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
+
+    def showEvent(self, event):
+        if not self.timer.isActive():
+            self.timer.start(INTERVAL_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()  # No polling while nobody is looking
+        super().hideEvent(event)
+
+    def poll(self):
+        """Reads every server's statistics on a worker thread; skipped while the previous read is still running."""
+        if self.polling:
+            return
+        self.polling = True
+
+        def run():
+            with kea_api.quiet_errors():
+                data = kea_api.fan_out(kea_api.get_statistics)
+            if not sip.isdeleted(self):
+                self.fetched.emit(data)
+
+        threading.Thread(target=run, name="packet-rates", daemon=True).start()
+
+    def apply_sample(self, data):
+        self.polling = False
+        now = time.time()
+        for server, stats in data.items():
+            if stats:
+                self.monitor.record(server, now, stats)
+        down = [server for server, stats in data.items() if not stats]
+        self.render(down)
+
+    @metrics.instrumented("qt")
+    def render(self, down=()):
+        servers = self.monitor.servers()
+        text = f"Rates over the last {WINDOW_S:.0f} s, sampled every {INTERVAL_MS / 1000:.0f} s"
+        if down:
+            text += f"  ❌ No statistics from: {', '.join(down)}"
+        self.status_label.setText(text)
+
+        self.server_table.setRowCount(len(servers))
+        subnet_rows = []
+        for row, server in enumerate(servers):
+            rates, gauges = self.monitor.server_rates(server)
+            self.server_table.setItem(row, 0, QTableWidgetItem(server))
+            col = 1
+            for stat in SERVER_COUNTERS:
+                self.server_table.setItem(row, col, _number_item(rates.get(stat, 0.0)))
+                col += 1
+            for stat in SERVER_GAUGES:
+                self.server_table.setItem(row, col, _number_item(gauges.get(stat, 0), 0))
+                col += 1
+            self.server_table.setItem(row, col, QTableWidgetItem(self.monitor.sparkline(server, "pkt4-ack-sent")))
+
+            for subnet_id, (subnet_rates, subnet_gauges) in self.monitor.subnet_rates(server).items():
+                subnet_rows.append((server, subnet_id, subnet_rates, subnet_gauges))
+
+        # Refill the subnet table without re-sorting on every cell
+        self.subnet_table.setSortingEnabled(False)
+        self.subnet_table.setRowCount(len(subnet_rows))
+        for row, (server, subnet_id, subnet_rates, subnet_gauges) in enumerate(subnet_rows):
+            self.subnet_table.setItem(row, 0, QTableWidgetItem(server))
+            self.subnet_table.setItem(row, 1, _number_item(subnet_id, 0))
+            col = 2
+            for stat in SUBNET_COUNTERS:
+                self.subnet_table.setItem(row, col, _number_item(subnet_rates.get(stat, 0.0)))
+                col += 1
+            for stat in SUBNET_GAUGES:
+                self.subnet_table.setItem(row, col, _number_item(subnet_gauges.get(stat, 0), 0))
+                col += 1
+        self.subnet_table.setColumnHidden(0, len(servers) < 2)
+        self.subnet_table.setSortingEnabled(True)
@@ -0,0 +1,237 @@
+import ipaddress
+import re
+import threading
+from bisect import bisect_right
+from config_loader import get_logger
+from lease_store import LeaseStore, ip_to_int, int_to_ip
+
+log = get_logger(__name__)
+
+# Flags of one pool address; an address is free when neither is set
+LEASED = 1
+RESERVED = 2
+
+FREE_RUN = re.compile(rb"\x00+")
+
+
+def parse_pool(pool):
+    """Returns (first, last) address ints for a Kea pool: "10.0.0.10 - 10.0.0.200" or "10.0.0.0/26"."""
+    pool = pool.strip()
+    if "/" in pool:
+        network = ipaddress.IPv4Network(pool, strict=False)
+        return int(network.network_address), int(network.broadcast_address)
+    start, end = pool.split("-")
+    return ip_to_int(start.strip()), ip_to_int(end.strip())
+
+
+class PoolMap:
+    """
+    Occupancy of one pool range: one byte per address holding LEASED/RESERVED
+    flag bits. A byte per address instead of a bit keeps both flags apart (a
+    reservation can be deleted while its lease stays) and lets free-address
+    scans run as bytearray.find() in C; a /16 pool is 64 KiB.
+    """
+
+    __slots__ = ("first", "last", "states", "used")
+
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+        self.states = bytearray(last - first + 1)
+        self.used = 0
+
+    def mark(self, ip_int, flag, on):
+        offset = ip_int - self.first
+        before = self.states[offset]
+        after = before | flag if on else before & ~flag
+        if before != after:
+            self.states[offset] = after
+            self.used += (after != 0) - (before != 0)
+
+    def next_free(self, start=None):
+        """Returns the first free address at or after `start` (the pool start if None), or None."""
+        offset = 0 if start is None else max(0, start - self.first)
+        found = self.states.find(0, offset)
+        return None if found < 0 else self.first + found
+
+    def free_ranges(self):
+        """Yields (first, last) address ints of each run of free addresses."""
+        for run in FREE_RUN.finditer(self.states):
+            yield self.first + run.start(), self.first + run.end() - 1
+
+
+class PoolOccupancy:
+    """
+    Which pool addresses of one server's subnets are leased, reserved or free,
+    for suggesting free IPs.
+
+    The leased and reserved addresses of the server are kept as sets. A
+    subnet's PoolMaps are built the first time it is looked at; after that,
+    sync() only flips the addresses that changed since the previous data, and
+    single edits and lease feed deltas are applied as they happen. A subnet's
+    maps are only rebuilt when its pools change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = {}  # subnet_id -> [(first, last)]
+        self.maps = {}  # subnet_id -> [PoolMap], built on first lookup
+        self.built_starts = []  # Sorted pool starts of the built maps, for locating an address
+        self.built = []
+        self.leased = set()
+        self.reserved = set()
+
+    # ---- Updates ---------------------------------------------------------
+
+    def sync(self, subnets, leases, reservations):
+        """Brings the occupancy up to date with a full read (subnets, LeaseStore, reservations)."""
+        pools = {}
+        for subnet in subnets:
+            try:
+                pools[int(subnet["subnet_id"])] = sorted(parse_pool(pool) for pool in subnet.get("pools", []))
+            except (ValueError, OSError) as e:
+                log.warning("Skipping subnet %s with an unreadable pool: %s", subnet.get("subnet_id"), e)
+
+        if not isinstance(leases, LeaseStore):
+            leases = LeaseStore(leases)
+        leased = set(leases.ips)
+        reserved = set()
+        for res in reservations:
+            try:
+                reserved.add(ip_to_int(res["ip-address"]))
+            except (KeyError, OSError, TypeError):
+                continue
+
+        with self.lock:
+            changed_pools = [subnet_id for subnet_id in self.maps if self.pools.get(subnet_id) != pools.get(subnet_id)]
+            self.pools = pools
+            for subnet_id in changed_pools:
+                del self.maps[subnet_id]
+            if changed_pools:
+                self._index_maps()
+
+            if self.maps:
+                for ip_int in self.leased - leased:
+                    self._mark(ip_int, LEASED, False)
+                for ip_int in leased - self.leased:
+                    self._mark(ip_int, LEASED, True)
+                for ip_int in self.reserved - reserved:
+                    self._mark(ip_int, RESERVED, False)
+                for ip_int in reserved - self.reserved:
+                    self._mark(ip_int, RESERVED, True)
+            self.leased = leased
+            self.reserved = reserved
+
+    def apply_lease_delta(self, changed, removed):
+        """Applies a lease feed delta (changed lease dicts, removed IP strings)."""
+        with self.lock:
+            for ip_address in removed:
+                ip_int = ip_to_int(ip_address)
+                self.leased.discard(ip_int)
+                self._mark(ip_int, LEASED, False)
+            for lease in changed:
+                ip_int = ip_to_int(lease["ip-address"])
+                self.leased.add(ip_int)
+                self._mark(ip_int, LEASED, True)
+
+    def set_reserved(self, ip_address, reserved):
+        """Records a reservation added (True) or deleted (False) by this GUI."""
+        ip_int = ip_to_int(ip_address)
+        with self.lock:
+            if reserved:
+                self.reserved.add(ip_int)
+            else:
+                self.reserved.discard(ip_int)
+            self._mark(ip_int, RESERVED, reserved)
+
+    def _mark(self, ip_int, flag, on):
+        n = bisect_right(self.built_starts, ip_int) - 1
+        if n >= 0 and ip_int <= self.built[n].last:
+            self.built[n].mark(ip_int, flag, on)
+
+    def _index_maps(self):
+        self.built = sorted((pool_map for maps in self.maps.values() for pool_map in maps), key=lambda m: m.first)
+        self.built_starts = [pool_map.first for pool_map in self.built]
+
+    def _subnet_maps(self, subnet_id):
+        """Returns the PoolMaps of a subnet, building them from the current sets on first use."""
+        subnet_id = int(subnet_id)
+        maps = self.maps.get(subnet_id)
+        if maps is None:
+            maps = []
+            for first, last in self.pools.get(subnet_id, []):
+                pool_map = PoolMap(first, last)
+                for ip_int in self.leased:
+                    if first <= ip_int <= last:
+                        pool_map.mark(ip_int, LEASED, True)
+                for ip_int in self.reserved:
+                    if first <= ip_int <= last:
+                        pool_map.mark(ip_int, RESERVED, True)
+                maps.append(pool_map)
+            self.maps[subnet_id] = maps
+            self._index_maps()
+        return maps
+
+    # ---- Lookups ---------------------------------------------------------
+
+    def knows(self, subnet_id):
+        return int(subnet_id) in self.pools
+
+    def next_free(self, subnet_id, after=None):
+        """
+        Returns the first free pool address of a subnet after `after` (an IP
+        string; from the start if None), wrapping around once, or None if the
+        pools are full.
+        """
+        start = None if after is None else ip_to_int(after) + 1
+        with self.lock:
+            maps = self._subnet_maps(subnet_id)
+            for pool_map in maps:
+                if start is None or start <= pool_map.last:
+                    ip_int = pool_map.next_free(start)
+                    if ip_int is not None:
+                        return int_to_ip(ip_int)
+            if start is not None:
+                for pool_map in maps:
+                    ip_int = pool_map.next_free()
+                    if ip_int is not None:
+                        return int_to_ip(ip_int)
+        return None
+
+    def free_ranges(self, subnet_id, limit=None):
+        """Returns up to `limit` free ranges of a subnet's pools as (first_ip, last_ip, count)."""
+        ranges = []
+        with self.lock:
+            for pool_map in self._subnet_maps(subnet_id):
+                for first, last in pool_map.free_ranges():
+                    if limit is not None and len(ranges) >= limit:
+                        return ranges
+                    ranges.append((int_to_ip(first), int_to_ip(last), last - first + 1))
+        return ranges
+
+    def usage(self, subnet_id):
+        """Returns (used, total) pool addresses of a subnet."""
+        with self.lock:
+            maps = self._subnet_maps(subnet_id)
+            return sum(m.used for m in maps), sum(len(m.states) for m in maps)
+
+    def free_summary(self, subnet_id, limit=20):
+        """Returns the pool usage of a subnet and its first `limit` free ranges as text for a popup."""
+        used, total = self.usage(subnet_id)
+        ranges = self.free_ranges(subnet_id, limit + 1)
+        lines = [f"{total - used} of {total} pool addresses free"]
+        for first, last, count in ranges[:limit]:
+            lines.append(first if count == 1 else f"{first} - {last} ({count})")
+        if len(ranges) > limit:
+            lines.append("...")
+        return "\n".join(lines)
+
+
+_occupancy = {}
+
+def get_occupancy(server):
+    """Returns the PoolOccupancy of a server name, creating an empty one on first use."""
+    occupancy = _occupancy.get(server)
+    if occupancy is None:
+        occupancy = _occupancy.setdefault(server, PoolOccupancy())
+    return occupancy
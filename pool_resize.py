@@ -0,0 +1,147 @@
+import ipaddress
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from lease_store import LeaseStore, ip_to_int, int_to_ip
+from pool_occupancy import parse_pool
+
+# Pools can be separated by commas, semicolons or line breaks
+POOL_SEPARATOR = re.compile(r"[,;\n]+")
+
+# What a pool change does to one subnet; *_outside are sorted address ints outside the new pools
+PoolImpact = namedtuple(
+    "PoolImpact",
+    "old_size new_size old_used new_used leases_outside reservations_outside stranded_leases stranded_reservations"
+)
+
+
+def format_pool(first, last):
+    return f"{int_to_ip(first)}-{int_to_ip(last)}"
+
+
+def parse_pools(text, subnet):
+    """
+    Parses pool ranges ("10.0.1.20 - 10.0.3.250" or "10.0.2.0/25", several
+    separated by commas or lines) for a subnet such as "10.0.0.0/16".
+    Returns sorted (first, last) address ints; raises ValueError with a
+    message for the user if a range is malformed, outside the subnet or
+    overlaps another one.
+    """
+    network = ipaddress.IPv4Network(subnet, strict=False)
+    low, high = int(network.network_address), int(network.broadcast_address)
+    pools = []
+    for part in POOL_SEPARATOR.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            first, last = parse_pool(part)
+        except (ValueError, OSError) as e:
+            raise ValueError(f"{part!r} is not a pool (use 10.0.1.20 - 10.0.3.250 or 10.0.2.0/25)") from e
+        if first > last:
+            raise ValueError(f"{part}: the first address is after the last one")
+        if first < low or last > high:
+            raise ValueError(f"{part} is not inside {network}")
+        pools.append((first, last))
+    if not pools:
+        raise ValueError("Enter at least one pool")
+
+    pools.sort()
+    for (first, last), (next_first, next_last) in zip(pools, pools[1:]):
+        if next_first <= last:
+            raise ValueError(f"{format_pool(first, last)} and {format_pool(next_first, next_last)} overlap")
+    return pools
+
+
+def current_pools(subnet):
+    """The pools of a subnet dict as sorted (first, last) ints, overlapping ones merged and unreadable ones skipped."""
+    pools = []
+    for pool in subnet.get("pools", []):
+        try:
+            pools.append(parse_pool(pool))
+        except (ValueError, OSError):
+            continue
+    merged = []
+    for first, last in sorted(pools):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(last, merged[-1][1]))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _count(addresses, pools):
+    """Number of sorted address ints inside the sorted, non-overlapping pools."""
+    return sum(bisect_right(addresses, last) - bisect_left(addresses, first) for first, last in pools)
+
+
+def _outside(addresses, pools):
+    """Sorted address ints outside the sorted, non-overlapping pools, sliced out between them."""
+    outside = array("I")
+    start = 0
+    for first, last in pools:
+        outside.extend(addresses[start:bisect_left(addresses, first)])
+        start = bisect_right(addresses, last)
+    outside.extend(addresses[start:])
+    return outside
+
+
+class AddressIndex:
+    """
+    The leased and reserved addresses of one subnet as sorted uint32 arrays,
+    so what lies inside or outside any set of pool ranges is a couple of
+    binary searches per range. Built once per preview; every edit of the
+    proposed pools is then answered without touching the leases again,
+    however large the subnet.
+    """
+
+    def __init__(self, subnet, leases, reservations):
+        network = ipaddress.IPv4Network(subnet, strict=False)
+        self.subnet = str(network)
+        low, high = int(network.network_address), int(network.broadcast_address)
+
+        # A copy: the live store keeps changing under the lease feed while the index is in use
+        self.leases = leases.copy() if isinstance(leases, LeaseStore) else LeaseStore(leases)
+        ips = self.leases.ips
+        self.leased = ips[bisect_left(ips, low):bisect_right(ips, high)]
+
+        self.reservations = {}  # ip_int -> reservation
+        for res in reservations:
+            try:
+                ip_int = ip_to_int(res["ip-address"])
+            except (KeyError, OSError, TypeError):
+                continue
+            if low <= ip_int <= high:
+                self.reservations[ip_int] = res
+        self.reserved = array("I", sorted(self.reservations))
+        # Leased or reserved, each address once
+        self.used = array("I", sorted(set(self.leased).union(self.reservations)))
+
+    def impact(self, old_pools, new_pools):
+        """Compares two sets of (first, last) pools; both sorted and non-overlapping."""
+        leases_outside = _outside(self.leased, new_pools)
+        reservations_outside = _outside(self.reserved, new_pools)
+        return PoolImpact(
+            old_size=sum(last - first + 1 for first, last in old_pools),
+            new_size=sum(last - first + 1 for first, last in new_pools),
+            old_used=_count(self.used, old_pools),
+            new_used=_count(self.used, new_pools),
+            leases_outside=leases_outside,
+            reservations_outside=reservations_outside,
+            # Inside the current pools, outside the new ones
+            stranded_leases=_count(leases_outside, old_pools),
+            stranded_reservations=_count(reservations_outside, old_pools)
+        )
+
+    def lease(self, ip_int):
+        return self.leases.get(int_to_ip(ip_int))
+
+    def reservation(self, ip_int):
+        return self.reservations.get(ip_int)
+
+
+def in_pools(ip_int, pools):
+    """True if an address int lies in one of the sorted (first, last) pools."""
+    n = bisect_right(pools, (ip_int, 0xFFFFFFFF)) - 1
+    return n >= 0 and ip_int <= pools[n][1]
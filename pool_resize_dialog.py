@@ -0,0 +1,134 @@
+from PyQt6.QtWidgets import (  # type: ignore
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QMessageBox
+)
+import metrics
+from lease_store import int_to_ip
+from pool_resize import AddressIndex, current_pools, format_pool, in_pools, parse_pools
+
+# Most affected addresses listed in the preview
+LIST_LIMIT = 1000
+
+
+class PoolResizeDialog(QDialog):
+    """
+    Edits the pools of one subnet with a live preview of the impact: pool
+    size and free addresses before and after, and every lease and reservation
+    that would end up outside the new pools. Any number of ranges and CIDR
+    blocks can be entered, one per line or separated by commas.
+    """
+
+    def __init__(self, subnet, leases, reservations, parent=None):
+        super().__init__(parent)
+        self.subnet = subnet
+        self.setWindowTitle(f"Change Pool Range - {subnet['subnet']} (ID: {subnet['subnet_id']})")
+        self.setMinimumSize(800, 550)
+        self.index = AddressIndex(subnet["subnet"], leases, reservations)
+        self.old_pools = current_pools(subnet)
+        self.new_pools = None
+        self.pools = None  # Kea pool strings; set when the dialog is accepted
+
+        layout = QVBoxLayout(self)
+        current = ", ".join(subnet.get("pools", [])) or "none"
+        layout.addWidget(QLabel(f"Current pools: {current}\nNew pools, one per line (10.0.1.20 - 10.0.3.250 or 10.0.2.0/25):"))
+
+        self.pool_input = QPlainTextEdit("\n".join(subnet.get("pools", [])))
+        self.pool_input.setMaximumHeight(100)
+        self.pool_input.textChanged.connect(self.preview)
+        layout.addWidget(self.pool_input)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        headers = ["IP Address", "Type", "MAC Address", "Hostname", "In Current Pools"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.clicked.connect(self.apply)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.apply_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+        self.preview()
+
+    @metrics.instrumented("qt")
+    def preview(self):
+        """Recomputes the impact of the pools typed so far."""
+        try:
+            self.new_pools = parse_pools(self.pool_input.toPlainText(), self.subnet["subnet"])
+        except ValueError as e:
+            self.new_pools = None
+            self.summary_label.setText(f"❌ {e}")
+            self.table.setRowCount(0)
+            self.apply_button.setEnabled(False)
+            return
+
+        impact = self.index.impact(self.old_pools, self.new_pools)
+        lines = [
+            f"Pool size: {impact.old_size} → {impact.new_size} addresses. "
+            f"Free: {impact.old_size - impact.old_used} → {impact.new_size - impact.new_used} "
+            f"(leased or reserved in the pools: {impact.old_used} → {impact.new_used})."
+        ]
+        if impact.stranded_leases:
+            lines.append(
+                f"⚠ {impact.stranded_leases} active lease(s) would fall outside the pools; "
+                "those clients get a new address when they renew."
+            )
+        if impact.stranded_reservations:
+            lines.append(
+                f"{impact.stranded_reservations} reservation(s) would move outside the pools; "
+                "Kea still hands them out as out-of-pool reservations."
+            )
+        outside = len(impact.leases_outside) + len(impact.reservations_outside)
+        if outside:
+            lines.append(f"{outside} address(es) outside the new pools are listed below.")
+        self.summary_label.setText("\n".join(lines))
+        self.apply_button.setEnabled(self.new_pools != self.old_pools)
+        self.fill_table(impact)
+
+    def fill_table(self, impact):
+        """Lists the leases and reservations outside the new pools, the ones stranded by this change first."""
+        entries = [(ip_int, "Lease") for ip_int in impact.leases_outside]
+        entries += [(ip_int, "Reservation") for ip_int in impact.reservations_outside]
+        entries.sort(key=lambda entry: (not in_pools(entry[0], self.old_pools), entry[0]))
+        shown = entries[:LIST_LIMIT]
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(shown) + (len(entries) > LIST_LIMIT))
+        for row, (ip_int, kind) in enumerate(shown):
+            if kind == "Lease":
+                record = self.index.lease(ip_int)
+                hw_address, hostname = record.get("hw-address", ""), record.get("hostname", "")
+            else:
+                record = self.index.reservation(ip_int)
+                hw_address, hostname = record.get("dhcp_identifier", ""), record.get("hostname", "")
+            if isinstance(hw_address, bytes):
+                hw_address = hw_address.hex(":")
+            values = [int_to_ip(ip_int), kind, str(hw_address).upper(), hostname or "", "Yes" if in_pools(ip_int, self.old_pools) else "No"]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        if len(entries) > LIST_LIMIT:
+            self.table.setItem(len(shown), 0, QTableWidgetItem(f"... and {len(entries) - LIST_LIMIT} more"))
+
+    def apply(self):
+        if self.new_pools is None:
+            return
+        impact = self.index.impact(self.old_pools, self.new_pools)
+        if impact.stranded_leases:
+            answer = QMessageBox.question(
+                self, "Change Pool Range",
+                f"{impact.stranded_leases} active lease(s) are outside the new pools and their clients will get a new "
+                "address when they renew. Change the pools anyway?"
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+        self.pools = [format_pool(first, last) for first, last in self.new_pools]
+        self.accept()
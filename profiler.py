@@ -0,0 +1,177 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from config_loader import PROFILER, get_logger
+import metrics
+
+log = get_logger(__name__)
+
+REPORT_DIR = PROFILER.get("report_dir", "profiles")
+TOP_FUNCTIONS = int(PROFILER.get("top_functions", 30))
+TRACE_MEMORY = bool(PROFILER.get("trace_memory", True))
+# Call stack depth kept per allocation; more frames cost more memory while profiling
+MEMORY_FRAMES = 1
+
+# Metric layers that count as network and database time in the report
+NETWORK_LAYERS = ("kea", "ssh")
+DATABASE_LAYERS = ("mysql",)
+
+# The profiler's own bookkeeping is left out of the allocation report
+_OWN_ALLOCATIONS = [tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)] + [
+    tracemalloc.Filter(False, __file__)
+]
+
+_enabled = False
+_active = False  # An action is being profiled; nested actions are part of its report
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Turns profiler mode on or off; memory tracing only runs while it is on."""
+    global _enabled
+    _enabled = bool(enabled)
+    if TRACE_MEMORY:
+        if _enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+        elif not _enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    log.info("Profiler mode %s", "on, reports go to " + os.path.abspath(REPORT_DIR) if _enabled else "off")
+
+
+def action(func):
+    """
+    Profiles each call of a UI action while profiler mode is on and writes a
+    report for it. When the mode is off the only cost is one flag check.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled or _active or threading.current_thread() is not threading.main_thread():
+            return func(*args, **kwargs)
+        return _profile(name, func, args, kwargs)
+    return wrapper
+
+
+def _layer_times(before, after):
+    """Per-operation time and call count recorded in `metrics` between two snapshots."""
+    old = {(row["layer"], row["operation"]): row for row in before}
+    changes = []
+    for row in after:
+        previous = old.get((row["layer"], row["operation"]), {})
+        calls = row["count"] - previous.get("count", 0)
+        if calls:
+            changes.append({
+                "layer": row["layer"],
+                "operation": row["operation"],
+                "calls": calls,
+                "errors": row["errors"] - previous.get("errors", 0),
+                "ms": row["total_ms"] - previous.get("total_ms", 0.0),
+                "bytes": row["bytes"] - previous.get("bytes", 0),
+                "rows": row["rows"] - previous.get("rows", 0)
+            })
+    changes.sort(key=lambda change: -change["ms"])
+    return changes
+
+
+def _profile(name, func, args, kwargs):
+    global _active
+    _active = True
+    profile = cProfile.Profile()
+    metrics_before = metrics.snapshot()
+    memory_before = None
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memory_before = (tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[0])
+
+    start = time.perf_counter()
+    error = None
+    try:
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        _active = False
+        try:
+            memory = None
+            if memory_before is not None and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                memory = (memory_before[0], tracemalloc.take_snapshot(), current - memory_before[1], peak - memory_before[1])
+            path = write_report(name, wall, profile, _layer_times(metrics_before, metrics.snapshot()), memory, error)
+            log.info("Profile of %s (%.0f ms) written to %s", name, wall * 1000, path)
+        except OSError as e:
+            log.error("Could not write profile of %s: %s", name, e)
+
+
+def write_report(name, wall, profile, operations, memory, error=None):
+    """Writes one action's report as plain text and returns its path."""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+    path = os.path.join(REPORT_DIR, f"{stamp}-{name.replace('.', '-')}.txt")
+
+    network = sum(op["ms"] for op in operations if op["layer"] in NETWORK_LAYERS)
+    database = sum(op["ms"] for op in operations if op["layer"] in DATABASE_LAYERS)
+    wall_ms = wall * 1000
+
+    lines = [
+        f"Action:     {name}",
+        f"Started:    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now - wall))}",
+        f"Wall time:  {wall_ms:.1f} ms" + (f"  (raised {type(error).__name__}: {error})" if error else ""),
+        "",
+        "Time split (network and database calls on worker threads can overlap, so they may add up to more than the wall time):",
+        f"  Network (Kea API, SSH)  {network:10.1f} ms",
+        f"  Database (MySQL)        {database:10.1f} ms",
+        f"  Qt / Python             {max(wall_ms - network - database, 0.0):10.1f} ms",
+        ""
+    ]
+
+    lines.append("Kea, MySQL and rendering calls:")
+    if operations:
+        lines.append(f"  {'Layer':<10}{'Operation':<36}{'Calls':>7}{'Errors':>7}{'ms':>11}{'Bytes':>12}{'Rows':>9}")
+        for op in operations:
+            lines.append(
+                f"  {op['layer']:<10}{op['operation']:<36}{op['calls']:>7}{op['errors']:>7}"
+                f"{op['ms']:>11.1f}{op['bytes']:>12}{op['rows']:>9}"
+            )
+    else:
+        lines.append("  (none)")
+    lines.append("")
+
+    if memory is not None:
+        before, after, delta, peak = memory
+        lines.append(f"Memory: {delta / 1024:+.1f} KiB retained, peak {peak / 1024:+.1f} KiB during the action")
+        lines.append("Largest allocation changes:")
+        for stat in after.filter_traces(_OWN_ALLOCATIONS).compare_to(before.filter_traces(_OWN_ALLOCATIONS), "lineno")[:10]:
+            lines.append(f"  {stat}")
+    else:
+        lines.append("Memory: not traced (profiler.trace_memory is off)")
+    lines.append("")
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+    lines.append(f"Top {TOP_FUNCTIONS} functions by cumulative time (GUI thread):")
+    lines.append(stream.getvalue())
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+if PROFILER.get("enabled", False):
+    set_enabled(True)
@@ -0,0 +1,247 @@
+import ipaddress
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+import metrics
+from config_loader import get_logger
+from lease_store import LeaseStore, NO_MAC, ip_to_int, int_to_ip
+
+log = get_logger(__name__)
+
+SearchHit = namedtuple("SearchHit", "server subnet_id ip_address hw_address hostname reserved")
+
+IP_QUERY = re.compile(r"^\d{1,3}(?:\.\d{1,3}){0,3}\.?(?:/\d{1,2})?$")
+RANGE_QUERY = re.compile(r"^(\d{1,3}(?:\.\d{1,3}){3})\s*-\s*(\d{1,3}(?:\.\d{1,3}){3})$")
+MAC_QUERY = re.compile(r"^[0-9a-f]{1,2}(?:[:\-.][0-9a-f]{1,2})+[:\-.]?$")
+HEX_WORD = re.compile(r"^[0-9a-f]{2,12}$")
+TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+MAC_SEPARATORS = re.compile(r"[:\-.\s]")
+
+# Multi-word hostname queries check candidates one by one below this many
+VERIFY_LIMIT = 2000
+
+
+def _mac_key(value):
+    """Normalizes a MAC (string with any separators, or raw bytes) to lowercase hex without separators."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    return MAC_SEPARATORS.sub("", str(value or "")).lower()
+
+
+def _tokens(hostname):
+    return [token for token in TOKEN_SPLIT.split(hostname.lower()) if token]
+
+
+class SearchIndex:
+    """
+    In-memory index over the leases and reservations of every server, for the
+    global search box.
+
+    Entries live in parallel columns numbered in address order, so an IP,
+    partial IP, CIDR or range query is one bisect pair over the uint32 address
+    column and any other result set sorts by address as plain ints. MACs are
+    normalized to bare hex in a sorted list (MAC/OUI prefixes are a bisect
+    pair) and hostnames are split into tokens on "-", "." and "_" with sorted
+    entry lists (each query word matches token prefixes). The index is rebuilt
+    lazily on the first query after the data changed.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.built = False
+
+    def update(self, data):
+        """Takes {server: (subnets, leases, reservations) or None} as loaded by the tree."""
+        self.data = data
+        self.built = False
+
+    def invalidate(self):
+        self.built = False
+
+    # ---- Building --------------------------------------------------------
+
+    def _build(self):
+        self.servers = []
+        entries = []  # (ip_int, server_id, subnet_id, mac, hostname, reserved)
+
+        with metrics.timed("index", "build") as span:
+            for server, result in self.data.items():
+                if result is None:
+                    continue
+                subnets, leases, reservations = result
+                if not isinstance(leases, LeaseStore):
+                    leases = LeaseStore(leases)
+                self._add_server(entries, server, subnets, leases, reservations)
+
+            entries.sort(key=lambda entry: (entry[0], entry[1]))
+            span.rows = len(entries)
+
+            self.ips = array("I", (entry[0] for entry in entries))
+            self.server_ids = array("H", (entry[1] for entry in entries))
+            self.subnet_ids = array("I", (entry[2] for entry in entries))
+            self.macs = [entry[3] for entry in entries]
+            self.hostnames = [entry[4] for entry in entries]
+            self.reserved = bytearray(entry[5] for entry in entries)
+
+            mac_pairs = sorted((mac, i) for i, mac in enumerate(self.macs) if mac)
+            self.mac_keys = [mac for mac, _ in mac_pairs]
+            self.mac_order = array("I", (i for _, i in mac_pairs))
+
+            postings = {}
+            for i, hostname in enumerate(self.hostnames):
+                for token in _tokens(hostname):
+                    postings.setdefault(token, []).append(i)
+            self.token_keys = sorted(postings)
+            self.token_postings = [array("I", postings[token]) for token in self.token_keys]
+
+        self.built = True
+        log.debug("Search index built: %d entries, %d hostname tokens", len(entries), len(self.token_keys))
+
+    def _add_server(self, entries, server, subnets, leases, reservations):
+        server_id = len(self.servers)
+        self.servers.append(server)
+
+        macs, hostnames, host_ids = leases.macs, leases.hostnames, leases.host_ids
+        for i, ip_int in enumerate(leases.ips):
+            raw = bytes(macs[i * 6:i * 6 + 6])
+            entries.append((ip_int, server_id, leases.subnet_ids[i], "" if raw == NO_MAC else raw.hex(), hostnames[host_ids[i]], 0))
+
+        ranges = []
+        for subnet in subnets:
+            network = ipaddress.IPv4Network(subnet["subnet"], strict=False)
+            ranges.append((int(network.network_address), int(network.broadcast_address), int(subnet["subnet_id"])))
+        ranges.sort()
+        starts = [start for start, _, _ in ranges]
+
+        for res in reservations:
+            try:
+                ip_int = ip_to_int(res["ip-address"])
+            except (KeyError, OSError, TypeError):
+                continue
+            subnet_id = res.get("subnet_id")
+            if subnet_id is None:  # Place it by address
+                n = bisect_right(starts, ip_int) - 1
+                subnet_id = ranges[n][2] if n >= 0 and ip_int <= ranges[n][1] else 0
+            entries.append((ip_int, server_id, int(subnet_id), _mac_key(res.get("dhcp_identifier")), res.get("hostname") or "", 1))
+
+    # ---- Queries ---------------------------------------------------------
+
+    def ip_range(self, low, high):
+        """Entry ids with low <= address <= high, in address order."""
+        return range(bisect_left(self.ips, low), bisect_right(self.ips, high))
+
+    def mac_prefix(self, prefix):
+        """Entry ids whose MAC starts with `prefix` (normalized hex), in MAC order."""
+        i = bisect_left(self.mac_keys, prefix)
+        j = bisect_left(self.mac_keys, prefix + "g")  # "g" sorts after every hex digit
+        return self.mac_order[i:j]
+
+    def hostname_prefix(self, word):
+        """Entry ids with a hostname token starting with `word`: a sorted array for one token, else a set."""
+        i = bisect_left(self.token_keys, word)
+        j = bisect_left(self.token_keys, word + "\uffff")  # past every token starting with word
+        if j - i == 1:
+            return self.token_postings[i]  # Already in address order
+        ids = set()
+        for postings in self.token_postings[i:j]:
+            ids.update(postings)
+        return ids
+
+    def _hostname_query(self, text):
+        words = _tokens(text)
+        if not words:
+            return set()
+        candidates = [self.hostname_prefix(word) for word in words]
+        if len(words) == 1:
+            return candidates[0]
+
+        # With few candidates, checking the other words against their hostnames
+        # is cheaper than intersecting large entry sets
+        rarest = min(range(len(words)), key=lambda n: len(candidates[n]))
+        if len(candidates[rarest]) <= VERIFY_LIMIT:
+            others = words[:rarest] + words[rarest + 1:]
+            return {
+                i for i in candidates[rarest]
+                if all(any(token.startswith(word) for token in _tokens(self.hostnames[i])) for word in others)
+            }
+        matches = set(candidates[rarest])
+        for n, ids in enumerate(candidates):
+            if n != rarest:
+                matches.intersection_update(ids)
+        return matches
+
+    @staticmethod
+    def _parse_ip_query(text):
+        """Returns (low, high) for an IP, partial IP ("10.0.3."), CIDR or "a-b" range, or None."""
+        match = RANGE_QUERY.match(text)
+        if match:
+            try:
+                low, high = ip_to_int(match.group(1)), ip_to_int(match.group(2))
+            except OSError:
+                return None
+            return min(low, high), max(low, high)
+
+        if not IP_QUERY.match(text) or ("." not in text and "/" not in text):
+            return None
+        try:
+            if "/" in text:
+                network = ipaddress.IPv4Network(text.rstrip("."), strict=False)
+                return int(network.network_address), int(network.broadcast_address)
+            octets = [int(octet) for octet in text.rstrip(".").split(".")]
+        except ValueError:
+            return None
+        if any(octet > 255 for octet in octets):
+            return None
+        shift = 8 * (4 - len(octets))
+        low = 0
+        for octet in octets:
+            low = (low << 8) | octet
+        low <<= shift
+        return low, low | ((1 << shift) - 1)
+
+    def search(self, text, limit=200):
+        """
+        Returns (hits, total) for a query: an IP, partial IP, CIDR or range,
+        a MAC/OUI prefix ("00:50:56", "0050.56", "005056") or hostname words.
+        A bare hex word like "cafe" is matched as both MAC prefix and hostname.
+        Hits are SearchHit tuples in address order, at most `limit` of them.
+        """
+        text = text.strip().lower()
+        if not text:
+            return [], 0
+        if not self.built:
+            self._build()
+
+        with metrics.timed("index", "query") as span:
+            ip_range = self._parse_ip_query(text)
+            if ip_range is not None:
+                ids = self.ip_range(*ip_range)
+                total = len(ids)
+                ids = ids[:limit]
+            else:
+                if MAC_QUERY.match(text):
+                    ids = set(self.mac_prefix(_mac_key(text)))  # Sorted into address order below
+                elif HEX_WORD.match(text):
+                    ids = set(self.mac_prefix(text)).union(self._hostname_query(text))
+                else:
+                    ids = self._hostname_query(text)
+                total = len(ids)
+                if not isinstance(ids, array):
+                    ids = sorted(ids)  # Entry ids are in address order
+                ids = ids[:limit]
+
+            hits = [self._hit(i) for i in ids]
+            span.rows = len(hits)
+        return hits, total
+
+    def _hit(self, i):
+        mac = self.macs[i]
+        return SearchHit(
+            self.servers[self.server_ids[i]],
+            self.subnet_ids[i],
+            int_to_ip(self.ips[i]),
+            ":".join(mac[n:n + 2] for n in range(0, len(mac), 2)),
+            self.hostnames[i],
+            bool(self.reserved[i])
+        )
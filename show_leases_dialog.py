@@ -1,18 +1,62 @@
 from PyQt6.QtWidgets import (  # type: ignore
     QHBoxLayout, QLineEdit, QDialog, QVBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QHeaderView, QMenu
+    QTableWidgetItem, QPushButton, QHeaderView, QMenu, QAbstractItemView, QMessageBox, QLabel, QDateTimeEdit
 )
-from PyQt6.QtCore import Qt  # type: ignore
+from PyQt6.QtCore import Qt, QTimer, QDateTime, pyqtSignal  # type: ignore
 import datetime
-import time
 import sys
 import kea_api
-from PyQt6.QtGui import QGuiApplication  # type: ignore
+import pymysql  # type: ignore
+from PyQt6.QtGui import QGuiApplication, QColor  # type: ignore
 from notification_window import NotificationWindow
-from config_loader import WINDOW_SIZES, debug_print
+from config_loader import WINDOW_SIZES, EDIT_BUFFER, get_logger
+import metrics
+import profiler
+import oui_lookup
+import lease_history
+from lease_history_dialog import LeaseHistoryDialog
+from auto_refresh import AutoRefreshScheduler, lease_fingerprint, reservation_fingerprint
+from lease_store import LeaseStore, ip_to_int
+from commit_queue import CommitQueue
+from bulk_delete import LeaseDeleteJob
+
+log = get_logger(__name__)
+
+# Editable columns and the reservation field each one changes
+EDIT_FIELDS = {1: "mac", 2: "hostname"}
+PENDING_COLOR = "#fff3cd"  # Yellow: edited, not saved yet
+SAVING_COLOR = "#e2f0fb"  # Blue: shown as changed, commit still running
+FAILED_COLOR = "#ffcccc"  # Red: saving failed
+RESERVATION_COLUMN = 5
+VENDOR_COLUMN = 6
+# Table column of each filter box, in the order the boxes are shown
+FILTER_COLUMNS = [0, 1, 2, 3, 4, VENDOR_COLUMN]
+
+# Above this many deleted leases the table is redrawn from the local model instead of row by row
+ROW_UPDATE_LIMIT = 200
+
+# Quiet time after the last edit before buffered edits are saved; 0 = only on "Save Edits"
+EDIT_FLUSH_MS = int(EDIT_BUFFER.get("flush_ms", 5000))
+
+
+def failure_summary(failures, limit=20):
+    """Lists {ip_address: reason} failures in address order, one per line, up to `limit` lines."""
+    lines = [f"{ip}: {reason}" for ip, reason in sorted(failures.items(), key=lambda entry: ip_to_int(entry[0]))]
+    if len(lines) > limit:
+        lines = lines[:limit] + [f"... and {len(lines) - limit} more"]
+    return "\n".join(lines)
 
 
 class ShowLeasesDialog(QDialog):
+    # Number of rows with unsaved edits, for the "Save Edits" button
+    edits_changed = pyqtSignal(int)
+    # (server, ip_address, reservation or None) whenever a reservation is shown as added, removed or rolled back
+    reservation_changed = pyqtSignal(str, str, object)
+    # (server, ip_address, lease or None) when an address was re-read from its server after a change
+    lease_changed = pyqtSignal(str, str, object)
+    # (server, [ip_address, ...]) after leases were deleted from the table
+    leases_removed = pyqtSignal(str, object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Active Leases")
@@ -31,21 +75,63 @@ class ShowLeasesDialog(QDialog):
         # Filter Layout
         self.filter_layout = QHBoxLayout()
         self.filters = []
-        column_headers = ["IP Address", "MAC Address", "Hostname", "Lease Expiration", "Subnet ID"]
+        column_headers = ["IP Address", "MAC Address", "Hostname", "Lease Expiration", "Subnet ID", "Vendor"]
 
         for header in column_headers:
             filter_input = QLineEdit()
             filter_input.setPlaceholderText(f"Filter {header}...")
-            filter_input.textChanged.connect(self.apply_filters)  # Apply filter when text changes
+            filter_input.textChanged.connect(lambda _text: self.apply_filters())  # Apply filter when text changes
             self.filter_layout.addWidget(filter_input)
             self.filters.append(filter_input)
 
         self.layout.addLayout(self.filter_layout)
+        self.show_vendor = False  # Set on the first load, once it is known whether the OUI database exists
+        self.filters[-1].hide()
+
+        # Time travel: show the leases recorded in the lease history as of a past moment, read-only
+        self.history_time = None  # Epoch seconds shown; None = live
+        self.history_layout = QHBoxLayout()
+        self.history_label = QLabel("As of:")
+        self.history_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        self.history_edit.setCalendarPopup(True)
+        self.history_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.travel_button = QPushButton("Time Travel")
+        self.travel_button.clicked.connect(lambda: self.time_travel(self.history_edit.dateTime().toSecsSinceEpoch()))
+        self.live_button = QPushButton("Back to Live")
+        self.live_button.clicked.connect(self.back_to_live)
+        self.live_button.setEnabled(False)
+        for widget in (self.history_label, self.history_edit, self.travel_button, self.live_button):
+            self.history_layout.addWidget(widget)
+        self.history_layout.addStretch()
+        self.layout.addLayout(self.history_layout)
+        if lease_history.get_history() is None:
+            for widget in (self.history_label, self.history_edit, self.travel_button, self.live_button):
+                widget.hide()
+
+        self.reserved_ips = {}
+        self.ip_items = {}
+        self.current_subnet_id = None
+        self.current_server = None  # Server whose leases are shown; None = default server
+
+        # Inline edits waiting to be saved, grouped by IP: {ip_address: {"hostname": ..., "mac": ...}}
+        self.pending_edits = {}
+        self.pending_server = None
+        self.edit_timer = QTimer(self)
+        self.edit_timer.setSingleShot(True)
+        self.edit_timer.timeout.connect(lambda: self.save_edits(notify_success=False))
+
+        # Changes already on screen whose database write is still queued, keyed by (server, ip_address):
+        # reservations added (dict) or deleted (None), and hostname/MAC edits being saved
+        self.commits = CommitQueue(self)
+        self.inflight_reservations = {}
+        self.inflight_edits = {}
+        self.leases = LeaseStore()
 
         # Table widget
         self.table = QTableWidget()
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
+        self.edit_triggers = self.table.editTriggers()  # Restored after time travel
         self.layout.addWidget(self.table)
 
         # Create the buttons first before adding them to the layout
@@ -67,8 +153,24 @@ class ShowLeasesDialog(QDialog):
         # Add the button layout at the bottom
         #self.layout.addLayout(self.button_layout)
 
-        # Load data initially
-        self.load_leases()
+        # Background refresh; only redraws when leases or reservations changed
+        self.auto_refresh = AutoRefreshScheduler(
+            self, "leases",
+            fetch=self.fetch_leases,
+            fingerprint=lambda data: (data[0], kea_api.cached_since(data[0]), lease_fingerprint(data[1]), reservation_fingerprint(data[2])),
+            apply=self.apply_auto_refresh
+        )
+
+        # Load data initially: the cached snapshot at once if there is one, live data in the background
+        cached = kea_api.get_cached_snapshot()
+        if cached is not None:
+            _, leases, reservations = cached
+            self.load_leases(leases=leases, reservations=reservations)
+        else:
+            self.load_leases()
+        self.auto_refresh.start()
+        if cached is not None:
+            self.auto_refresh.refresh_in_background()
 
     def refresh_leases(self):
         """Refreshes the leases table without clearing data or filters."""
@@ -100,27 +202,90 @@ class ShowLeasesDialog(QDialog):
         self.apply_filters()
 
 
-    def load_leases(self, subnet_id=None):
-        leases = kea_api.get_active_leases()
-        if subnet_id is not None:
-            leases = [lease for lease in leases if str(lease.get("subnet-id")) == str(subnet_id)]
+    def fetch_leases(self):
+        """Returns (server, leases, reservations) for the server currently shown."""
+        server = self.current_server
+        return server, kea_api.get_lease_store(server), kea_api.get_reservations_from_db(server)
+
+    def apply_auto_refresh(self, data):
+        """Reloads the table from data fetched by the auto-refresh scheduler."""
+        if self.table.state() == QAbstractItemView.State.EditingState or self.pending_edits or self.commits.pending:
+            self.auto_refresh.last_fingerprint = None  # Don't clobber edits in progress, unsaved or being saved; retry next tick
+            return
+        server, leases, reservations = data
+        if server != self.current_server:
+            return  # The user switched servers while this was being fetched
+        if self.history_time is not None:
+            self.auto_refresh.last_fingerprint = None  # Apply the newest data once back to live
+            return
+        self.load_leases(self.current_subnet_id, leases, reservations)
+        self.apply_filters()
 
-        reservations = kea_api.get_reservations_from_db()  # Fetch reservations separately
+    @profiler.action
+    def load_leases(self, subnet_id=None, leases=None, reservations=None, server=None):
+        """Shows the leases of one subnet (all if None) of `server`; server None keeps the current one."""
+        if self.pending_edits:
+            self.save_edits(notify_success=False)  # Redrawing would drop the unsaved cells
+        if server is not None:
+            self.current_server = server
+        server = self.current_server
+        if self.history_time is not None and leases is None:
+            # The lease history only holds leases; reservations are not shown for the past
+            history = lease_history.get_history()
+            leases = (history.leases_at(self._server_name(server), self.history_time) if history else None) or []
+            reservations = []
+        if leases is None:
+            leases = kea_api.get_lease_store(server)
+        elif not isinstance(leases, LeaseStore):
+            leases = LeaseStore(leases)
+        if reservations is None:
+            reservations = kea_api.get_reservations_from_db(server)  # Fetch reservations separately
+        self._show_leases(subnet_id, leases, reservations, server)
+
+    @metrics.instrumented("qt", "load_leases")
+    def _show_leases(self, subnet_id, leases, reservations, server):
+        """Fills the table from leases and reservations already read; timed as rendering only."""
+        if self.history_time is None:
+            self.auto_refresh.remember((server, leases, reservations))
+
+        # Rows come straight from the store (already in address order) as lightweight views
+        lease_rows = leases.rows(subnet_id)
 
         # Convert reservations to a dictionary for quick lookup
         self.reserved_ips = {res["ip-address"]: res for res in reservations}
+        self.current_subnet_id = subnet_id
+        self.leases = leases
+
+        # Keep showing reservation changes whose commit has not finished; the data read may predate them
+        server_name = self._server_name(server)
+        for (inflight_server, ip_address), reservation in self.inflight_reservations.items():
+            if inflight_server == server_name:
+                if reservation is None:
+                    self.reserved_ips.pop(ip_address, None)
+                else:
+                    self.reserved_ips[ip_address] = reservation
 
         # Ensure reservations without active leases are included
-        all_ips = sorted(set(lease["ip-address"] for lease in leases) | 
-                 {ip for ip, res in self.reserved_ips.items() if res.get("subnet-id") == str(subnet_id) or subnet_id is None})
+        leased_ips = {row.ip_int for row in lease_rows}
+        entries = [(row.ip_int, row.ip_address, row) for row in lease_rows]
+        for ip, res in self.reserved_ips.items():
+            if res.get("subnet-id") == str(subnet_id) or subnet_id is None:
+                ip_int = ip_to_int(ip)
+                if ip_int not in leased_ips:
+                    entries.append((ip_int, ip, {}))
+        entries.sort(key=lambda entry: entry[0])
+
+        # IP column item per address; item.row() stays correct after sorting
+        self.ip_items = {}
 
         # Reset sorting to avoid mismatches
         self.table.setSortingEnabled(False)  # Disable sorting before reloading data
 
-        if all_ips:
-            headers = ["IP Address", "MAC Address", "Hostname", "Lease Expiration", "Subnet ID", "Reservation"]
+        if entries:
+            headers = ["IP Address", "MAC Address", "Hostname", "Lease Expiration", "Subnet ID", "Reservation", "Vendor"]
+            self.show_vendor = oui_lookup.available()
             self.table.setColumnCount(len(headers))
-            self.table.setRowCount(len(all_ips))
+            self.table.setRowCount(len(entries))
             self.table.setHorizontalHeaderLabels(headers)
 
             # Prevent event firing during load
@@ -129,71 +294,255 @@ class ShowLeasesDialog(QDialog):
             except TypeError:
                 pass  # Ignore if the signal is not connected yet
 
-            # Dictionary to track correct row placement
-            row_map = {}  
+            for row, (_, ip_address, lease) in enumerate(entries):
+                self._fill_row(row, ip_address, lease)
 
-            for row, ip_address in enumerate(all_ips):
-                lease = next((lease for lease in leases if lease["ip-address"] == ip_address), {})
-                reservation = self.reserved_ips.get(ip_address, {})
+            self.table.cellChanged.connect(self.handle_cell_edit)  # Reconnect after load
 
-                # Ensure correct MAC address selection
-                if reservation and "dhcp_identifier" in reservation:
-                    hw_address = reservation["dhcp_identifier"]  # Use reserved MAC if available
-                else:
-                    hw_address = lease.get("hw-address", "")
+            # Enable sorting after reloading data
+            self.table.setSortingEnabled(True)
 
-                # Ensure correct hostname selection
-                if reservation and "hostname" in reservation:
-                    hostname = reservation["hostname"]
-                else:
-                    hostname = lease.get("hostname", "N/A")
+            # Automatically resize columns dynamically
+            header = self.table.horizontalHeader()
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            self.table.setColumnHidden(VENDOR_COLUMN, not self.show_vendor)
+            self.filters[-1].setVisible(self.show_vendor)
 
-                lease_subnet_id = str(lease.get("subnet-id", "N/A"))  # Avoid overwriting `subnet_id` argument
+        else:
+            self.table.setRowCount(0)
 
-                # Calculate expiration time
-                cltt = lease.get("cltt", 0)
-                valid_lft = lease.get("valid-lft", 0)
-                expire_time = cltt + valid_lft if cltt and valid_lft else 0
-                expire_str = datetime.datetime.utcfromtimestamp(expire_time).strftime('%Y-%m-%d %H:%M:%S') if expire_time > 0 else "N/A"
+    def _fill_row(self, row, ip_address, lease):
+        """Writes one lease/reservation into the given table row."""
+        reservation = self.reserved_ips.get(ip_address, {})
 
-                # Ensure MAC address is properly formatted
-                if isinstance(hw_address, bytes):
-                    hw_address = ":".join(f"{b:02X}" for b in hw_address)
+        # Ensure correct MAC address selection
+        if reservation and "dhcp_identifier" in reservation:
+            hw_address = reservation["dhcp_identifier"]  # Use reserved MAC if available
+        else:
+            hw_address = lease.get("hw-address", "")
 
-                row_map[ip_address] = row  # Track correct row index
+        # Ensure correct hostname selection
+        if reservation and "hostname" in reservation:
+            hostname = reservation["hostname"]
+        else:
+            hostname = lease.get("hostname", "N/A")
+
+        # Edits not saved yet or still being saved are shown with their new values
+        overlay = {}
+        if self.inflight_edits or self.pending_edits:
+            server_name = self._server_name(self.current_server)
+            for field, value in self.inflight_edits.get((server_name, ip_address), {}).items():
+                overlay[field] = (value, SAVING_COLOR, "Saving...")
+            if self._server_name(self.pending_server) == server_name:
+                for field, value in self.pending_edits.get(ip_address, {}).items():
+                    overlay[field] = (value, PENDING_COLOR, "Not saved yet")
+        if "mac" in overlay:
+            hw_address = overlay["mac"][0]
+        if "hostname" in overlay:
+            hostname = overlay["hostname"][0]
+
+        lease_subnet_id = str(lease.get("subnet-id", "N/A"))  # Avoid overwriting `subnet_id` argument
+
+        # Calculate expiration time
+        cltt = lease.get("cltt", 0)
+        valid_lft = lease.get("valid-lft", 0)
+        expire_time = cltt + valid_lft if cltt and valid_lft else 0
+        expire_str = datetime.datetime.utcfromtimestamp(expire_time).strftime('%Y-%m-%d %H:%M:%S') if expire_time > 0 else "N/A"
+
+        # Ensure MAC address is properly formatted
+        if isinstance(hw_address, bytes):
+            hw_address = hw_address.hex(":").upper()
+
+        # Check if this lease is a reservation
+        is_reserved = ip_address in self.reserved_ips
 
-                # Check if this lease is a reservation
-                is_reserved = ip_address in self.reserved_ips
+        for col, value in enumerate([ip_address, hw_address, hostname, expire_str, lease_subnet_id]):
+            item = QTableWidgetItem(str(value))
 
-                for col, value in enumerate([ip_address, hw_address, hostname, expire_str, lease_subnet_id]):
-                    item = QTableWidgetItem(str(value))
+            # Allow editing on the MAC Address (index 1) and Hostname (index 2)
+            # columns **only if it is a reservation**; both are saved to its hosts row
+            if col in (1, 2) and is_reserved:
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)  # Enable editing
+            else:
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Keep read-only
 
-                    # Allow editing on:
-                    # - Hostname column (index 2)
-                    # - MAC Address column (index 1) **only if it is a reservation**
-                    if col == 2 or (col == 1 and is_reserved):
-                        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)  # Enable editing
-                    else:
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Keep read-only
+            self.table.setItem(row, col, item)
+            if EDIT_FIELDS.get(col) in overlay:
+                _, color, tooltip = overlay[EDIT_FIELDS[col]]
+                item.setBackground(QColor(color))
+                item.setToolTip(tooltip)
 
-                    self.table.setItem(row, col, item)
+        self.ip_items[ip_address] = self.table.item(row, 0)
 
-                # Add checkmark for reservations
-                reservation_checkbox = QTableWidgetItem("✅" if is_reserved else "")
-                reservation_checkbox.setFlags(reservation_checkbox.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 5, reservation_checkbox)
+        # Add checkmark for reservations
+        reservation_checkbox = QTableWidgetItem("✅" if is_reserved else "")
+        reservation_checkbox.setFlags(reservation_checkbox.flags() & ~Qt.ItemFlag.ItemIsEditable)
+        self.table.setItem(row, RESERVATION_COLUMN, reservation_checkbox)
 
-            self.table.cellChanged.connect(self.handle_cell_edit)  # Reconnect after load
+        if self.show_vendor:
+            vendor_item = QTableWidgetItem(oui_lookup.vendor(hw_address))
+            vendor_item.setFlags(vendor_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.table.setItem(row, VENDOR_COLUMN, vendor_item)
 
-            # Enable sorting after reloading data
-            self.table.setSortingEnabled(True)
+    @staticmethod
+    def _server_name(server):
+        return kea_api.get_server(server)["name"]
 
-            # Automatically resize columns dynamically
-            header = self.table.horizontalHeader()
-            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    def time_travel(self, ts):
+        """
+        Shows the leases of the current server as they were at `ts` (epoch
+        seconds), rebuilt from the lease history. The table is read-only and
+        not auto-refreshed until "Back to Live".
+        """
+        history = lease_history.get_history()
+        if history is None:
+            return
+        if self.pending_edits:
+            self.save_edits(notify_success=False)
+        server_name = self._server_name(self.current_server)
+        leases = history.leases_at(server_name, ts)
+        if leases is None:
+            first = history.first_recorded(server_name)
+            since = f" before {datetime.datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S}" if first is not None else ""
+            NotificationWindow(f"No lease history of {server_name}{since}.", "Info", parent=self).exec()
+            return
 
-        else:
-            self.table.setRowCount(0)
+        self.history_time = ts
+        self.history_edit.setDateTime(QDateTime.fromSecsSinceEpoch(int(ts)))
+        self.history_label.setText(f"⏪ {len(leases)} leases of {server_name} as of:")
+        self.live_button.setEnabled(True)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.load_leases(self.current_subnet_id, leases=leases, reservations=[])
+        self.apply_filters()
+
+    def back_to_live(self):
+        """Leaves time travel and reloads the current leases."""
+        if self.history_time is None:
+            return
+        self.history_time = None
+        self.history_label.setText("As of:")
+        self.history_edit.setDateTime(QDateTime.currentDateTime())
+        self.live_button.setEnabled(False)
+        self.table.setEditTriggers(self.edit_triggers)
+        self.load_leases(self.current_subnet_id)
+        self.apply_filters()
+
+    def show_history(self, ip_address=None, hw_address=None):
+        """Opens the recorded history of one address or one MAC on the current server."""
+        dialog = LeaseHistoryDialog(
+            self._server_name(self.current_server), ip_address=ip_address, hw_address=hw_address,
+            travel=self.time_travel, parent=self
+        )
+        dialog.exec()
+
+    def _redraw_address(self, ip_address):
+        """
+        Redraws the row of one address from the current model after a local
+        change: updates it, adds it if it now belongs in the table, or removes
+        it if it has neither a lease nor a reservation any more.
+        Returns the row's IP item, or None if the address is not shown.
+        """
+        lease = self.leases.get(ip_address)
+        reservation = self.reserved_ips.get(ip_address)
+        item = self.ip_items.get(ip_address)
+
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.table.blockSignals(True)
+
+        if item is not None and lease is None and reservation is None:
+            self.table.removeRow(item.row())
+            del self.ip_items[ip_address]
+        elif item is not None:
+            self._fill_row(item.row(), ip_address, lease or {})
+        elif lease is None and reservation is None:
+            pass  # Not shown and nothing to show, e.g. a lease deleted in a subnet that is not on screen
+        elif self.table.columnCount() and (
+            self.current_subnet_id is None
+            or str(lease.get("subnet-id") if lease else reservation.get("subnet_id")) == str(self.current_subnet_id)
+        ):
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self._fill_row(row, ip_address, lease or {})
+
+        self.table.blockSignals(False)
+        self.table.setSortingEnabled(sorting)
+
+        item = self.ip_items.get(ip_address)
+        if item is not None:
+            self._filter_row(item.row())
+        return item
+
+    def apply_lease_delta(self, changed, removed):
+        """
+        Applies lease changes pushed by a live lease feed without reloading the table.
+        `changed` is a list of lease dicts, `removed` a list of IP addresses.
+        Feeds follow the default server, so the delta is ignored while another server is shown.
+        """
+        if not changed and not removed or self.history_time is not None:
+            return
+        if self.current_server not in (None, kea_api.get_server()["name"]):
+            return
+        self.leases.apply(changed, removed)  # A copy of the feed's store, so it needs the delta too
+
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        try:
+            self.table.cellChanged.disconnect(self.handle_cell_edit)
+        except TypeError:
+            pass
+
+        for ip_address in removed:
+            item = self.ip_items.get(ip_address)
+            if item is None:
+                continue
+            if ip_address in self.reserved_ips:
+                self._fill_row(item.row(), ip_address, {})  # Keep the reservation row
+            else:
+                self.table.removeRow(item.row())
+                del self.ip_items[ip_address]
+
+        for lease in changed:
+            ip_address = lease.get("ip-address")
+            item = self.ip_items.get(ip_address)
+            if ip_address in self.pending_edits:
+                continue  # Keep the unsaved values on screen
+            if item is not None:
+                self._fill_row(item.row(), ip_address, lease)
+            elif self.current_subnet_id is None or str(lease.get("subnet-id")) == str(self.current_subnet_id):
+                if self.table.columnCount() == 0:
+                    self.load_leases(self.current_subnet_id)
+                    return
+                row = self.table.rowCount()
+                self.table.insertRow(row)
+                self._fill_row(row, ip_address, lease)
+
+        self.table.cellChanged.connect(self.handle_cell_edit)
+        self.table.setSortingEnabled(sorting)
+        self.apply_filters()
+
+    def show_address(self, ip_address, subnet_id, server=None):
+        """
+        Loads the subnet of an address with the column filters cleared and
+        selects its row. Returns False if the address is not in the table.
+        """
+        for filter_input in self.filters:
+            filter_input.blockSignals(True)  # One reload below instead of a filter pass per field
+            filter_input.clear()
+            filter_input.blockSignals(False)
+
+        if subnet_id is not None:
+            self.load_leases(str(subnet_id), server=server)
+        if subnet_id is None or ip_address not in self.ip_items:
+            self.load_leases(server=server)  # Reservations without a lease are only listed for all subnets
+        self.apply_filters()  # Unhide rows hidden by the old filters
+
+        item = self.ip_items.get(ip_address)
+        if item is None:
+            return False
+        self.table.selectRow(item.row())
+        self.table.scrollToItem(item, QAbstractItemView.ScrollHint.PositionAtCenter)
+        return True
 
     def filter_subnet(self, subnet_id):
         """Filters the table to only show leases or reservations for the selected subnet."""
@@ -205,21 +554,27 @@ class ShowLeasesDialog(QDialog):
                 self.table.setRowHidden(row, True)  # Hide non-matching rows
 
 
+    @profiler.action
+    @metrics.instrumented("qt")
     def apply_filters(self):
         """
         Filters the table based on input fields above each column.
         """
         for row in range(self.table.rowCount()):
-            self.table.setRowHidden(row, False)  # Reset row visibility
+            self._filter_row(row)
 
-            for col, filter_input in enumerate(self.filters):
-                filter_text = filter_input.text().strip().lower()
-                cell_text = self.table.item(row, col).text().strip().lower() if self.table.item(row, col) else ""
+    def _filter_row(self, row):
+        """Hides one row if it doesn't match the column filters."""
+        self.table.setRowHidden(row, False)  # Reset row visibility
 
-                # Hide row if it doesn't match the filter
-                if filter_text and filter_text not in cell_text:
-                    self.table.setRowHidden(row, True)
-                    break  # No need to check other columns if one fails
+        for col, filter_input in zip(FILTER_COLUMNS, self.filters):
+            filter_text = filter_input.text().strip().lower()
+            cell_text = self.table.item(row, col).text().strip().lower() if self.table.item(row, col) else ""
+
+            # Hide row if it doesn't match the filter
+            if filter_text and filter_text not in cell_text:
+                self.table.setRowHidden(row, True)
+                break  # No need to check other columns if one fails
 
     def show_context_menu(self, position):
         """
@@ -229,6 +584,11 @@ class ShowLeasesDialog(QDialog):
         copy_action = menu.addAction("Copy")
         convert_action = menu.addAction("Convert to Reservation")
         delete_action = menu.addAction("Delete Reservation")
+        menu.addSeparator()
+        delete_leases_action = menu.addAction("Delete Lease(s)")
+        menu.addSeparator()
+        address_history_action = menu.addAction("Show Address History")
+        device_history_action = menu.addAction("Show Device History")
 
         selected_item = self.table.itemAt(position)
         if not selected_item:
@@ -242,6 +602,25 @@ class ShowLeasesDialog(QDialog):
         convert_action.setEnabled(not is_reserved)
         delete_action.setEnabled(is_reserved)
 
+        # Leases of every selected row, or of the clicked row if it is not part of the selection
+        rows = {item.row() for item in self.table.selectedItems()}
+        if row not in rows:
+            rows = {row}
+        lease_ips = [self.table.item(r, 0).text() for r in sorted(rows) if self.table.item(r, 0)]
+        lease_ips = [ip for ip in lease_ips if self.leases.get(ip) is not None]
+        delete_leases_action.setEnabled(bool(lease_ips))
+        if len(lease_ips) > 1:
+            delete_leases_action.setText(f"Delete {len(lease_ips)} Leases")
+
+        # The past is read-only
+        if self.history_time is not None:
+            for read_write in (convert_action, delete_action, delete_leases_action):
+                read_write.setEnabled(False)
+        has_history = lease_history.get_history() is not None
+        hw_address = self.table.item(row, 1).text() if self.table.item(row, 1) else ""
+        address_history_action.setEnabled(has_history and bool(ip_address))
+        device_history_action.setEnabled(has_history and oui_lookup.mac_to_int(hw_address) is not None)
+
         action = menu.exec(self.table.viewport().mapToGlobal(position))
 
         if action == copy_action:
@@ -250,14 +629,75 @@ class ShowLeasesDialog(QDialog):
 
         elif action == convert_action:
             self.convert_to_reservation(ip_address)
+            self.auto_refresh.notify_edit()
 
         elif action == delete_action:
             self.delete_reservation(ip_address)
+            self.auto_refresh.notify_edit()
+
+        elif action == delete_leases_action:
+            self.delete_leases(lease_ips)
+
+        elif action == address_history_action:
+            self.show_history(ip_address=ip_address)
+
+        elif action == device_history_action:
+            self.show_history(hw_address=hw_address)
 
 
+    def delete_leases(self, ip_addresses):
+        """
+        Deletes the leases of the given addresses on the server shown, with
+        concurrent lease4-del commands behind a progress dialog, then drops
+        them from the table. Reservations of these addresses stay.
+        """
+        if not ip_addresses:
+            return
+        answer = QMessageBox.question(
+            self, "Delete Leases",
+            f"Delete {len(ip_addresses)} lease(s)? Clients keep their address until they renew or rebind."
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+
+        server = self.current_server
+        server_name = self._server_name(server)
+
+        def done(failures):
+            if failures is None:
+                failures = {ip_address: "Error, see the log" for ip_address in ip_addresses}
+            deleted = [ip for ip in ip_addresses if ip not in failures]
+            self.remove_leases(server_name, deleted)
+            self.leases_removed.emit(server_name, deleted)
+            self.auto_refresh.notify_edit()
+            if failures:
+                NotificationWindow(
+                    f"Deleted {len(deleted)} of {len(ip_addresses)} leases. Not deleted:\n" + failure_summary(failures),
+                    "Error", parent=self
+                ).exec()
+
+        LeaseDeleteJob(
+            self, f"Deleting {len(ip_addresses)} leases...",
+            lambda progress, cancelled: kea_api.delete_leases(ip_addresses, server, progress, cancelled),
+            done
+        ).start()
+
+    def remove_leases(self, server_name, ip_addresses):
+        """Drops deleted leases from the model and the table; rows of reserved addresses stay."""
+        if not ip_addresses or server_name != self._server_name(self.current_server) or self.history_time is not None:
+            return
+        self.leases.apply([], ip_addresses)
+        if len(ip_addresses) > ROW_UPDATE_LIMIT:
+            self.load_leases(self.current_subnet_id, self.leases, list(self.reserved_ips.values()))
+            self.apply_filters()
+            return
+        for ip_address in ip_addresses:
+            self._redraw_address(ip_address)
+
     def convert_to_reservation(self, ip_address):
         """
-        Converts a lease to a reservation in the MySQL database.
+        Converts a lease to a reservation. The row shows the reservation at once;
+        the database write runs in the background.
         """
         if not ip_address:
             return
@@ -267,56 +707,26 @@ class ShowLeasesDialog(QDialog):
             NotificationWindow(f"{ip_address} is already a reservation.", "Info", parent=self).exec()
             return
 
-        # Get lease details
-        row = None
-        for r in range(self.table.rowCount()):
-            if self.table.item(r, 0) and self.table.item(r, 0).text() == ip_address:
-                row = r
-                break
-
-        if row is None:
+        item = self.ip_items.get(ip_address)
+        if item is None:
             NotificationWindow(f"Failed to find lease for {ip_address}", "Error", parent=self).exec()
             return
 
+        row = item.row()
         mac_address = self.table.item(row, 1).text() if self.table.item(row, 1) else ""
         hostname = self.table.item(row, 2).text() if self.table.item(row, 2) else ""
         subnet_id = self.table.item(row, 4).text() if self.table.item(row, 4) else ""
 
-        # Call MySQL function to add reservation
-        success = kea_api.add_reservation_to_db(ip_address, mac_address, hostname, subnet_id)
-
-        if success:
-            for attempt in range(5):  # Retry up to 5 times
-                time.sleep(0.5)  # Wait before checking DB
-                self.reserved_ips = {res["ip-address"]: res for res in kea_api.get_reservations_from_db()}
-
-                if ip_address in self.reserved_ips:
-                    break  # Exit loop if reservation is found
-
-            if ip_address in self.reserved_ips:  # Double-check it was added
-                # Temporarily disable `cellChanged` to prevent unwanted database updates
-                self.table.cellChanged.disconnect(self.handle_cell_edit)
-
-                # Update UI to reflect reservation
-                self.reserved_ips[ip_address] = True
-                reservation_checkbox = QTableWidgetItem("✅")
-                reservation_checkbox.setFlags(reservation_checkbox.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 5, reservation_checkbox)
-
-                # Reconnect the signal after UI updates are done
-                self.table.cellChanged.connect(self.handle_cell_edit)
-
-                NotificationWindow(f"Reservation successfully added for {ip_address}", "Success", parent=self).exec()
-                return
-            else:
-                NotificationWindow(f"Failed to verify reservation for {ip_address}.", "Error", parent=self).exec()
-                return
-
-        NotificationWindow(f"Failed to add reservation for {ip_address}.", "Error", parent=self).exec()
+        reservation = kea_api.reservation_record(ip_address, mac_address, hostname, subnet_id)
+        if reservation is None:
+            NotificationWindow(f"Invalid MAC address {mac_address!r} for {ip_address}.", "Error", parent=self).exec()
+            return
+        self.commit_reservation(ip_address, reservation)
 
     def delete_reservation(self, ip_address):
         """
-        Deletes a reservation and updates the UI.
+        Deletes a reservation. The row drops it at once; the database write runs
+        in the background.
         """
         if not ip_address:
             return
@@ -326,64 +736,208 @@ class ShowLeasesDialog(QDialog):
             NotificationWindow(f"{ip_address} is not a reservation.", "Info", parent=self).exec()
             return
 
-        success = kea_api.delete_reservation_from_db(ip_address, parent=self)
-
-        if success:
-            # Find the row in the table
-            row = None
-            for r in range(self.table.rowCount()):
-                if self.table.item(r, 0) and self.table.item(r, 0).text() == ip_address:
-                    row = r
-                    break
-
-            if row is not None:
-                # Prevent the cellChanged event from triggering another DB update
-                self.table.cellChanged.disconnect(self.handle_cell_edit)
+        self.commit_reservation(ip_address, None)
 
-                # Remove from reserved IPs BEFORE refreshing
-                self.reserved_ips.pop(ip_address, None)
+    def commit_reservation(self, ip_address, reservation, server=None, previous=None):
+        """
+        Shows `reservation` (None = deleted) for an address right away and writes
+        it to the database of `server` (the server shown if None) in the
+        background. If the write fails the address goes back to `previous`
+        (the reservation shown now if None) and its row is marked with the error.
+        """
+        server = self.current_server if server is None else server
+        server_name = self._server_name(server)
+        shown = server_name == self._server_name(self.current_server)
+        if previous is None and shown:
+            previous = self.reserved_ips.get(ip_address)
+        key = (server_name, ip_address)
+
+        # Step 1: Apply the change locally
+        self.inflight_reservations[key] = reservation
+        self._show_reservation(server_name, ip_address, reservation, "Saving...", SAVING_COLOR)
+
+        # Step 2: Commit in the background, then re-read just this address
+        def write():
+            if reservation is None:
+                ok, message = kea_api.try_delete_reservation(ip_address, server=server)
+            else:
+                ok, message = kea_api.try_add_reservation(
+                    ip_address, reservation["dhcp_identifier"], reservation["hostname"], reservation["subnet_id"], server=server
+                )
+            return ok, message, kea_api.get_address(ip_address, server) if ok else None
+
+        # Step 3: Keep or roll back once the database answered
+        def done(result, error):
+            ok, message, current = result if error is None else (False, str(error), None)
+            newer = self.inflight_reservations.get(key, False) is not reservation
+            if not newer:
+                del self.inflight_reservations[key]
+            if ok:
+                log.info("%s", message)
+                self.auto_refresh.notify_edit()
+                if newer:
+                    return  # A later change of this address is still being saved and stays on screen
+                if current is None:
+                    self._show_reservation(server_name, ip_address, reservation)
+                else:
+                    self._show_address(server_name, ip_address, *current)
+                return
 
-                # Remove checkmark from UI
-                self.table.setItem(row, 5, QTableWidgetItem(""))
+            log.warning("Rolling back reservation change for %s on %s: %s", ip_address, server_name, message)
+            if not self._show_reservation(server_name, ip_address, previous, f"Not saved: {message}", FAILED_COLOR):
+                NotificationWindow(f"Reservation change for {ip_address} was not saved:\n{message}", "Error", parent=self).exec()
 
-                # Reconnect the signal after UI changes are done
-                self.table.cellChanged.connect(self.handle_cell_edit)
+        self.commits.submit(write, done)
 
-                # Show success notification ONLY here
-                NotificationWindow(f"Reservation for {ip_address} successfully deleted.", "Success", parent=self).exec()
+    def _show_address(self, server_name, ip_address, lease, reservation):
+        """Puts an address as re-read from its server (lease and reservation, None = none) into the model and its row."""
+        self.lease_changed.emit(server_name, ip_address, lease)
+        if server_name == self._server_name(self.current_server) and self.history_time is None:
+            self.leases.apply([lease] if lease else [], [] if lease else [ip_address])
+        self._show_reservation(server_name, ip_address, reservation)
 
-            return  # Ensure no additional processing occurs
+    def _show_reservation(self, server_name, ip_address, reservation, tooltip="", color=None):
+        """
+        Puts a reservation (None = none) for an address into the model and its
+        row, marking the Reservation cell. Returns True if the row is on screen.
+        """
+        self.reservation_changed.emit(server_name, ip_address, reservation)
+        if server_name != self._server_name(self.current_server) or self.history_time is not None:
+            return False
 
+        if reservation is None:
+            self.reserved_ips.pop(ip_address, None)
+        else:
+            self.reserved_ips[ip_address] = reservation
+        item = self._redraw_address(ip_address)
+        if item is None:
+            return False
+        self._mark_cell(self.table.item(item.row(), RESERVATION_COLUMN), color, tooltip)
+        return True
 
     def handle_cell_edit(self, row, column):
         """
-        Handles edits to the MAC address and hostname columns, updating the MySQL database.
+        Buffers an edit of the MAC address or hostname column. Edits are grouped
+        by IP and saved together by save_edits(), after EDIT_FLUSH_MS of quiet
+        or from "Save Edits".
         """
         ip_address = self.table.item(row, 0).text()
-        new_value = self.table.item(row, column).text().strip()
-
-        if not ip_address:
+        field = EDIT_FIELDS.get(column)
+        if not ip_address or field is None:
             return
+        if field == "mac" and ip_address not in self.reserved_ips:
+            return  # Ignore changes if it's not a reservation
+
+        if not self.pending_edits:
+            self.pending_server = self.current_server
+        self.pending_edits.setdefault(ip_address, {})[field] = self.table.item(row, column).text().strip()
+        self._mark_cell(self.table.item(row, column), PENDING_COLOR, "Not saved yet")
+        self.edits_changed.emit(len(self.pending_edits))
+        if EDIT_FLUSH_MS > 0:
+            self.edit_timer.start(EDIT_FLUSH_MS)
+
+    def _mark_cell(self, item, color=None, tooltip=""):
+        """Colors an edited cell without it counting as another edit."""
+        if item is None:
+            return
+        self.table.blockSignals(True)
+        if color is None:
+            item.setData(Qt.ItemDataRole.BackgroundRole, None)
+        else:
+            item.setBackground(QColor(color))
+        item.setToolTip(tooltip)
+        self.table.blockSignals(False)
 
-        success = False  # Default to failure
-
-        if column == 2:  # Hostname Column
-            success = kea_api.update_hostname(ip_address, new_value)
-
-        elif column == 1:  # MAC Address Column (only for reservations)
-            if ip_address in self.reserved_ips:
-                success = kea_api.update_mac_address(ip_address, new_value)
-            else:
-                return  # Ignore changes if it's not a reservation
+    def save_edits(self, notify_success=True):
+        """
+        Writes all buffered edits in one transaction in the background. The
+        cells keep their new values while the commit runs; rows that failed go
+        back to their saved values, marked red, and are reported in a single
+        summary.
+        """
+        self.edit_timer.stop()
+        if not self.pending_edits:
+            return
+        edits, self.pending_edits = self.pending_edits, {}
+        server = self.pending_server
+        server_name = self._server_name(server)
+        self.edits_changed.emit(0)
+
+        for ip_address, fields in edits.items():
+            self._mark_edit(server_name, ip_address, fields, SAVING_COLOR, "Saving...")
+            self.inflight_edits.setdefault((server_name, ip_address), {}).update(fields)
+
+        def write():
+            failures = kea_api.apply_reservation_edits(edits, server=server)
+            # Re-read only the saved rows, by primary key, so the table shows what the database holds
+            try:
+                current = kea_api.get_reservations_by_ip([ip for ip in edits if ip not in failures], server)
+            except pymysql.MySQLError as e:
+                log.warning("Could not re-read %d saved rows: %s", len(edits) - len(failures), e)
+                current = {}
+            return failures, current
+
+        def done(result, error):
+            failures, current = result if error is None else ({ip_address: f"Error: {error}" for ip_address in edits}, {})
+
+            for ip_address, fields in edits.items():
+                key = (server_name, ip_address)
+                saving = self.inflight_edits.get(key, {})
+                for field, value in fields.items():
+                    if saving.get(field) == value:  # Not edited again since
+                        del saving[field]
+                if not saving:
+                    self.inflight_edits.pop(key, None)
+
+                failure = failures.get(ip_address)
+                shown = server_name == self._server_name(self.current_server)
+                reservation = self.reserved_ips.get(ip_address) if shown else None
+                if failure is None and ip_address in current:
+                    self.reservation_changed.emit(server_name, ip_address, current[ip_address])
+                    if shown:
+                        self.reserved_ips[ip_address] = current[ip_address]
+                        if ip_address in self.ip_items:
+                            self._redraw_address(ip_address)
+                elif failure is None and isinstance(reservation, dict):
+                    # Keep the saved values when rows are redrawn from the cached reservations
+                    reservation = dict(reservation)
+                    if "hostname" in fields:
+                        reservation["hostname"] = fields["hostname"]
+                    if "mac" in fields:
+                        reservation["dhcp_identifier"] = fields["mac"]
+                    self.reserved_ips[ip_address] = reservation
+                    self.reservation_changed.emit(server_name, ip_address, reservation)
+                elif failure is not None and shown and ip_address in self.ip_items:
+                    self._redraw_address(ip_address)  # Roll the cells back to the saved values
+                self._mark_edit(server_name, ip_address, fields, FAILED_COLOR if failure else None, failure or "")
+
+            saved = len(edits) - len(failures)
+            if saved:
+                self.auto_refresh.notify_edit()
+            log.info("Saved edits for %d of %d rows", saved, len(edits))
+
+            if failures:
+                NotificationWindow(
+                    f"Saved {saved} of {len(edits)} edited rows. Not saved:\n" + failure_summary(failures), "Error", parent=self
+                ).exec()
+            elif notify_success:
+                NotificationWindow(f"Saved {saved} edited rows.", "Success", parent=self).exec()
+
+        self.commits.submit(write, done)
+
+    def _mark_edit(self, server_name, ip_address, fields, color, tooltip):
+        """Marks the edited cells of an address, unless they were edited again and are waiting to be saved."""
+        item = self.ip_items.get(ip_address)
+        if item is None or server_name != self._server_name(self.current_server):
+            return
+        newer = set(self.pending_edits.get(ip_address, ())) | set(self.inflight_edits.get((server_name, ip_address), ()))
+        for column, field in EDIT_FIELDS.items():
+            if field in fields and field not in newer:
+                self._mark_cell(self.table.item(item.row(), column), color, tooltip)
 
-        if success:
-            NotificationWindow(f"Successfully updated {ip_address}", "Success", parent=self).exec()
-        else:
-            NotificationWindow(f"Failed to update database for {ip_address}", "Error", parent=self).exec()
-    
     def quit_app(self):
         """Closes the entire application."""
-        debug_print("DEBUG: Quit button clicked. Exiting application...")
+        log.debug("Quit button clicked. Exiting application...")
 
         self.close()  # Close the dialog
         sys.exit(0)  # Fully exit
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import metrics
+from config_loader import SNAPSHOT_CACHE, DUMMY_DATA, get_logger
+from lease_store import LeaseStore
+
+log = get_logger(__name__)
+
+KINDS = ("subnets", "leases", "reservations")
+
+
+def _encode(value):
+    # MySQL returns dhcp_identifier as bytes; keep it bytes after a round trip
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": bytes(value).hex()}
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1 and "__bytes__" in obj:
+        return bytes.fromhex(obj["__bytes__"])
+    return obj
+
+
+class SnapshotCache:
+    """
+    Last successfully read subnets, leases and reservations per server, kept in
+    a local SQLite file so the GUI can draw something at once on launch and keep
+    working while a server is unreachable.
+
+    Subnets and reservations are stored as JSON, leases as the LeaseStore's raw
+    column buffers (one blob per server), so saving or loading 100k leases is a
+    single row write/read. A snapshot is only rewritten when its content changed.
+    Reads that had to fall back to the cache mark the server as stale until the
+    next successful read. Each kind is written at most every `min_save_interval_s`;
+    a newer copy arriving sooner is kept pending and written by the first save()
+    after the interval or by flush() on exit.
+    """
+
+    def __init__(self, path, min_save_interval=30):
+        self.path = path
+        self.min_save_interval = min_save_interval
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            " server TEXT NOT NULL, kind TEXT NOT NULL, saved_at REAL NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (server, kind))"
+        )
+        self.conn.commit()
+        self.saved_fingerprints = {}
+        self.saved_times = {}
+        self.pending = {}  # (server, kind) -> latest value not written yet
+        self.stale = {}  # (server, kind) -> saved_at of the cached copy being served
+
+    @staticmethod
+    def _serialize(kind, value):
+        if kind == "leases":
+            return value.fingerprint(), value.to_bytes()
+        data = json.dumps(value, default=_encode).encode()
+        return hash(data), data
+
+    def save(self, server, kind, value):
+        """Stores the latest good copy of one kind of data and clears its stale mark."""
+        self.stale.pop((server, kind), None)
+        now = time.time()
+        if now - self.saved_times.get((server, kind), 0) < self.min_save_interval:
+            # The caller may go on changing a lease store; hold on to a copy
+            self.pending[(server, kind)] = value.copy() if kind == "leases" else value
+            return
+        self.pending.pop((server, kind), None)
+        self._write(server, kind, value, now)
+
+    def flush(self):
+        """Writes the copies still held back by the save interval."""
+        while self.pending:
+            (server, kind), value = self.pending.popitem()
+            self._write(server, kind, value, time.time())
+
+    def _write(self, server, kind, value, now):
+        fingerprint, data = self._serialize(kind, value)
+        if self.saved_fingerprints.get((server, kind)) == fingerprint:
+            return
+
+        with self.lock, metrics.timed("cache", f"save_{kind}") as span:
+            span.bytes = len(data)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshot (server, kind, saved_at, data) VALUES (?, ?, ?, ?)",
+                (server, kind, now, data)
+            )
+            self.conn.commit()
+        self.saved_fingerprints[(server, kind)] = fingerprint
+        self.saved_times[(server, kind)] = now
+
+    def load(self, server, kind):
+        """Returns (value, saved_at) for the cached copy, or (None, None)."""
+        with self.lock, metrics.timed("cache", f"load_{kind}") as span:
+            row = self.conn.execute(
+                "SELECT saved_at, data FROM snapshot WHERE server = ? AND kind = ?", (server, kind)
+            ).fetchone()
+            if row is None:
+                return None, None
+            saved_at, data = row
+            span.bytes = len(data)
+
+        if kind == "leases":
+            return LeaseStore.from_bytes(data), saved_at
+        return json.loads(data, object_hook=_decode), saved_at
+
+    def fallback(self, server, kind):
+        """Serves the cached copy after a failed read and marks it stale. Returns None without one."""
+        value, saved_at = self.load(server, kind)
+        if value is None:
+            return None
+        log.warning("Serving cached %s for %s from %s", kind, server, time.ctime(saved_at))
+        self.stale[(server, kind)] = saved_at
+        return value
+
+    def load_server(self, server):
+        """
+        Returns the cached (subnets, leases, reservations) of a server and marks
+        them stale, or None if nothing was cached for it yet.
+        """
+        values = []
+        for kind in KINDS:
+            value = self.fallback(server, kind)
+            if value is None:
+                return None
+            values.append(value)
+        return tuple(values)
+
+    def stale_since(self, server, kinds=KINDS):
+        """Returns when the oldest cached data currently shown for a server was saved, or None if it is live."""
+        times = [saved_at for (name, kind), saved_at in list(self.stale.items()) if name == server and kind in kinds]
+        return min(times) if times else None
+
+
+def format_age(saved_at):
+    """Returns a short age like "5 min" for a saved_at timestamp."""
+    seconds = max(0, int(time.time() - saved_at))
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min"
+    if seconds < 86400:
+        return f"{seconds // 3600} h"
+    return f"{seconds // 86400} d"
+
+
+_cache = None
+
+def get_cache():
+    """Returns the shared snapshot cache, or None when it is disabled, cannot be opened or in dummy mode."""
+    global _cache
+    if _cache is None and SNAPSHOT_CACHE.get("enabled", True) and not DUMMY_DATA:
+        path = SNAPSHOT_CACHE.get("path", "kea_manager_cache.sqlite")
+        try:
+            _cache = SnapshotCache(os.path.expanduser(path), float(SNAPSHOT_CACHE.get("min_save_interval_s", 30)))
+        except sqlite3.Error as e:
+            log.error("Cannot open snapshot cache %s: %s", path, e)
+            SNAPSHOT_CACHE["enabled"] = False
+    return _cache
+
+
+def flush():
+    """Writes any snapshot still held back by the save interval; called on exit."""
+    if _cache is not None:
+        _cache.flush()
@@ -1,9 +1,24 @@
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QHeaderView  # type: ignore
 from PyQt6.QtGui import QColor  # type: ignore
 from PyQt6.QtCore import Qt  # type: ignore
-import ipaddress
-from config_loader import DUMMY_DATA, debug_print
+from config_loader import DUMMY_DATA, get_logger
+from auto_refresh import AutoRefreshScheduler, ServerReader, server_data_fingerprint
 import kea_api
+import snapshot_cache
+import metrics
+import profiler
+import address_analytics
+import utilization_history
+
+log = get_logger(__name__)
+
+def trend_tooltip(trend):
+    """Hover text for the trend column: start and current usage and the projected exhaustion."""
+    text = f"Pool used: {trend.first_percent:.1f}% → {trend.last_percent:.1f}% over {trend.span_days:.1f} days"
+    if trend.days_to_full is not None:
+        text += f"\nFull in about {trend.days_to_full:.0f} days at the current rate"
+    return text
+
 
 class StatusDialog(QDialog):
     def __init__(self, parent=None):
@@ -16,136 +31,126 @@ class StatusDialog(QDialog):
         self.status_label = QLabel("Checking server status...")
         layout.addWidget(self.status_label)
 
+        self.expiry_label = QLabel()
+        layout.addWidget(self.expiry_label)
+
         self.table = QTableWidget()
         layout.addWidget(self.table)
 
-        self.update_status()
+        self.server_reader = ServerReader(self, self.read_server, self.update_status)
+        self.auto_refresh = AutoRefreshScheduler(
+            self, "status",
+            fetch=self.fetch_status_data,
+            fingerprint=server_data_fingerprint,
+            apply=self.update_status
+        )
 
-    def update_status(self):
+        self.update_status()
+        self.auto_refresh.start()
+
+    def done(self, result):
+        self.auto_refresh.stop()
+        super().done(result)
+
+    @staticmethod
+    def read_server(server):
+        return kea_api.get_subnets(server), kea_api.get_lease_store(server), kea_api.get_reservations_from_db(server)
+
+    def fetch_status_data(self):
+        """
+        Reads every server at once. Returns {server: (subnets, leases, reservations)},
+        with None for a server that did not answer. Blocks; only for worker threads.
+        """
+        return kea_api.fan_out(self.read_server)
+
+    @profiler.action
+    def update_status(self, data=None):
+        """Shows `data`; without it the servers are read in the background and shown as each answers."""
+        if data is None:
+            self.server_reader.start()
+            return
+        self._show_status(data)
+
+    @metrics.instrumented("qt", "update_status")
+    def _show_status(self, data):
+        """Fills the status table and labels from data already read."""
+        self.auto_refresh.remember(data)
+
+        # Kea answered if it returned subnets that did not come from the snapshot cache
+        down = [
+            server for server, result in data.items()
+            if result is None or not result[0] or kea_api.cached_since(server, ("subnets",)) is not None
+        ]
         if DUMMY_DATA:
-            debug_print("[DUMMY] Populating fake status data...")
-            dummy_subnets = kea_api.get_subnets()
-            dummy_leases = kea_api.get_active_leases()
-            dummy_reservations = kea_api.get_reservations_from_db()
-
+            log.debug("[DUMMY] Populating fake status data...")
             self.status_label.setText("🧪 Dummy Mode: Simulated server data")
-
-            # Set headers
-            headers = ["Subnet", "Subnet ID", "% Free", "# Free", "Total", "Leases", "Reservations"]
-            self.table.setColumnCount(len(headers))
-            self.table.setHorizontalHeaderLabels(headers)
-            self.table.setRowCount(0)
-
-            for subnet in dummy_subnets:
-                subnet_id = subnet["subnet_id"]
-                cidr = subnet["subnet"]
-                pools = subnet.get("pools", [])
-
-                total = 0
-                for pool in pools:
-                    start_ip, end_ip = pool.split("-")
-                    start = int(start_ip.split(".")[-1])
-                    end = int(end_ip.split(".")[-1])
-                    total += (end - start + 1)
-
-                leases = [l for l in dummy_leases if l.get("subnet-id") == subnet_id]
-                reservations = [r for r in dummy_reservations if r.get("subnet_id") == subnet_id]
-
-                used = len(leases) + len(reservations)
-                free = total - used
-                percent_free = (free / total) * 100 if total > 0 else 0
+        elif len(data) == 1:
+            self.status_label.setText("❌ Kea DHCP Server is not responding." if down else "✅ Kea DHCP Server is online.")
+        elif down:
+            self.status_label.setText(f"❌ Not responding: {', '.join(down)} ({len(data) - len(down)}/{len(data)} servers online)")
+        else:
+            self.status_label.setText(f"✅ All {len(data)} Kea DHCP Servers are online.")
+
+        cached_at = [t for t in map(kea_api.cached_since, data) if t is not None]
+        if cached_at:
+            self.status_label.setText(
+                f"{self.status_label.text()}  ⚠️ Showing cached data from {snapshot_cache.format_age(min(cached_at))} ago."
+            )
+
+        headers = ["Subnet", "Subnet ID", "% Free", "# Free", "Total", "Leases", "Reservations", "Expiring < 1 h", "Trend (30 d)"]
+        multi = len(data) > 1
+        if multi:
+            headers.insert(0, "Server")
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(0)
+
+        history = utilization_history.get_history()
+        expiry_counts = [0] * (len(address_analytics.EXPIRY_EDGES) + 1)
+        for server, result in data.items():
+            if result is None:
+                continue
+            subnets, leases, reservations = result
+            if leases is None:
+                leases = []
+            for n, count in enumerate(address_analytics.expiry_histogram(leases)):
+                expiry_counts[n] += count
+
+            for usage in address_analytics.subnet_utilization(subnets, leases, reservations):
+                percent_free = usage.percent_free
+                values = [
+                    usage.subnet, str(usage.subnet_id), f"{percent_free:.1f}%", str(usage.free), str(usage.pool_size),
+                    str(usage.leases), str(usage.reservations), str(usage.expiring_soon)
+                ]
+                trend = history.trend(server, usage.subnet_id) if history is not None else None
+                values.append(f"{trend.sparkline} {trend.per_day:+.1f}%/d" if trend else "")
+                if multi:
+                    values.insert(0, server)
+                percent_col = headers.index("% Free")
 
                 row = self.table.rowCount()
                 self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(cidr))
-                self.table.setItem(row, 1, QTableWidgetItem(str(subnet_id)))
-                self.table.setItem(row, 2, QTableWidgetItem(f"{percent_free:.1f}%"))
-                self.table.setItem(row, 3, QTableWidgetItem(str(free)))
-                self.table.setItem(row, 4, QTableWidgetItem(str(total)))
-                self.table.setItem(row, 5, QTableWidgetItem(str(len(leases))))
-                self.table.setItem(row, 6, QTableWidgetItem(str(len(reservations))))
-
-                item = self.table.item(row, 2)  # Column 2 = % Free
-                if item:
-                    if percent_free < 10:
-                        item.setBackground(QColor("#ffcccc"))  # Light red
-                    elif percent_free < 34:
-                        item.setBackground(QColor("#fff3cd"))  # Light yellow
-                    else:
-                        item.setBackground(QColor("#d4edda"))  # Light green
-
-            return  # Done with dummy mode
-
-        try:
-            leases = kea_api.get_active_leases()
-            server_up = bool(leases)  # Treat empty list as "server up"
-        except:
-            server_up = False
-
-        if not server_up:
-            self.status_label.setText("❌ Kea DHCP Server is not responding.")
-        else:
-            self.status_label.setText("✅ Kea DHCP Server is online.")
+                for col, val in enumerate(values):
+                    item = QTableWidgetItem(val)
+                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
 
-        subnets = kea_api.get_subnets()
-        reservations = kea_api.get_reservations_from_db()
+                    # Color code row based on % free
+                    if col == percent_col:
+                        if percent_free < 10:
+                            item.setBackground(QColor("#ffcccc"))  # Red
+                        elif percent_free < 34:
+                            item.setBackground(QColor("#fff3cd"))  # Yellow
+                        else:
+                            item.setBackground(QColor("#d4edda"))  # Green
 
-        self.table.setRowCount(len(subnets))
-        headers = ["Subnet", "Subnet ID", "% Free", "# Free", "Total", "Leases", "Reservations"]
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
+                    if col == len(values) - 1 and trend:
+                        item.setToolTip(trend_tooltip(trend))
 
-        # Build map of subnet_id -> ip_network
-        subnet_map = {
-            str(s["subnet_id"]): ipaddress.ip_network(s["subnet"])
-            for s in subnets
-        }
-
-        # Build reservation counts by subnet_id
-        reservation_counts = {subnet_id: 0 for subnet_id in subnet_map}
-        for r in reservations:
-            ip = ipaddress.ip_address(r["ip-address"])
-            for sid, network in subnet_map.items():
-                if ip in network:
-                    reservation_counts[sid] += 1
-                    break
-
-        for row, subnet in enumerate(subnets):
-            subnet_id = str(subnet["subnet_id"])
-            cidr = subnet["subnet"]
-            pool_ranges = subnet.get("pools", [])
-
-            # Parse pool start/end
-            total_ips = 0
-            for pool in pool_ranges:
-                start, end = pool.split("-")
-                start_int = int.from_bytes(map(int, start.split(".")), byteorder="big")
-                end_int = int.from_bytes(map(int, end.split(".")), byteorder="big")
-                total_ips += end_int - start_int + 1
-
-            lease_count = sum(1 for l in leases if str(l.get("subnet-id")) == subnet_id)
-            res_count = reservation_counts.get(subnet_id, 0)
-
-            used = lease_count + res_count
-            free = max(0, total_ips - used)
-            percent_free = (free / total_ips) * 100 if total_ips else 0
-
-            values = [cidr, subnet_id, f"{percent_free:.1f}%", str(free), str(total_ips), str(lease_count), str(res_count)]
-            for col, val in enumerate(values):
-                item = QTableWidgetItem(val)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-                # Color code row based on % free
-                if col == 2:
-                    if percent_free < 10:
-                        item.setBackground(QColor("#ffcccc"))  # Red
-                    elif percent_free < 34:
-                        item.setBackground(QColor("#fff3cd"))  # Yellow
-                    else:
-                        item.setBackground(QColor("#d4edda"))  # Green
-
-                self.table.setItem(row, col, item)
+                    self.table.setItem(row, col, item)
+
+        self.expiry_label.setText("Lease expiry: " + ", ".join(
+            f"{label}: {count}" for label, count in zip(address_analytics.EXPIRY_LABELS, expiry_counts)
+        ))
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-
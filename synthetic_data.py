@@ -0,0 +1,415 @@
+import functools
+import ipaddress
+import random
+import threading
+import time
+from config_loader import DUMMY_CONFIG, SERVERS, get_logger
+from pool_occupancy import parse_pool
+from pool_resize import current_pools
+
+log = get_logger(__name__)
+
+# A few well-known OUIs so generated MACs look like real devices
+OUIS = ["00:50:56", "00:0C:29", "08:00:27", "B8:27:EB", "DC:A6:32"]
+HOST_PREFIXES = ["laptop", "desktop", "phone", "printer", "cam", "ap", "tv", "sensor"]
+
+
+def _int_to_ip(value):
+    return str(ipaddress.IPv4Address(value))
+
+
+def _locked(method):
+    """Runs a backend method under the backend's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SyntheticBackend:
+    """
+    Deterministic, in-memory stand-in for Kea and the hosts table used when
+    `dummy_data` is on.
+
+    Subnets are laid out back to back in 10.0.0.0/8 using the configured prefix
+    lengths. Leases and reservations for a subnet are only generated the first
+    time that subnet is read, from a random generator seeded with (seed, subnet
+    id), so the same config always yields the same data. Reads apply simulated
+    lease churn for the time elapsed since the previous read, and the write
+    functions change this state so the GUI behaves as it would against a server.
+    Reads and writes come from fan-out, auto-refresh and commit threads at once,
+    so every public method runs under one lock.
+    """
+
+    def __init__(self, settings=None, seed_offset=0):
+        settings = DUMMY_CONFIG if settings is None else settings
+        self.subnet_count = int(settings.get("subnets", 6))
+        self.prefix_lengths = [int(p) for p in settings.get("prefix_lengths", [24])] or [24]
+        self.fill_ratio = float(settings.get("pool_fill_ratio", 0.3))
+        self.reservation_ratio = float(settings.get("reservation_ratio", 0.02))
+        self.churn_per_minute = float(settings.get("churn_per_minute", 0))
+        self.valid_lifetime = int(settings.get("valid_lifetime", 3600))
+        self.seed = int(settings.get("seed", 1)) + seed_offset
+        self.lock = threading.RLock()
+
+        self.churn_rng = random.Random(self.seed)
+        self.last_churn = time.time()
+        self.started = self.last_churn
+
+        self.subnet_list = self._layout_subnets()
+        self.subnet_by_id = {s["subnet_id"]: s for s in self.subnet_list}
+
+        # subnet_id -> {ip: lease} / {ip: reservation}, filled lazily
+        self.lease_maps = {}
+        self.reservation_maps = {}
+
+    # ---- Generation ------------------------------------------------------
+
+    def _layout_subnets(self):
+        subnets = []
+        base = int(ipaddress.IPv4Address("10.0.0.0"))
+        limit = int(ipaddress.IPv4Address("10.255.255.255"))
+
+        for i in range(self.subnet_count):
+            prefix = self.prefix_lengths[i % len(self.prefix_lengths)]
+            size = 1 << (32 - prefix)
+            base = (base + size - 1) // size * size  # Align to the block size
+            if base + size - 1 > limit:
+                log.warning("Synthetic subnets exhausted 10.0.0.0/8 after %d subnets", i)
+                break
+
+            # Leave a little room at both ends of the pool for reservations
+            margin = 10 if size > 64 else 1
+            pool_start = base + margin
+            pool_end = base + size - 1 - (5 if size > 64 else 1)
+
+            subnets.append({
+                "subnet_id": i + 1,
+                "subnet": f"{_int_to_ip(base)}/{prefix}",
+                "valid_lifetime": self.valid_lifetime,
+                "pools": [f"{_int_to_ip(pool_start)}-{_int_to_ip(pool_end)}"]
+            })
+            base += size
+
+        return subnets
+
+    def _rng(self, subnet_id):
+        return random.Random(self.seed * 1000003 + subnet_id)
+
+    def _make_mac(self, rng):
+        return f"{rng.choice(OUIS)}:{rng.randrange(256):02X}:{rng.randrange(256):02X}:{rng.randrange(256):02X}"
+
+    def _make_lease(self, rng, ip_address, subnet, now):
+        return {
+            "ip-address": ip_address,
+            "hw-address": self._make_mac(rng),
+            "hostname": f"{rng.choice(HOST_PREFIXES)}-{rng.randrange(100000)}",
+            "subnet-id": subnet["subnet_id"],
+            "cltt": now - rng.randrange(subnet["valid_lifetime"]),
+            "valid-lft": subnet["valid_lifetime"],
+            "state": 0
+        }
+
+    @staticmethod
+    def _pools(subnet):
+        """Every pool of a subnet as sorted (first, last) ints; the whole subnet if it has none."""
+        pools = current_pools(subnet)
+        if not pools:
+            network = ipaddress.IPv4Network(subnet["subnet"])
+            pools = [(int(network.network_address) + 1, int(network.broadcast_address) - 1)]
+        return pools
+
+    @staticmethod
+    def _pool_address(pools, offset):
+        """The address `offset` places into the pools taken back to back."""
+        for first, last in pools:
+            if offset <= last - first:
+                return first + offset
+            offset -= last - first + 1
+        raise IndexError(offset)
+
+    def _generate(self, subnet_id):
+        """Creates the leases and reservations for one subnet."""
+        subnet = self.subnet_by_id[subnet_id]
+        rng = self._rng(subnet_id)
+        now = int(time.time())
+
+        pools = self._pools(subnet)
+        pool_size = sum(last - first + 1 for first, last in pools)
+        lease_count = int(pool_size * self.fill_ratio)
+
+        leases = {}
+        for offset in sorted(rng.sample(range(pool_size), lease_count)):
+            ip_address = _int_to_ip(self._pool_address(pools, offset))
+            leases[ip_address] = self._make_lease(rng, ip_address, subnet, now)
+
+        # Reservations sit outside the pools where there is room, like most real
+        # setups; the rest go on pool addresses that are not leased
+        network = ipaddress.IPv4Network(subnet["subnet"])
+        outside = []
+        start = int(network.network_address) + 1
+        for first, last in pools:
+            outside += range(start, first)
+            start = last + 1
+        outside += range(start, int(network.broadcast_address))
+        reservation_count = int(pool_size * self.reservation_ratio)
+
+        addresses = rng.sample(outside, min(len(outside), reservation_count))
+        if reservation_count > len(addresses):
+            leased = {int(ipaddress.IPv4Address(ip)) for ip in leases}
+            free = [a for first, last in pools for a in range(first, last + 1) if a not in leased]
+            addresses += rng.sample(free, min(len(free), reservation_count - len(addresses)))
+
+        reservations = {}
+        for address in sorted(addresses):
+            ip_address = _int_to_ip(address)
+            reservations[ip_address] = {
+                "ip-address": ip_address,
+                "dhcp_identifier": self._make_mac(rng).replace(":", ""),
+                "hostname": f"reserved-{rng.choice(HOST_PREFIXES)}-{rng.randrange(100000)}",
+                "subnet_id": subnet_id
+            }
+
+        self.lease_maps[subnet_id] = leases
+        self.reservation_maps[subnet_id] = reservations
+        log.debug("Generated subnet %s: %d leases, %d reservations", subnet_id, len(leases), len(reservations))
+
+    def _ensure(self, subnet_id):
+        if subnet_id not in self.lease_maps:
+            self._generate(subnet_id)
+
+    def _ensure_all(self):
+        for subnet in self.subnet_list:
+            self._ensure(subnet["subnet_id"])
+
+    def _churn(self):
+        """Applies simulated renewals, releases and new leases for the time since the last read."""
+        now = time.time()
+        events = int((now - self.last_churn) / 60 * self.churn_per_minute)
+        if events <= 0 or not self.lease_maps:
+            return
+        self.last_churn = now
+
+        rng = self.churn_rng
+        generated = sorted(self.lease_maps)
+        for _ in range(events):
+            subnet_id = rng.choice(generated)
+            subnet = self.subnet_by_id[subnet_id]
+            leases = self.lease_maps[subnet_id]
+            action = rng.random()
+
+            if action < 0.6 and leases:  # Renewal
+                ip_address = rng.choice(list(leases))
+                leases[ip_address] = dict(leases[ip_address], cltt=int(now))
+            elif action < 0.8 and leases:  # Release
+                del leases[rng.choice(list(leases))]
+            else:  # New client
+                pools = self._pools(subnet)
+                size = sum(last - first + 1 for first, last in pools)
+                ip_address = _int_to_ip(self._pool_address(pools, rng.randrange(size)))
+                if ip_address not in leases:
+                    lease = self._make_lease(rng, ip_address, subnet, int(now))
+                    lease["cltt"] = int(now)
+                    leases[ip_address] = lease
+
+    # ---- Reads -----------------------------------------------------------
+
+    @_locked
+    def subnets(self):
+        return [dict(s, pools=list(s["pools"])) for s in self.subnet_list]
+
+    @_locked
+    def leases(self, subnet_id=None):
+        if subnet_id is not None:
+            self._ensure(int(subnet_id))
+            self._churn()
+            return list(self.lease_maps[int(subnet_id)].values())
+
+        self._ensure_all()
+        self._churn()
+        return [lease for subnet_id in sorted(self.lease_maps) for lease in self.lease_maps[subnet_id].values()]
+
+    @_locked
+    def reservations(self, subnet_id=None):
+        if subnet_id is not None:
+            self._ensure(int(subnet_id))
+            return list(self.reservation_maps[int(subnet_id)].values())
+
+        self._ensure_all()
+        return [res for subnet_id in sorted(self.reservation_maps) for res in self.reservation_maps[subnet_id].values()]
+
+    @_locked
+    def lease(self, ip_address):
+        subnet_id = self._subnet_for_ip(ip_address)
+        if subnet_id is None:
+            return None
+        self._ensure(subnet_id)
+        lease = self.lease_maps[subnet_id].get(ip_address)
+        return dict(lease) if lease is not None else None
+
+    @_locked
+    def reservation(self, ip_address):
+        reservations = self._find_reservation(ip_address)
+        return dict(reservations[ip_address]) if reservations is not None else None
+
+    @_locked
+    def statistics(self):
+        """Address statistics and packet counters shaped like the `statistic-get-all` arguments."""
+        self._ensure_all()
+        self._churn()
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S.000000")
+        elapsed = time.time() - self.started
+        discovers = requests = allocation_failures = 0.0
+        stats = {}
+        for subnet in self.subnet_list:
+            subnet_id = subnet["subnet_id"]
+            total = 0
+            for pool in subnet["pools"]:
+                first, last = parse_pool(pool)
+                total += last - first + 1
+            stats[f"subnet[{subnet_id}].total-addresses"] = [[total, stamp]]
+            stats[f"subnet[{subnet_id}].assigned-addresses"] = [[len(self.lease_maps[subnet_id]), stamp]]
+            stats[f"subnet[{subnet_id}].declined-addresses"] = [[0, stamp]]
+
+            # Packet counters since the backend started: every client renews at half its
+            # lifetime, and new clients arrive with the configured churn
+            leases = len(self.lease_maps[subnet_id])
+            lifetime = max(1, int(subnet["valid_lifetime"]))
+            renewals = elapsed * leases * 2 / lifetime
+            arrivals = elapsed * (self.churn_per_minute / 60 / len(self.subnet_list) + leases / lifetime / 10)
+            failures = arrivals * max(0.0, leases / total - 0.9) if total else arrivals
+            stats[f"subnet[{subnet_id}].cumulative-assigned-addresses"] = [[int(arrivals - failures), stamp]]
+            stats[f"subnet[{subnet_id}].v4-allocation-fail"] = [[int(failures), stamp]]
+            discovers += arrivals
+            requests += renewals + arrivals - failures
+            allocation_failures += failures
+
+        stats.update({
+            "pkt4-discover-received": [[int(discovers), stamp]],
+            "pkt4-offer-sent": [[int(discovers - allocation_failures), stamp]],
+            "pkt4-request-received": [[int(requests), stamp]],
+            "pkt4-ack-sent": [[int(requests * 0.995), stamp]],
+            "pkt4-nak-sent": [[int(requests) - int(requests * 0.995), stamp]],
+            "pkt4-decline-received": [[0, stamp]],
+            "pkt4-receive-drop": [[0, stamp]],
+            "v4-allocation-fail": [[int(allocation_failures), stamp]],
+            "declined-addresses": [[0, stamp]]
+        })
+        return stats
+
+    # ---- Writes ----------------------------------------------------------
+
+    def _subnet_for_ip(self, ip_address):
+        address = ipaddress.IPv4Address(ip_address)
+        for subnet in self.subnet_list:
+            if address in ipaddress.IPv4Network(subnet["subnet"]):
+                return subnet["subnet_id"]
+        return None
+
+    def _find_reservation(self, ip_address):
+        for reservations in self.reservation_maps.values():
+            if ip_address in reservations:
+                return reservations
+        # Generated reservations lie in their own subnet, so only that one may still be missing
+        subnet_id = self._subnet_for_ip(ip_address)
+        if subnet_id is None or subnet_id in self.reservation_maps:
+            return None
+        self._ensure(subnet_id)
+        reservations = self.reservation_maps[subnet_id]
+        return reservations if ip_address in reservations else None
+
+    @_locked
+    def add_reservation(self, ip_address, mac_address, hostname, subnet_id):
+        subnet_id = int(subnet_id) if str(subnet_id).isdigit() else self._subnet_for_ip(ip_address)
+        if subnet_id not in self.subnet_by_id:
+            return False
+        self._ensure(subnet_id)
+        existing = self._find_reservation(ip_address)
+        if existing is not None:
+            existing.pop(ip_address)
+        self.reservation_maps[subnet_id][ip_address] = {
+            "ip-address": ip_address,
+            "dhcp_identifier": mac_address.replace(":", "").replace("-", "").upper(),
+            "hostname": hostname,
+            "subnet_id": subnet_id
+        }
+        return True
+
+    @_locked
+    def delete_reservation(self, ip_address):
+        reservations = self._find_reservation(ip_address)
+        if reservations is None:
+            return False
+        del reservations[ip_address]
+        return True
+
+    @_locked
+    def update_hostname(self, ip_address, hostname):
+        reservations = self._find_reservation(ip_address)
+        if reservations is not None:
+            reservations[ip_address]["hostname"] = hostname
+            return True
+        # Not reserved: the real backend updates nothing, but keep the lease view consistent
+        for leases in self.lease_maps.values():
+            if ip_address in leases:
+                leases[ip_address]["hostname"] = hostname
+        return True
+
+    @_locked
+    def update_mac_address(self, ip_address, mac_address):
+        reservations = self._find_reservation(ip_address)
+        if reservations is None:
+            return False
+        reservations[ip_address]["dhcp_identifier"] = mac_address.replace(":", "").replace("-", "").upper()
+        return True
+
+    @_locked
+    def delete_lease(self, ip_address):
+        for leases in self.lease_maps.values():
+            if leases.pop(ip_address, None) is not None:
+                return True
+        return False
+
+    @_locked
+    def wipe_leases(self, subnet_id):
+        self._ensure(int(subnet_id))
+        leases = self.lease_maps[int(subnet_id)]
+        count = len(leases)
+        leases.clear()
+        return count
+
+    @_locked
+    def update_subnet_lifetime(self, subnet_id, lifetime):
+        subnet = self.subnet_by_id.get(int(subnet_id))
+        if subnet is None:
+            return False
+        subnet["valid_lifetime"] = int(lifetime)
+        return True
+
+    @_locked
+    def update_subnet_pool(self, subnet_id, pool_range):
+        subnet = self.subnet_by_id.get(int(subnet_id))
+        if subnet is None:
+            return False
+        subnet["pools"] = [p.strip() for p in pool_range.split(",") if p.strip()] if isinstance(pool_range, str) else list(pool_range)
+        return True
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(server=None):
+    """
+    Returns the synthetic backend for a server name (the default server if None),
+    creating it on first use. Each server gets its own data; HA peers share one.
+    """
+    names = [s["name"] for s in SERVERS]
+    name = server or names[0]
+    peer = next((s["ha_peer"] for s in SERVERS if s["name"] == name), None)
+    key = min(name, peer, key=names.index) if peer in names else name
+
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = SyntheticBackend(seed_offset=names.index(key) if key in names else 0)
+        return _backends[key]